@@ -18,4 +18,5 @@ from ScopeFoundry.scanning import (
 )
 from .sequencer import Sequencer, SweepSequencer
 from .controlling import PIDFeedbackControl, RangedOptimization
-from .sweeping import Collector, Sweep1D, Sweep2D, Sweep3D, Sweep4D, Map2D
+from .sweeping import Collector, Sweep1D, Sweep2D, Sweep3D, Sweep4D, SweepND, Map2D
+from .telemetry import TelemetryLogger
@@ -0,0 +1,145 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Tuple, Union
+
+import h5py
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AsyncWorker:
+    """
+    Calls queued functions on a dedicated worker thread.
+
+    The calling thread only pays for pushing a request onto a bounded queue. If
+    the worker can not keep up, the queue fills up and :meth:`call` blocks until
+    there is space again (backpressure).
+
+    Errors on the worker thread are re-raised on the next call of :meth:`call`,
+    :meth:`join` or :meth:`close`, requests queued after a failure are discarded.
+    """
+
+    def __init__(self, max_queue_size: int = 1024, name: str = "async_worker"):
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.error = None
+        self.n_blocked = 0  # number of times a push waited for a full queue
+        self.blocked_time = 0.0  # total time in seconds pushes waited
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread.is_alive()
+
+    def _put(self, item: Tuple) -> None:
+        self.raise_error()
+        if not self.is_running:
+            raise RuntimeError(f"{type(self).__name__} is closed")
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            t0 = time.perf_counter()
+            self.queue.put(item)
+            self.n_blocked += 1
+            self.blocked_time += time.perf_counter() - t0
+
+    def call(self, func: Callable, *args) -> None:
+        """queues an arbitrary *func(*args)*, e.g. creating or resizing a dataset"""
+        self._put((func, args))
+
+    def join(self) -> None:
+        """blocks until all queued requests are processed"""
+        if self.is_running:
+            self.queue.join()
+        self.raise_error()
+
+    def close(self) -> None:
+        """processes all queued requests and stops the worker thread"""
+        if self.is_running:
+            self.queue.put(_STOP)
+            self.thread.join()
+        self.raise_error()
+
+    def raise_error(self) -> None:
+        if self.error is not None:
+            err, self.error = self.error, None
+            raise err
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                if self.error is not None:
+                    continue  # discard pending requests after a failure
+                func, args = item
+                func(*args)
+            except Exception as err:
+                logger.error(f"{type(self).__name__} failed: {err!r}")
+                self.error = err
+            finally:
+                self.queue.task_done()
+
+
+class AsyncH5Writer(AsyncWorker):
+    """
+    Writes to HDF5 datasets on a dedicated writer thread, see AsyncWorker.
+
+    The acquisition thread only pays for pushing a write request onto a bounded
+    queue. If the disk can not keep up, the queue fills up and :meth:`write`
+    blocks until there is space again (backpressure).
+
+    Usually owned by a Measurement, see Measurement.open_async_h5_writer(),
+    which closes it (waiting for all pending writes) on close_h5_file()
+    and before post_run().
+    """
+
+    def __init__(
+        self,
+        h5_file: h5py.File,
+        max_queue_size: int = 1024,
+        name: str = "async_h5_writer",
+    ):
+        self.h5_file = h5_file
+        self.n_writes = 0
+        super().__init__(max_queue_size, name)
+
+    def write(
+        self, dset: Union[h5py.Dataset, str], index: Any, value: Any, copy: bool = True
+    ) -> None:
+        """
+        queues *dset[index] = value*
+
+        *dset*: h5py.Dataset or path of a dataset in h5_file
+        *copy*: copies *value*. Set to False only if *value* is not modified
+                after the call.
+        """
+        if copy:
+            value = np.array(value, copy=True)
+        self._put((self._write, (dset, index, value)))
+
+    def flush(self) -> None:
+        """queues a flush of h5_file"""
+        self._put((self._flush, ()))
+
+    def close(self) -> None:
+        """processes all queued requests, flushes h5_file and stops the writer thread"""
+        if self.is_running:
+            self.queue.put((self._flush, ()))
+        super().close()
+
+    def _write(self, dset, index, value) -> None:
+        if isinstance(dset, str):
+            dset = self.h5_file[dset]
+        dset[index] = value
+        self.n_writes += 1
+
+    def _flush(self) -> None:
+        if self.h5_file.id.valid:
+            self.h5_file.flush()
@@ -57,6 +57,46 @@ class WRITE_RES(enum.Enum):
     PROTECTED = enum.auto()
 
 
+class SettingHandle:
+    """
+    A setting path resolved to its LoggedQuantity, see BaseApp.resolve.
+
+    The LoggedQuantity is looked up once and again only after settings were
+    added to or removed from the app, i.e. handles can be kept across adding
+    and removing components.
+    """
+
+    __slots__ = ("app", "path", "_lq", "_generation")
+
+    def __init__(self, app: "BaseApp", path: str) -> None:
+        self.app = app
+        self.path = path
+        self._lq = None
+        self._generation = -1
+
+    @property
+    def lq(self) -> LoggedQuantity:
+        if self._generation != self.app._setting_paths_generation:
+            self._lq = self.app.get_lq(self.path)
+            self._generation = self.app._setting_paths_generation
+        if self._lq is None:
+            raise KeyError(f"setting {self.path} does not exist")
+        return self._lq
+
+    def read(self, from_hardware: bool = True) -> Any:
+        """returns the value, read from hardware first if connected to a read function"""
+        lq = self.lq
+        if from_hardware and lq.hardware_read_func is not None:
+            return lq.read_from_hardware()
+        return lq.val
+
+    def write(self, value: Any) -> None:
+        self.lq.update_value(value)
+
+    def __repr__(self) -> str:
+        return f"SettingHandle({self.path!r})"
+
+
 class EventFilter(QtCore.QObject):
     def eventFilter(self, obj, event):
         # Handle selected events
@@ -93,6 +133,9 @@ class BaseApp(QtCore.QObject):
         self._subtree_managers_ = []
         self._widgets_managers_ = []
         self._setting_paths: SETTINGS_PATH_TYPE = {}
+        # incremented on adding/removing settings, invalidates SettingHandles
+        self._setting_paths_generation = 0
+        self._setting_handles: Dict[str, SettingHandle] = {}
         self.favorites_widget = new_favorites_widget(self)
         self.favorites_widget.main_widget.setMaximumWidth(300)
         self.operations = Operations(path="app")
@@ -239,9 +282,11 @@ class BaseApp(QtCore.QObject):
             )
         )
         self._setting_paths[lq.path] = lq
+        self._setting_paths_generation += 1
 
     def remove_setting_path(self, lq: LoggedQuantity) -> None:
         self._setting_paths.pop(lq.path, None)
+        self._setting_paths_generation += 1
 
     def add_lq_collection_to_settings_path(self, settings: LQCollection) -> None:
         settings.q_object.lq_added.connect(self.add_setting_path)
@@ -271,6 +316,17 @@ class BaseApp(QtCore.QObject):
         """
         return self._setting_paths.get(path, None)
 
+    def resolve(self, path: str) -> SettingHandle:
+        """
+        returns a SettingHandle for *path* with read() and write(value). Use in
+        loops instead of get_lq, read_setting and write_setting, the path is
+        only looked up again after settings were added or removed.
+        """
+        handle = self._setting_handles.get(path)
+        if handle is None:
+            handle = self._setting_handles[path] = SettingHandle(self, path)
+        return handle
+
     def write_settings_safe(self, settings: Dict[str, Any]) -> Dict[str, WRITE_RES]:
         """
         updates settings based on a dictionary.
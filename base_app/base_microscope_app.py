@@ -62,6 +62,7 @@ class HardwareProtocol(Protocol):
 
     def connect(self): ...
     def disconnect(self): ...
+    def read_from_hardware(self, names: List[str] = None): ...
 
 
 class BaseMicroscopeApp(BaseApp):
@@ -69,9 +70,17 @@ class BaseMicroscopeApp(BaseApp):
     """The name of the microscope app, default is ScopeFoundry."""
     mdi = True
     """Multiple Document Interface flag. Tells the app whether to include an MDI widget in the app."""
+    lazy_measure_uis = True
+    """If True, the figure of a measurement (setup_figure) is built when it is first
+    shown or started, or when the event loop is idle after the main window is shown.
+    Set to False to build all figures before the window is shown."""
 
     def __init__(self, argv: List[str] = [], **kwargs: Any) -> None:
+        t_init = time.perf_counter()
         super().__init__(argv, **kwargs)
+        self._t_init = t_init
+        # {component path: {phase: seconds}}, see startup_timing_report
+        self.startup_timing: Dict[str, Dict[str, float]] = OrderedDict()
 
         self.settings_icon_path = self.icons_path / "settings_logo.png"
         self.jupyter_logo_path = self.icons_path / "jupyter_logo.png"
@@ -85,8 +94,11 @@ class BaseMicroscopeApp(BaseApp):
         self.logo_path = str(self.icons_path / "scopefoundry_logo2B_1024.png")
         self.quickbar = None  # also with self.add_quickbar
         self.docs_path = get_child_path(self) / "docs"
+        t0 = time.perf_counter()
         self.setup()
+        self.record_startup_time("app", "setup", time.perf_counter() - t0)
 
+        t0 = time.perf_counter()
         self._setup_ui_base()
         self._setup_ui_buttons()
         self._setup_ui_tree_column()
@@ -97,6 +109,8 @@ class BaseMicroscopeApp(BaseApp):
         self._post_setup_ui_quickaccess()
         self._setup_ui_logo()
         self._add_docs_to_help_menu()
+        self.record_startup_time("app", "ui", time.perf_counter() - t0)
+        QtCore.QTimer.singleShot(0, self._on_first_idle)
 
     def setup(self) -> None:
         """Override to add Hardware and Measurement Components"""
@@ -247,18 +261,67 @@ class BaseMicroscopeApp(BaseApp):
         self.logging_subwin = self.add_mdi_subwin(self.logging_widget, "Log")
         self.console_subwin = self.add_mdi_subwin(self.console_widget, "Console")
 
-        for name, measure in self.measurements.items():
-            self.log.debug(f"setting up figure for measurement {name}")
-            ui = self.load_measure_ui(measure)
-            if ui is not None:
-                subwin = self.add_mdi_subwin(ui, measure.name)
-                measure.subwin = subwin
+        if not self.lazy_measure_uis:
+            self._load_all_measure_uis()
 
     def _load_all_measure_uis(self) -> None:
         for measure in self.measurements.values():
             self.load_measure_ui(measure)
         self.ui.action_load_all_measure_uis.setVisible(False)
 
+    def _on_first_idle(self) -> None:
+        self.record_startup_time(
+            "app", "window shown", time.perf_counter() - self._t_init
+        )
+        if self.mdi and self.lazy_measure_uis:
+            self._load_next_measure_ui()
+        else:
+            self.log.debug(self.startup_timing_report())
+
+    def _load_next_measure_ui(self) -> None:
+        """builds one pending measurement figure per event loop iteration"""
+        for measure in self.measurements.values():
+            if measure.name in self._loaded_measure_uis:
+                continue
+            # do not bring the new subwindow to front
+            active_subwin = self.ui.mdiArea.activeSubWindow()
+            self.load_measure_ui(measure)
+            if active_subwin is not None:
+                self.ui.mdiArea.setActiveSubWindow(active_subwin)
+            QtCore.QTimer.singleShot(0, self._load_next_measure_ui)
+            return
+        self.record_startup_time(
+            "app", "all figures", time.perf_counter() - self._t_init
+        )
+        self.log.debug(self.startup_timing_report())
+
+    def record_startup_time(self, path: str, phase: str, seconds: float) -> None:
+        self.startup_timing.setdefault(path, OrderedDict())[phase] = seconds
+
+    def startup_timing_report(self) -> str:
+        """
+        returns a table of the time spent per component: setup, setup_figure and
+        the last connect of hardware. The app phases are since the app was
+        created, except for setup (which includes the components) and ui.
+        """
+        timing = OrderedDict(
+            (path, OrderedDict(phases)) for path, phases in self.startup_timing.items()
+        )
+        for hw in self.hardware.values():
+            connect_duration = getattr(hw, "connect_duration", None)
+            if connect_duration is not None:
+                timing.setdefault(f"hw/{hw.name}", OrderedDict())[
+                    "connect"
+                ] = connect_duration
+
+        app_phases = timing.pop("app", {})
+        lines = ["startup timing [ms]"]
+        lines += [f"  app {phase}: {t * 1e3:.1f}" for phase, t in app_phases.items()]
+        for path, phases in sorted(timing.items(), key=lambda x: -sum(x[1].values())):
+            details = ", ".join(f"{phase} {t * 1e3:.1f}" for phase, t in phases.items())
+            lines.append(f"  {path}: {sum(phases.values()) * 1e3:.1f} ({details})")
+        return "\n".join(lines)
+
     def _setup_ui_menu_bar(self) -> None:
         self.ui.action_set_data_dir.triggered.connect(self.save_dir.file_browser)
         self.ui.action_load_ini.triggered.connect(self.settings_load_dialog)
@@ -373,7 +436,7 @@ class BaseMicroscopeApp(BaseApp):
         self.ui.mdiArea.cascadeSubWindows()
 
     def bring_measure_ui_to_front(self, measure: MeasurementProtocol) -> None:
-        ui = self._loaded_measure_uis.get(measure.name, None)
+        ui = self.load_measure_ui(measure)
         if ui is None:
             # measure also has no subwin
             return
@@ -386,7 +449,12 @@ class BaseMicroscopeApp(BaseApp):
         if measure.name in self._loaded_measure_uis:
             return self._loaded_measure_uis[measure.name]
 
+        self.log.debug(f"setting up figure for measurement {measure.name}")
+        t0 = time.perf_counter()
         measure.setup_figure()
+        self.record_startup_time(
+            f"mm/{measure.name}", "setup_figure", time.perf_counter() - t0
+        )
         if not hasattr(measure, "ui"):
             self._loaded_measure_uis[measure.name] = None
             for btn in measure._show_btns:
@@ -396,6 +464,8 @@ class BaseMicroscopeApp(BaseApp):
         self._loaded_measure_uis[measure.name] = measure.ui
         measure.ui.setWindowTitle(measure.name)
         self.ui.menuWindow.addAction(measure.name, measure.show_ui)
+        if self.mdi:
+            measure.subwin = self.add_mdi_subwin(measure.ui, measure.name)
         return measure.ui
 
     def bring_mdi_subwin_to_front(self, subwin: QtWidgets.QMdiSubWindow) -> None:
@@ -473,6 +543,9 @@ class BaseMicroscopeApp(BaseApp):
             hw = hw(app=self)
 
         self.hardware.add(hw.name, hw)
+        self.record_startup_time(
+            f"hw/{hw.name}", "setup", getattr(hw, "setup_duration", 0.0)
+        )
 
         self.add_lq_collection_to_settings_path(hw.settings)
 
@@ -496,6 +569,9 @@ class BaseMicroscopeApp(BaseApp):
         assert not measure.name in self.measurements.keys()
 
         self.measurements.add(measure.name, measure)
+        self.record_startup_time(
+            f"mm/{measure.name}", "setup", getattr(measure, "setup_duration", 0.0)
+        )
 
         self.add_lq_collection_to_settings_path(measure.settings)
 
@@ -668,6 +744,9 @@ class BaseMicroscopeApp(BaseApp):
         returns the LoggedQuantity defined by a path string of the form 'section/[component/]setting'
         where section are "mm", "hw" or "app"
         """
+        lq = self._setting_paths.get(path, None)
+        if lq is not None:
+            return lq
         parts = path.split("/")
         section = parts[0].lower()
         if section in ("hw", "hardware"):
@@ -738,9 +817,30 @@ class BaseMicroscopeApp(BaseApp):
         ================== =========  =============================================================================
         """
         paths = self.get_setting_paths() if paths is None else paths
-        return {
-            p: self.read_setting(p, read_from_hardware, ini_string_value) for p in paths
-        }
+        if read_from_hardware:
+            self.read_from_hardware_batched(paths)
+        return {p: self.read_setting(p, False, ini_string_value) for p in paths}
+
+    def read_from_hardware_batched(self, paths: List[str]) -> None:
+        """
+        reads settings from hardware with one HardwareComponent.read_from_hardware
+        call per hardware component, such that batch reads (see
+        HardwareComponent.connect_batch_read) are used.
+        """
+        hw_names: Dict[str, List[str]] = {}
+        for path in paths:
+            lq = self.get_lq(path)
+            parts = lq.path.split("/")
+            if len(parts) == 3 and parts[0] == "hw" and parts[1] in self.hardware:
+                hw_names.setdefault(parts[1], []).append(parts[2])
+            elif lq.has_hardware_read():
+                lq.read_from_hardware()
+        for hw_name, names in hw_names.items():
+            hw = self.hardware[hw_name]
+            if getattr(hw, "batch_read_func", None) is None:
+                names = [n for n in names if hw.settings.get_lq(n).has_hardware_read()]
+            if names:
+                hw.read_from_hardware(names)
 
     def lq_path(self, path: str) -> LoggedQuantity:
         warnings.warn(
@@ -798,7 +898,8 @@ class BaseMicroscopeApp(BaseApp):
                 self.ui.col_splitter.setSizes(win_state["col_splitter_sizes"])
             elif name.startswith("measurement/"):
                 M = self.measurements[name.split("/")[-1]]
-                restore_win_state(M.subwin, win_state)
+                if self.load_measure_ui(M) is not None:
+                    restore_win_state(M.subwin, win_state)
 
     def get_window_positions(self) -> Dict[str, Any]:
         positions = OrderedDict()
@@ -822,7 +923,7 @@ class BaseMicroscopeApp(BaseApp):
         positions["console"] = win_state_from_subwin(self.console_subwin)
 
         for name, M in self.measurements.items():
-            if hasattr(M, "ui"):
+            if M.subwin is not None:
                 positions[f"measurement/{name}"] = win_state_from_subwin(M.subwin)
 
         return positions
@@ -135,9 +135,9 @@ class PIDFeedbackControl(Measurement):
         while not self.interrupt_measurement_called:
             pid.tunings = s["Kp"], s["Ki"], s["Kd"]
             pid.setpoint = s["setpoint"]
-            sensor_value = self.app.get_lq(s["sensor"]).read_from_hardware()
+            sensor_value = self.app.resolve(s["sensor"]).read()
             plant_input = apply_min_max(pid(sensor_value), s["min_plant_input"], s["max_plant_input"])
-            self.app.get_lq(s["plant_input"]).update_value(plant_input)
+            self.app.resolve(s["plant_input"]).write(plant_input)
             s["error"] = 100.0 * (1 - sensor_value / s["setpoint"])
             lab_time = time.time() - t0
 
@@ -254,19 +254,19 @@ class RangedOptimization(Measurement):
     def read_f(self):
         x = 0.0
         for _ in range(self.settings["N_samples"]):
-            x += self.app.read_setting(self.settings["f"])
+            x += self.app.resolve(self.settings["f"]).read()
             time.sleep(self.settings["sampling_period"])
 
         return x / self.settings["N_samples"]
 
     def write_z_target(self, value, timeout=0, msg=None):
-        self.app.write_setting(self.settings["z"], value)
+        self.app.resolve(self.settings["z"]).write(value)
         if msg:
             print(msg)
         time.sleep(timeout)
 
     def read_z(self):
-        return self.app.read_setting(self.z_read_path)
+        return self.app.resolve(self.z_read_path).read()
 
     def update_z_read(self):
         s = self.settings
@@ -6,6 +6,9 @@ from qtpy import QtCore, QtWidgets, QtGui
 
 from ScopeFoundry import BaseApp, LoggedQuantity
 from ScopeFoundry.data_browser.data_browser_view import DataBrowserView
+from ScopeFoundry.data_browser.derived_cache import DerivedCache, default_cache_dir
+from ScopeFoundry.data_browser.file_loader import FileLoader
+from ScopeFoundry.data_browser.file_probe import measurement_names
 from ScopeFoundry.dynamical_widgets.tree_widget import new_tree_widget
 from ScopeFoundry.helper_funcs import load_qt_ui_file, load_qt_ui_from_pkg, sibling_path
 from ScopeFoundry.data_browser.viewers.file_info import FileInfoView
@@ -41,6 +44,32 @@ class DataBrowser(BaseApp):
             description="auto selects the view when file name is changed.",
         )
         s.New("view_name", dtype=str, initial="file_info", choices=("0",))
+        s.New(
+            "use_cache",
+            dtype=bool,
+            initial=True,
+            description="reuse maps derived by views from the persistent cache",
+        )
+        s.New("cache_dir", dtype="file", is_dir=True, initial=str(default_cache_dir()))
+        s.New(
+            "cache_size",
+            dtype=float,
+            initial=1024,
+            vmin=0,
+            unit="MB",
+            description="least recently used entries are deleted beyond this size",
+        )
+        self.derived_cache = DerivedCache(s["cache_dir"], s["cache_size"] * 2**20)
+        s.New(
+            "prefetch_neighbors",
+            dtype=int,
+            initial=1,
+            vmin=0,
+            description="number of files before and after the selected file in the tree "
+            "that are loaded in advance by views that support it",
+        )
+        self.file_loader = FileLoader(self)
+        self.qtapp.aboutToQuit.connect(self.file_loader.shutdown)
 
         self.setup_ui()
 
@@ -56,6 +85,8 @@ class DataBrowser(BaseApp):
 
         s.file_filter.add_listener(self.on_change_file_filter)
         s.view_name.add_listener(self.on_change_view_name)
+        s.cache_dir.add_listener(self.on_change_cache_settings)
+        s.cache_size.add_listener(self.on_change_cache_settings)
 
         self.setup_dark_mode_option(dark_mode)
 
@@ -147,6 +178,7 @@ class DataBrowser(BaseApp):
 
         # Update views dict
         self.views[new_view.name] = new_view
+        self.update_measurement_index()
 
         self.add_lq_collection_to_settings_path(new_view.settings)
 
@@ -182,7 +214,37 @@ class DataBrowser(BaseApp):
                 self.settings["view_name"] = view_name
                 self.setup_view(self.views[view_name])
 
-        self.current_view.on_change_data_filename(fname)
+        self.load_file_in_view(self.current_view, fname)
+        self.prefetch_neighbors(fname)
+
+    def load_file_in_view(self, view: DataBrowserView, fname):
+        """in a worker thread if the view supports it, see DataBrowserView.load_file"""
+        if view.supports_async_load:
+            self.ui.statusbar.showMessage(f"loading {fname} ...")
+            self.file_loader.request(view, fname)
+        else:
+            self.file_loader.cancel()
+            view.on_change_data_filename(fname)
+
+    def prefetch_neighbors(self, fname):
+        """starts loading the files next to *fname* in the tree view"""
+        n = self.settings["prefetch_neighbors"]
+        index = self.fs_model.index(str(fname))
+        if n <= 0 or not index.isValid():
+            return
+        parent = index.parent()
+        for offset in [d * i for i in range(1, n + 1) for d in (1, -1)]:
+            sibling = self.fs_model.index(index.row() + offset, 0, parent)
+            if not sibling.isValid() or self.fs_model.isDir(sibling):
+                continue
+            if not self.fs_model.flags(sibling) & QtCore.Qt.ItemFlag.ItemIsEnabled:
+                continue  # filtered out
+            path = self.fs_model.filePath(sibling)
+            view = self.current_view
+            if self.settings["auto_select_view"]:
+                view = self.views[self.auto_select_view(path)]
+            if view.view_loaded and view.supports_async_load:
+                self.file_loader.prefetch(view, path)
 
     def on_change_data_filename_handle_plugins(self):
         fname = self.settings["data_filename"]
@@ -195,6 +257,11 @@ class DataBrowser(BaseApp):
         self.ui.treeView.setRootIndex(self.fs_model.index(self.settings["browse_dir"]))
         self.fs_model.setRootPath(self.settings["browse_dir"])
 
+    def on_change_cache_settings(self):
+        self.derived_cache.cache_dir = Path(self.settings["cache_dir"])
+        self.derived_cache.max_size = self.settings["cache_size"] * 2**20
+        self.derived_cache.evict()
+
     def on_change_file_filter(self):
         self.log.debug("on_change_file_filter")
         filter_str = self.settings["file_filter"]
@@ -223,7 +290,7 @@ class DataBrowser(BaseApp):
         # udpate
         fname = self.settings["data_filename"]
         if Path(fname).is_file():
-            self.current_view.on_change_data_filename(fname)
+            self.load_file_in_view(self.current_view, fname)
 
     def on_treeview_selection_change(self, sel, desel):
         fname = self.fs_model.filePath(self.tree_selectionModel.currentIndex())
@@ -231,10 +298,25 @@ class DataBrowser(BaseApp):
 
     #        print( 'on_treeview_selection_change' , fname, sel, desel)
 
+    def update_measurement_index(self):
+        """maps measurement names to the views that support them, see auto_select_view"""
+        self.measurement_index = {}
+        for view_name, view in self.views.items():
+            for name in view.indexed_measurement_names() or ():
+                self.measurement_index.setdefault(name, set()).add(view_name)
+
     def auto_select_view(self, fname):
         "return the name of the last supported view for the given fname"
+        # views found via the index of measurement names in fname, probed once
+        candidates = set()
+        for name in measurement_names(fname):
+            candidates.update(self.measurement_index.get(name, ()))
         for view_name, view in list(self.views.items())[::-1]:
-            if view.is_file_supported(fname):
+            if view_name in candidates:
+                return view_name
+            if view.indexed_measurement_names() is None and view.is_file_supported(
+                fname
+            ):
                 return view_name
         return "file_info"
 
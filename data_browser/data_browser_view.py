@@ -1,8 +1,12 @@
-from typing import Callable
+from pathlib import Path
+from typing import Callable, Dict
 
+import numpy as np
 from qtpy import QtCore
 
 from ScopeFoundry import LQCollection
+from ScopeFoundry.data_browser.derived_cache import file_fingerprint
+from ScopeFoundry.data_browser.file_probe import measurement_names
 from ScopeFoundry.operations import Operations
 
 
@@ -15,6 +19,9 @@ class DataBrowserView:
 
     name = "base_view"  # override me! (recommended to use the ScopeFoundry.Measurement.name)
 
+    # measurement names supported by the default is_file_supported, defaults to (name,)
+    supported_measurement_names = None
+
     def __init__(self, databrowser):
         self.databrowser = databrowser
         self.settings = LQCollection(path=f"view/{self.name}")
@@ -35,34 +42,85 @@ class DataBrowserView:
 
         # update display
 
+    def load_file(self, fname):
+        """
+        Optional override to load files asynchronously: the thread safe load and
+        compute phase of on_change_data_filename(). Runs in a worker thread of the
+        databrowser, must not access widgets and should only read settings.
+        The return value is passed to apply_loaded_file() on the GUI thread.
+
+        Views that do not override it are loaded by on_change_data_filename()
+        on the GUI thread.
+        """
+        raise NotImplementedError
+
+    def apply_loaded_file(self, fname, loaded):
+        """updates the view with the result of load_file(), runs on the GUI thread"""
+        raise NotImplementedError
+
+    def load_settings(self) -> dict:
+        """
+        values of the settings the result of load_file() depends on, loaded
+        files are reused while these do not change
+        """
+        return {lq.name: lq.ini_string_value() for lq in self.settings.as_list()}
+
+    @property
+    def supports_async_load(self) -> bool:
+        return type(self).load_file is not DataBrowserView.load_file
+
     def is_file_supported(self, fname):
         """
         returns whether view can handle file, should return False early to avoid
         too much computation when selecting a file.
 
-        Override me if this fallback does not behave as expected. In particular
+        Override me or set supported_measurement_names if this fallback does
+        not behave as expected. In particular
             if self.name is not the supported measurement name
             or if supported file is not an h5 file
         """
-        return self.check_h5_file_support(fname, (self.name,))
+        return self.check_h5_file_support(fname, self.indexed_measurement_names())
+
+    def indexed_measurement_names(self):
+        """
+        the measurement names by which the databrowser selects this view
+        without calling is_file_supported, None if is_file_supported is overridden
+        """
+        if type(self).is_file_supported is not DataBrowserView.is_file_supported:
+            return None
+        return tuple(self.supported_measurement_names or (self.name,))
 
     def check_h5_file_support(self, fname, supported_measurement_names):
         """
         helper function to check if h5 file *fname* has group 'measurement/X'
         where X is any element of *supported_measurement_names*
         """
-        if not fname.endswith(".h5"):
+        if not str(fname).endswith(".h5"):
             return False
 
         if isinstance(supported_measurement_names, str):
             supported_measurement_names = (supported_measurement_names,)
 
-        import h5py
+        names = measurement_names(fname)
+        return any(name in names for name in supported_measurement_names)
+
+    def cache_key(self, fname: str, name: str, **key) -> dict:
+        """key of the persistent cache for *name* derived from the file *fname*"""
+        return dict(file=file_fingerprint(fname), view=self.name, name=name, **key)
 
-        with h5py.File(fname) as file:
-            return any(
-                name in file["measurement"] for name in supported_measurement_names
-            )
+    def cached(
+        self, fname: str, name: str, compute: Callable[[], Dict[str, np.ndarray]], **key
+    ) -> Dict[str, np.ndarray]:
+        """
+        returns the dict of arrays returned by *compute()*, taken from the
+        persistent cache of the databrowser if it was computed before for the
+        same file (content), view, *name* and *key*. *key* has to hold all
+        settings the result depends on.
+        """
+        if not self.databrowser.settings["use_cache"] or not Path(fname).is_file():
+            return compute()
+        key = self.cache_key(fname, name, **key)
+        return self.databrowser.derived_cache.cached(key, compute)
 
     def add_operation(
         self, name: str, op_func: Callable[[], None], description="", icon_path=""
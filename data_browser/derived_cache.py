@@ -0,0 +1,156 @@
+"""
+Persistent cache of arrays derived from data files, e.g. maps computed by the
+views of the DataBrowser, reused across sessions.
+
+Each entry is a .npz file in the cache directory named by the hashes of the
+"file" item of its key and of the whole key, such that the entries of a data
+file can be listed (see DerivedCache.keys). The least recently used entries are
+deleted once the total size exceeds the limit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from qtpy import QtCore
+
+CACHE_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+Arrays = Dict[str, np.ndarray]
+
+
+def default_cache_dir() -> Path:
+    location = QtCore.QStandardPaths.writableLocation(
+        QtCore.QStandardPaths.StandardLocation.GenericCacheLocation
+    )
+    if not location:
+        location = tempfile.gettempdir()
+    return Path(location) / "ScopeFoundry" / "data_browser"
+
+
+def file_fingerprint(fname) -> dict:
+    """
+    identifies the content of a data file by its absolute path, size and
+    modification time. Only stat()s the file, as it is called on every
+    cache lookup.
+    """
+    path = Path(fname).resolve()
+    stat = path.stat()
+    return {"file": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class DerivedCache:
+
+    def __init__(self, cache_dir=None, max_size: float = 2**30):
+        """*max_size* in bytes"""
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_size = max_size
+
+    @staticmethod
+    def key_hash(key) -> str:
+        key_str = json.dumps(key, sort_keys=True, default=str)
+        return hashlib.sha1(key_str.encode()).hexdigest()
+
+    def file_prefix(self, file) -> str:
+        return self.key_hash({"version": CACHE_VERSION, "file": file})[:16]
+
+    def entry_path(self, key: dict) -> Path:
+        prefix = self.file_prefix(key.get("file"))
+        key_hash = self.key_hash({"version": CACHE_VERSION, **key})
+        return self.cache_dir / f"{prefix}_{key_hash}.npz"
+
+    def get(self, key: dict) -> Optional[Arrays]:
+        """the arrays stored for *key* or None"""
+        path = self.entry_path(key)
+        try:
+            with np.load(path) as npz:
+                names = [str(n) for n in npz["names"]]
+                arrays = {name: npz[f"arr_{i}"] for i, name in enumerate(names)}
+            os.utime(path)  # most recently used
+            return arrays
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logger.warning(f"removing invalid cache entry {path}: {err}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: dict, arrays: Arrays) -> None:
+        if self.max_size <= 0:
+            return
+        path = self.entry_path(key)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez(
+                    file,
+                    *[np.asarray(a) for a in arrays.values()],
+                    names=np.array(list(arrays.keys()), dtype=str),
+                    key=np.array(json.dumps(key, sort_keys=True, default=str)),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def cached(self, key: dict, compute: Callable[[], Arrays]) -> Arrays:
+        """returns the arrays stored for *key*, calls and stores *compute()* if there are none"""
+        arrays = self.get(key)
+        if arrays is None:
+            arrays = compute()
+            self.put(key, arrays)
+        return arrays
+
+    def keys(self, file) -> List[dict]:
+        """keys of the entries whose key has the item "file": *file*"""
+        keys = []
+        for path in self.cache_dir.glob(f"{self.file_prefix(file)}_*.npz"):
+            try:
+                with np.load(path) as npz:
+                    key = json.loads(str(npz["key"]))
+            except FileNotFoundError:
+                continue
+            except Exception as err:
+                logger.warning(f"removing invalid cache entry {path}: {err}")
+                path.unlink(missing_ok=True)
+                continue
+            if key.get("file") == file:
+                keys.append(key)
+        return keys
+
+    def entries(self):
+        """(path, size, last use) of all entries, least recently used first"""
+        entries = []
+        for path in self.cache_dir.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def size(self) -> int:
+        return sum(e[1] for e in self.entries())
+
+    def evict(self) -> None:
+        """deletes the least recently used entries until the size is within max_size"""
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        for path, size, _ in entries:
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        for path, _, _ in self.entries():
+            path.unlink(missing_ok=True)
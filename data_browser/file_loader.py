@@ -0,0 +1,104 @@
+"""
+Loads data files for the views of the DataBrowser in worker threads, see
+DataBrowserView.load_file().
+"""
+
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from qtpy import QtCore
+
+logger = logging.getLogger(__name__)
+
+
+class LoadRequest:
+
+    def __init__(self, key, view, fname, future):
+        self.key = key
+        self.view = view
+        self.fname = fname
+        self.future = future
+
+
+class FileLoader(QtCore.QObject):
+    """
+    Runs DataBrowserView.load_file in a thread pool and passes the result to
+    DataBrowserView.apply_loaded_file on the GUI thread.
+
+    Only the latest request is applied, a new request cancels the previous
+    one. Files can be prefetched: their results are kept (up to
+    *max_prefetched*) until they are requested.
+    """
+
+    loaded = QtCore.Signal(object)
+
+    def __init__(self, databrowser, max_workers=2, max_prefetched=4):
+        super().__init__()
+        self.databrowser = databrowser
+        self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix="file_loader")
+        self.max_prefetched = max_prefetched
+        self.current = None
+        self.prefetched = OrderedDict()
+        # emitted from the worker threads, hence queued to the GUI thread
+        self.loaded.connect(self.on_loaded)
+
+    def request_key(self, view, fname):
+        """results are reused only for the same view, settings and file version"""
+        stat = os.stat(fname)
+        settings = tuple(sorted(view.load_settings().items()))
+        return (view.name, str(fname), stat.st_mtime_ns, stat.st_size, settings)
+
+    def request(self, view, fname):
+        """loads *fname* and applies it to *view*, cancels the previous request"""
+        self.cancel()
+        key = self.request_key(view, fname)
+        future = self.prefetched.pop(key, None)
+        if future is None or future.cancelled():
+            future = self.pool.submit(view.load_file, fname)
+        request = self.current = LoadRequest(key, view, fname, future)
+        future.add_done_callback(lambda f: self.loaded.emit(request))
+
+    def prefetch(self, view, fname):
+        """starts loading *fname* with *view* in advance of a request"""
+        key = self.request_key(view, fname)
+        if key in self.prefetched or (self.current and self.current.key == key):
+            return
+        self.keep_prefetched(key, self.pool.submit(view.load_file, fname))
+
+    def keep_prefetched(self, key, future):
+        self.prefetched[key] = future
+        while len(self.prefetched) > self.max_prefetched:
+            _, future = self.prefetched.popitem(last=False)
+            future.cancel()
+
+    def cancel(self):
+        """the result of the current request will not be applied"""
+        if self.current is not None:
+            if not self.current.future.cancel():
+                # already loading or loaded, might be requested again
+                self.keep_prefetched(self.current.key, self.current.future)
+            self.current = None
+
+    def on_loaded(self, request: LoadRequest):
+        if request is not self.current:
+            return  # superseded by a newer request
+        self.current = None
+        if request.future.cancelled():
+            return
+        statusbar = self.databrowser.ui.statusbar
+        err = request.future.exception()
+        if err is not None:
+            logger.error(f"failed to load {request.fname}: {err!r}")
+            statusbar.showMessage(f"failed to load {request.fname}: {err}")
+            return
+        statusbar.clearMessage()
+        request.view.apply_loaded_file(request.fname, request.future.result())
+
+    def shutdown(self):
+        self.cancel()
+        for future in self.prefetched.values():
+            future.cancel()
+        self.prefetched.clear()
+        self.pool.shutdown(wait=False)
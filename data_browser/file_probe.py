@@ -0,0 +1,67 @@
+"""
+Probes data files for the names of the measurements they hold, i.e. the groups
+'measurement/X' of h5 files written by ScopeFoundry.
+
+Results are cached per file path, size and modification time such that views
+selecting a file do not open it again.
+"""
+
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import FrozenSet
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED = 4096
+
+_cache = OrderedDict()
+_lock = Lock()
+
+
+def probe_key(fname) -> tuple:
+    stat = os.stat(fname)
+    return (os.path.abspath(fname), stat.st_size, stat.st_mtime_ns)
+
+
+def read_measurement_names(fname) -> FrozenSet[str]:
+    """opens *fname* once, empty if it is not an h5 file with a measurement group"""
+    if not str(fname).endswith(".h5"):
+        return frozenset()
+
+    import h5py
+
+    try:
+        with h5py.File(fname, "r") as file:
+            group = file.get("measurement")
+            if not isinstance(group, h5py.Group):
+                return frozenset()
+            return frozenset(group.keys())
+    except OSError as err:
+        logger.warning(f"could not probe {fname}: {err}")
+        return frozenset()
+
+
+def measurement_names(fname) -> FrozenSet[str]:
+    """names X of the groups 'measurement/X' in *fname*, cached"""
+    try:
+        key = probe_key(fname)
+    except OSError:
+        return frozenset()
+    with _lock:
+        names = _cache.get(key)
+        if names is not None:
+            _cache.move_to_end(key)
+            return names
+    names = read_measurement_names(fname)
+    with _lock:
+        _cache[key] = names
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return names
+
+
+def clear_probe_cache() -> None:
+    with _lock:
+        _cache.clear()
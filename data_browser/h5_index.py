@@ -0,0 +1,230 @@
+"""
+SQLite index of the settings and datasets of the h5 files in a data directory,
+used by the h5_search plug-in to search all files at once.
+
+The H5Indexer keeps the index up to date in a background thread: files are
+(re)indexed only if their size or modification time changed.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+Entry = Tuple[str, str]  # (name in file, text)
+
+
+class H5Index:
+
+    def __init__(self, db_path, extract_entries: Callable[[str], Iterable[Entry]]):
+        """
+        *extract_entries(fname)*: returns the searchable (name, text) of a file
+        """
+        self.db_path = str(db_path)
+        self.extract_entries = extract_entries
+        self._local = threading.local()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.create_tables()
+
+    @property
+    def con(self) -> sqlite3.Connection:
+        """one connection per thread"""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = sqlite3.connect(self.db_path, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    def create_tables(self) -> None:
+        con = self.con
+        if con.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            con.executescript(f"""
+                DROP TABLE IF EXISTS files;
+                DROP TABLE IF EXISTS entries;
+                PRAGMA user_version = {SCHEMA_VERSION};
+                """)
+        con.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER);
+            CREATE TABLE IF NOT EXISTS entries (path TEXT, name TEXT, text TEXT);
+            CREATE INDEX IF NOT EXISTS entries_path ON entries (path);
+            """)
+        con.commit()
+
+    def indexed_files(self, directory=None) -> dict:
+        """{path: (size, mtime_ns)} of the indexed files within *directory*"""
+        rows = self.con.execute("SELECT path, size, mtime_ns FROM files")
+        prefix = None if directory is None else os.path.join(directory, "")
+        return {
+            p: (size, mtime)
+            for p, size, mtime in rows
+            if prefix is None or p.startswith(prefix)
+        }
+
+    def index_file(self, path: str, size: int, mtime_ns: int) -> None:
+        try:
+            entries = list(self.extract_entries(path))
+        except Exception as err:
+            logger.warning(f"could not index {path}: {err}")
+            entries = []
+        with self.con as con:
+            con.execute("DELETE FROM entries WHERE path = ?", (path,))
+            con.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?)",
+                [(path, name, text) for name, text in entries],
+            )
+            con.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (path, size, mtime_ns)
+            )
+
+    def remove_files(self, paths: Iterable[str]) -> None:
+        with self.con as con:
+            for path in paths:
+                con.execute("DELETE FROM entries WHERE path = ?", (path,))
+                con.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def update(
+        self,
+        directory,
+        stop: Optional[threading.Event] = None,
+        progress: Optional[Callable[[int, str], None]] = None,
+    ) -> int:
+        """
+        indexes new and modified .h5 files in *directory* (recursively) and
+        removes deleted ones, returns the number of (re)indexed files.
+        """
+        directory = os.path.abspath(directory)
+        known = self.indexed_files(directory)
+        seen = set()
+        n_indexed = 0
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for fname in sorted(files):
+                if stop is not None and stop.is_set():
+                    return n_indexed
+                if not fname.endswith(".h5"):
+                    continue
+                path = os.path.join(root, fname)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                self.index_file(path, stat.st_size, stat.st_mtime_ns)
+                n_indexed += 1
+                if progress is not None:
+                    progress(n_indexed, path)
+        self.remove_files(set(known) - seen)
+        return n_indexed
+
+    def search(
+        self, text: str, directory=None, limit: int = 1000
+    ) -> List[Tuple[str, str, str]]:
+        """
+        (path, name, text) of the entries containing *text* (ASCII case
+        insensitive), case sensitive matches first.
+        """
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        prefix = "" if directory is None else os.path.join(directory, "")
+        prefix = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rows = self.con.execute(
+            """
+            SELECT path, name, text FROM entries
+            WHERE text LIKE ? ESCAPE '\\' AND path LIKE ? ESCAPE '\\'
+            ORDER BY instr(text, ?) = 0, path, rowid
+            LIMIT ?
+            """,
+            (f"%{escaped}%", f"{prefix}%", text, limit),
+        )
+        return rows.fetchall()
+
+    def close(self) -> None:
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+
+class H5Indexer:
+    """
+    updates *index* for a directory in a background thread, after a change of
+    directory and every *interval* seconds.
+    """
+
+    def __init__(
+        self,
+        index: H5Index,
+        interval: float = 60.0,
+        progress: Optional[Callable[[int, str], None]] = None,
+        done: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        *progress(n, path)*: called after indexing the n-th file of an update
+        *done(directory)*: called after each completed update
+        """
+        self.index = index
+        self.interval = interval
+        self.progress = progress
+        self.done = done
+        self.directory = None
+        self.n_files = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._restart = threading.Event()
+        self._thread = None
+
+    def set_directory(self, directory) -> None:
+        directory = os.path.abspath(directory)
+        if directory == self.directory:
+            return
+        self.directory = directory
+        self._restart.set()
+        self._wake.set()
+
+    def update_now(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="h5_indexer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._restart.set()
+        self._wake.set()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                self._restart.clear()
+                self._wake.clear()
+                directory = self.directory
+                if directory is not None:
+                    self.index.update(directory, self._restart, self.progress)
+                    self.n_files = len(self.index.indexed_files(directory))
+                    if not self._restart.is_set() and self.done is not None:
+                        self.done(directory)
+                if self._restart.is_set():
+                    continue
+                self._wake.wait(self.interval)
+        except Exception as err:
+            logger.error(f"h5 indexer failed: {err!r}")
+        finally:
+            self.index.close()
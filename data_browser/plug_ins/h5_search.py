@@ -1,9 +1,29 @@
 import functools
+import logging
+import os
+from pathlib import Path
+
 import h5py
+import numpy as np
 from qtpy import QtCore, QtWidgets
 
 from ScopeFoundry.data_browser.data_browser_plug_in import DataBrowserPlugIn
 
+logger = logging.getLogger(__name__)
+
+# statistics of larger datasets are computed from a strided sample
+STATS_MAX_BYTES = 256 * 2**20
+INDEX_STATS_MAX_BYTES = 8 * 2**20
+STATS_SAMPLE_SIZE = 2**20
+# datasets are reduced in blocks of about this size
+STATS_BLOCK_BYTES = 32 * 2**20
+
+
+class H5SearchQObject(QtCore.QObject):
+    # emitted from the indexer thread
+    index_progress = QtCore.Signal(int, str)
+    index_done = QtCore.Signal(str)
+
 
 class H5SearchPlugIn(DataBrowserPlugIn):
     name = "h5_search"
@@ -11,14 +31,46 @@ class H5SearchPlugIn(DataBrowserPlugIn):
     show_keyboard_key = QtCore.Qt.Key_F
     description = "used to inspect data sets and attributes of .h5 files (Ctrl+F)"
 
+    def __init__(self, databrowser):
+        super().__init__(databrowser)
+        self.settings.New(
+            "scope",
+            str,
+            initial="file",
+            choices=("file", "directory"),
+            description="search the selected file or all .h5 files in browse_dir "
+            "(and subfolders) using an index that is updated in the background",
+        )
+        self.settings.New(
+            "index_interval",
+            float,
+            initial=60.0,
+            vmin=1.0,
+            unit="s",
+            description="time between checks for new and modified files",
+        )
+        self.settings.New("max_results", int, initial=1000, vmin=1)
+        self.settings.New(
+            "store_stats",
+            bool,
+            initial=False,
+            description="store the computed statistics of datasets as their "
+            "attributes stats_*, such that later searches do not compute them again. "
+            "Modifies the data files.",
+        )
+        self.indexer = None
+
     def setup(self):
         self.search_line = QtWidgets.QLineEdit()
         self.search_line.setText("measurement")
         self.text_edit = QtWidgets.QTextEdit()
+        self.status_label = QtWidgets.QLabel()
 
         search_layout = QtWidgets.QHBoxLayout()
         search_layout.addWidget(QtWidgets.QLabel("🔍 text"))
         search_layout.addWidget(self.search_line)
+        search_layout.addWidget(self.settings.get_lq("scope").new_default_widget())
+        search_layout.addWidget(self.status_label)
 
         self.ui = QtWidgets.QWidget(objectName="SearchWidget")
         self.ui.setMaximumHeight(1200)
@@ -32,7 +84,55 @@ class H5SearchPlugIn(DataBrowserPlugIn):
 
         self.search_line.textChanged.connect(self.update)
 
+        self.signals = H5SearchQObject()
+        self.signals.index_progress.connect(self.on_index_progress)
+        self.signals.index_done.connect(self.on_index_done)
+        self.settings.scope.add_listener(self.on_change_scope)
+        self.settings.index_interval.add_listener(self.on_change_index_interval)
+        self.databrowser.settings.browse_dir.add_listener(self.on_change_browse_dir)
+        self.on_change_scope()
+
+    def on_change_scope(self):
+        if self.settings["scope"] == "directory":
+            self.start_indexer()
+        if self.is_showing:
+            self.update()
+
+    def start_indexer(self):
+        from ScopeFoundry.data_browser.h5_index import H5Index, H5Indexer
+
+        if self.indexer is None:
+            db_path = Path(self.databrowser.settings["cache_dir"]) / "h5_index.sqlite"
+            self.indexer = H5Indexer(
+                H5Index(db_path, h5_entries),
+                self.settings["index_interval"],
+                progress=self.signals.index_progress.emit,
+                done=self.signals.index_done.emit,
+            )
+            self.databrowser.qtapp.aboutToQuit.connect(self.indexer.stop)
+        self.indexer.set_directory(self.databrowser.settings["browse_dir"])
+        self.indexer.start()
+
+    def on_change_browse_dir(self):
+        if self.indexer is not None:
+            self.indexer.set_directory(self.databrowser.settings["browse_dir"])
+
+    def on_change_index_interval(self):
+        if self.indexer is not None:
+            self.indexer.interval = self.settings["index_interval"]
+
+    def on_index_progress(self, n, path):
+        self.status_label.setText(f"indexing {Path(path).name} ({n})")
+
+    def on_index_done(self, directory):
+        self.status_label.setText(f"{self.indexer.n_files} files indexed")
+        if self.is_showing and self.settings["scope"] == "directory":
+            self.update()
+
     def update(self, fname: str = None) -> None:
+        if self.settings["scope"] == "directory":
+            self.search_directory(self.search_line.text())
+            return
         fname = self.new_fname
         if not fname.endswith(".h5"):
             self.text_edit.setText(f"{fname} is not supported")
@@ -45,41 +145,58 @@ class H5SearchPlugIn(DataBrowserPlugIn):
         if search_text == "":
             text = "<br>".join(make_tree(fname))
         else:
-            text = "<br>".join(search_h5(fname, search_text))
-            text = text.replace(
-                search_text,
-                f"<font color='green'>{search_text}</font>",
-            )
+            results = search_h5(fname, search_text, self.settings["store_stats"])
+            text = "<br>".join(results)
+            text = highlight(text, search_text)
         self.text_edit.setText(text)
 
+    def search_directory(self, search_text):
+        if search_text == "":
+            self.text_edit.setText("")
+            return
+        directory = os.path.abspath(self.databrowser.settings["browse_dir"])
+        max_results = self.settings["max_results"]
+        rows = self.indexer.index.search(search_text, directory, max_results)
+        # grouped by file, files with case sensitive matches first
+        groups = {}
+        for path, _, text in rows:
+            groups.setdefault(path, []).append(text)
+        lines = []
+        for path, texts in groups.items():
+            lines.append(f"<br><u>{os.path.relpath(path, directory)}</u>")
+            lines.extend(texts)
+        if len(rows) == max_results:
+            lines.append(f"<br>... more than {max_results} results")
+        self.text_edit.setText(highlight("<br>".join(lines), search_text))
+
+
+def highlight(text, search_text):
+    return text.replace(search_text, f"<font color='green'>{search_text}</font>")
+
 
-def search_h5(fname, search_text):
+def search_h5(fname, search_text, store_stats=False):
     priority_results = []
     results = []
+    computed = {}
     visit_func = functools.partial(
         _search_visitfunc,
         results=results,
         priority_results=priority_results,
         search_text=search_text,
+        computed=computed,
     )
     with h5py.File(fname) as file:
         file.visititems(visit_func)
+    if store_stats and computed:
+        write_stats(fname, computed)
     return priority_results + results
 
 
-def _search_visitfunc(name, node, results, priority_results, search_text):
+def _search_visitfunc(name, node, results, priority_results, search_text, computed):
     if isinstance(node, h5py.Dataset):
         if not search_text in name:
             return
-        try:
-            vals = node[:].ravel()
-            if len(vals) < 4:
-                stats = str(vals)
-            else:
-                stats = f"min={min(vals):1.1f} max={max(vals):1.1f}"
-        except ValueError:
-            stats = ""
-        res = f"<i>{name}, {node.shape}, {node.dtype}</i> {stats}"
+        res = describe_dataset(name, node, computed=computed)
 
         if search_text in res:
             priority_results.append(res)
@@ -87,15 +204,139 @@ def _search_visitfunc(name, node, results, priority_results, search_text):
             results.append(res)
 
     if name.endswith("settings"):
-        for key, val in node.attrs.items():
-            units = node["units"].attrs[key] if key in node["units"].attrs else ""
-            res = f"<b>{name.replace('settings', key)}</b>: {str(val)} {units}"
+        for res in describe_settings(name, node):
             if search_text in res:
                 priority_results.append(res)
             elif search_text.lower() in res.lower():
                 results.append(res)
 
 
+def iter_blocks(node, block_bytes=STATS_BLOCK_BYTES):
+    """yields the data of *node* in blocks along the first axis, aligned to its chunks"""
+    if node.ndim == 0:
+        yield node[()]
+        return
+    row_bytes = max(1, node.size // max(1, node.shape[0]) * node.dtype.itemsize)
+    n_rows = max(1, block_bytes // row_bytes)
+    if node.chunks is not None:
+        n_rows = max(node.chunks[0], n_rows // node.chunks[0] * node.chunks[0])
+    for i in range(0, node.shape[0], n_rows):
+        yield node[i : i + n_rows]
+
+
+def strided_sample(node, sample_size=STATS_SAMPLE_SIZE):
+    """about *sample_size* elements of *node*, strided along the slowest axes first"""
+    factor = int(np.ceil(node.size / sample_size))
+    steps = []
+    for length in node.shape:
+        step = max(1, min(length, factor))
+        steps.append(step)
+        factor = int(np.ceil(factor / step))
+    return node[tuple(slice(None, None, step) for step in steps)]
+
+
+def compute_stats(node, max_bytes=STATS_MAX_BYTES):
+    """
+    min, max and mean (ignoring NaNs) of a numeric dataset, reduced block by
+    block or from a strided sample if it is larger than *max_bytes*
+    """
+    sampled = node.size * node.dtype.itemsize > max_bytes
+    blocks = [strided_sample(node)] if sampled else iter_blocks(node)
+    vmin, vmax, total, count = np.inf, -np.inf, 0.0, 0
+    for block in blocks:
+        block = np.asarray(block)
+        if block.size == 0:
+            continue
+        vmin = np.fmin(vmin, np.fmin.reduce(block, axis=None))
+        vmax = np.fmax(vmax, np.fmax.reduce(block, axis=None))
+        total += np.nansum(block, dtype=float)
+        if block.dtype.kind == "f":
+            count += block.size - np.count_nonzero(np.isnan(block))
+        else:
+            count += block.size
+    if count == 0:
+        vmin = vmax = np.nan
+    return dict(
+        min=float(vmin),
+        max=float(vmax),
+        mean=total / count if count else np.nan,
+        sampled=sampled,
+    )
+
+
+def read_stats(node):
+    """the statistics stored by write_stats, None if missing or outdated"""
+    attrs = node.attrs
+    if "stats_min" not in attrs or tuple(attrs.get("stats_shape", ())) != node.shape:
+        return None
+    return {k: attrs[f"stats_{k}"].item() for k in ("min", "max", "mean", "sampled")}
+
+
+def write_stats(fname, computed):
+    """stores *computed* ({dataset name: stats}) as attributes of the datasets"""
+    try:
+        with h5py.File(fname, "r+") as file:
+            for name, stats in computed.items():
+                attrs = file[name].attrs
+                for k, val in stats.items():
+                    attrs[f"stats_{k}"] = val
+                attrs["stats_shape"] = file[name].shape
+    except OSError as err:
+        logger.warning(f"could not store statistics in {fname}: {err}")
+
+
+def dataset_stats(node, max_bytes=STATS_MAX_BYTES, computed=None):
+    """
+    summary of the values of *node*. Statistics of numeric datasets are read
+    from their stats_* attributes if present, otherwise computed and, if
+    given, added to the dict *computed* to be stored with write_stats.
+    """
+    if node.shape is None:
+        return ""
+    if node.size < 4:
+        try:
+            return str(node[:].ravel() if node.ndim else node[()])
+        except (ValueError, TypeError):
+            return ""
+    if node.dtype.kind not in "biuf":
+        return ""
+    stats = read_stats(node)
+    if stats is None:
+        stats = compute_stats(node, max_bytes)
+        if computed is not None:
+            computed[node.name] = stats
+    text = f"min={stats['min']:1.1f} max={stats['max']:1.1f} mean={stats['mean']:1.1f}"
+    return text + " (sampled)" if stats["sampled"] else text
+
+
+def describe_dataset(name, node, max_stats_bytes=STATS_MAX_BYTES, computed=None):
+    stats = dataset_stats(node, max_stats_bytes, computed)
+    return f"<i>{name}, {node.shape}, {node.dtype}</i> {stats}"
+
+
+def describe_settings(name, node):
+    has_units = isinstance(node, h5py.Group) and "units" in node
+    units_attrs = node["units"].attrs if has_units else {}
+    for key, val in node.attrs.items():
+        units = units_attrs[key] if key in units_attrs else ""
+        yield f"<b>{name.replace('settings', key)}</b>: {str(val)} {units}"
+
+
+def h5_entries(fname):
+    """(name, text) of the datasets and settings of *fname* for the H5Index"""
+    entries = []
+
+    def visit(name, node):
+        if isinstance(node, h5py.Dataset):
+            entries.append((name, describe_dataset(name, node, INDEX_STATS_MAX_BYTES)))
+        if name.endswith("settings"):
+            entries.extend((name, res) for res in describe_settings(name, node))
+
+    with h5py.File(fname, "r") as file:
+        file.visititems(visit)
+    return entries
+
+
 def make_tree(fname):
     texts = []
     visit_func = functools.partial(_tree_visitfunc, texts=texts)
@@ -17,7 +17,9 @@ class FileInfoView(DataBrowserView):
     def on_change_data_filename(self, fname=None):
         if fname is None:
             fname = self.databrowser.settings["data_filename"]
+        self.apply_loaded_file(fname, self.load_file(fname))
 
+    def load_file(self, fname):
         # Use pathlib
         fname = Path(fname)
 
@@ -25,9 +27,11 @@ class FileInfoView(DataBrowserView):
 
         if ext in (".py", ".ini", ".txt", ".yml", ".yaml"):
             with open(fname, "r") as f:
-                self.ui.setText(f.read())
-        else:
-            self.ui.setText(str(fname))
+                return f.read()
+        return str(fname)
+
+    def apply_loaded_file(self, fname, text):
+        self.ui.setText(text)
 
     def is_file_supported(self, fname):
         return True
@@ -17,10 +17,7 @@ class H5TreeView(DataBrowserView):
     def on_change_data_filename(self, fname=None):
         self.ui.setText(f"loading {fname}")
         try:
-            self.tree_str = f"{fname}\n{'=' * len(fname)}\n"
-            with h5py.File(fname, "r") as file:
-                file.visititems(self._visitfunc)
-            self.ui.setText(self.tree_str)
+            self.apply_loaded_file(fname, self.load_file(fname))
 
         except Exception as err:
             self.databrowser.ui.statusbar.showMessage(
@@ -28,18 +25,28 @@ class H5TreeView(DataBrowserView):
             )
             raise (err)
 
-    def _visitfunc(self, name, node):
+    def load_file(self, fname):
+        lines = [f"{fname}\n{'=' * len(fname)}\n"]
+        with h5py.File(fname, "r") as file:
+            file.visititems(lambda name, node: self._visitfunc(name, node, lines))
+        return "".join(lines)
+
+    def apply_loaded_file(self, fname, tree_str):
+        self.tree_str = tree_str
+        self.ui.setText(self.tree_str)
+
+    def _visitfunc(self, name, node, lines):
 
         level = len(name.split("/"))
         indent = "    " * level
         localname = name.split("/")[-1]
 
         if isinstance(node, h5py.Group):
-            self.tree_str += f"{indent}|> {localname}\n"
+            lines.append(f"{indent}|> {localname}\n")
         elif isinstance(node, h5py.Dataset):
-            self.tree_str += f"{indent}|D {localname}: {node.shape} {node.dtype}\n"
+            lines.append(f"{indent}|D {localname}: {node.shape} {node.dtype}\n")
         for key, val in node.attrs.items():
-            self.tree_str += f"{indent}    |- {key} = {val}\n"
+            lines.append(f"{indent}    |- {key} = {val}\n")
 
 
 class H5TreeSearchView(DataBrowserView):
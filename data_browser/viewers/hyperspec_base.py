@@ -6,14 +6,39 @@ import numpy as np
 from qtpy import QtWidgets, QtGui, QtCore
 from ScopeFoundry.widgets import RegionSlicer
 import h5py
+import copy
 import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 import time
 import datetime
 from ScopeFoundry.helper_funcs import sibling_path
 
+# max size of the blocks read at once from out-of-core hyperspec_data
+CHUNK_MB = 64
+# derived maps of data larger than PARALLEL_MIN_BYTES (blocks of CHUNK_MB are
+# computed at once) are computed by a process pool in chunks of about
+# PARALLEL_CHUNK_BYTES
+PARALLEL_MIN_BYTES = 16 * 2**20
+PARALLEL_CHUNK_BYTES = 8 * 2**20
+
 class HyperSpectralBaseView(DataBrowserView):
     
     name = 'HyperSpectralBaseView'
+
+    # set True in subclasses whose load_data() only reads the file and settings
+    # and rebinds attributes (no widgets, no add_display_image(), no in-place
+    # changes of attributes such as lists or arrays of the view) to load files
+    # in a worker thread of the DataBrowser, see load_file()
+    load_data_in_thread = False
+
+    # settings that do not change derived maps, see cache_settings()
+    cache_ignored_settings = ('display_image', 'x_axis', 'default_view_on_load', 'chunk_size',
+                              'cor_X_data', 'cor_Y_data', 'show_circ_line', 'show_rect_line',
+                              'show_peak_line')
     
     def setup(self):
 
@@ -25,6 +50,10 @@ class HyperSpectralBaseView(DataBrowserView):
         # Call :func:set_scalebar_params() during self.load_data() to add a scalebar!
         self.scalebar_type = None
 
+        # see open_h5_dataset()
+        self.h5_file = None
+        self._bg_cache = (None, None)
+
 
         # Will be filled derived maps and images
         self.display_images = dict()
@@ -97,6 +126,10 @@ class HyperSpectralBaseView(DataBrowserView):
 
         self.spatial_binning = self.settings.New('spatial_binning', int, initial = 1, vmin=1)
 
+        self.settings.New('chunk_size', float, initial=CHUNK_MB, vmin=1, unit='MB',
+                          description='max size of the blocks read at once if hyperspec_data '
+                                      'is not loaded to RAM (h5py.Dataset or np.memmap)')
+
         self.cor_X_data = self.settings.New('cor_X_data', str, choices = self.default_display_image_choices,
                                             initial = 'default')
         self.cor_Y_data = self.settings.New('cor_Y_data', str, choices = self.default_display_image_choices,
@@ -245,8 +278,8 @@ class HyperSpectralBaseView(DataBrowserView):
         '''
         returns processed hyperspec_data averaged over a given spatial slice.
         '''
-        x,hyperspec_dat = self.get_xhyperspec_data(apply_use_x_slice)
-        y = hyperspec_dat[ji_slice].mean(axis=(0,1))
+        x,hyperspec_dat = self.get_xhyperspec_data(apply_use_x_slice, ji_slice)
+        y = hyperspec_dat.mean(axis=(0,1))
         #self.databrowser.ui.statusbar.showMessage('get_xy(), counts in slice: {}'.format( y.sum() ) )
 
         if self.settings['norm_data']:
@@ -259,7 +292,12 @@ class HyperSpectralBaseView(DataBrowserView):
             if not self.bg_slicer.activated:
                 self.bg_slicer.activated.update_value(True)
             bg_slice = self.bg_slicer.slice
-            bg = self.hyperspec_data[:,:,bg_slice].mean()
+            key = (id(self.hyperspec_data), bg_slice.start, bg_slice.stop)
+            if self._bg_cache[0] == key:
+                bg = self._bg_cache[1]
+            else:
+                bg = chunked_mean(self.hyperspec_data, bg_slice, self.chunk_bytes)
+                self._bg_cache = (key, bg)
             self.bg_slicer.set_label(title=bg_subtract_mode,
                 text='{:1.1f} cts<br>{} bins'.format(bg,bg_slice.stop-bg_slice.start))
         elif bg_subtract_mode == 'costum_const':
@@ -270,22 +308,26 @@ class HyperSpectralBaseView(DataBrowserView):
             self.bg_slicer.set_label('', title=bg_subtract_mode)
         return bg
         
-    def get_xhyperspec_data(self, apply_use_x_slice=True):
+    def get_xhyperspec_data(self, apply_use_x_slice=True, ji_slice=np.s_[:,:], bg=None):
         '''
-        returns processed hyperspec_data
+        returns processed hyperspec_data of the spatial slice *ji_slice*.
+        Only this region is read if hyperspec_data is out-of-core.
         '''
-        bg = self.get_bg()
-        hyperspec_data = self.hyperspec_data
+        if bg is None:
+            bg = self.get_bg()
         x = self.spec_x_array
+        spec_slice = slice(None)
         if apply_use_x_slice and self.x_slicer.activated.val:
             x = x[self.x_slicer.slice]
-            hyperspec_data = hyperspec_data[:,:,self.x_slicer.slice]
+            spec_slice = self.x_slicer.slice
+        hyperspec_data = np.asarray(self.hyperspec_data[tuple(ji_slice)[:2] + (spec_slice,)])
         binning = self.settings['binning']
         if  binning!= 1:
             x,hyperspec_data = bin_y_average_x(x, hyperspec_data, binning, -1, datapoints_lost_warning=False)
             bg *= binning
-        msg = 'effective subtracted bg value is binnging*bg ={:0.1f} which is up to {:2.1f}% of max value.'.format(bg, bg/np.max(hyperspec_data)*100 )
-        self.databrowser.ui.statusbar.showMessage(msg)
+        if hyperspec_data.size:
+            msg = 'effective subtracted bg value is binnging*bg ={:0.1f} which is up to {:2.1f}% of max value.'.format(bg, bg/np.max(hyperspec_data)*100 )
+            self.databrowser.ui.statusbar.showMessage(msg)
         if self.settings['norm_data']:
             return (x,norm_map(hyperspec_data-bg))
         else:
@@ -319,24 +361,138 @@ class HyperSpectralBaseView(DataBrowserView):
     def post_load(self):
         # override this!
         pass    
+
+    @property
+    def chunk_bytes(self):
+        return int(self.settings['chunk_size'] * 2**20)
+
+    def open_h5_dataset(self, fname, path):
+        '''
+        call this function during load_data() to use the dataset at *path* as
+        out-of-core hyperspec_data: returns the h5py.Dataset without reading it.
+        The file stays open until the next file is loaded.
+        '''
+        self.close_h5_file()
+        self.h5_file = h5py.File(fname, 'r')
+        return self.h5_file[path]
+
+    def close_h5_file(self):
+        if self.h5_file is not None:
+            self.h5_file.close()
+            self.h5_file = None
+
+    def cache_settings(self):
+        '''values of all settings derived maps may depend on, see DataBrowserView.cached()'''
+        key = {}
+        for prefix, settings in (('', self.settings), ('x_slicer/', self.x_slicer.settings),
+                                 ('bg_slicer/', self.bg_slicer.settings),
+                                 ('peakutils/', self.peakutils_settings)):
+            for lq in settings.as_list():
+                if lq.name not in self.cache_ignored_settings:
+                    key[prefix + lq.name] = lq.ini_string_value()
+        return key
+
+    def load_settings(self):
+        return self.cache_settings()
+
+    def cached_map(self, kind, name, compute):
+        '''
+        returns the map compute(), from the persistent cache if it was computed for
+        the current file with the same settings. Such maps are restored when the
+        file is loaded again, see restore_cached_maps().
+        '''
+        fname = self.databrowser.settings['data_filename']
+        return self.cached(fname, kind, lambda: {name: compute()},
+                           restore_on_load=True, **self.cache_settings())[name]
+
+    def restore_cached_maps(self, fname):
+        '''adds the maps of cached_map() computed before with the current settings'''
+        if not self.databrowser.settings['use_cache']:
+            return
+        cache = self.databrowser.derived_cache
+        match = self.cache_key(fname, None, restore_on_load=True, **self.cache_settings())
+        del match['name']
+        for key in cache.keys(match['file']):
+            if all(key.get(k) == v for k, v in match.items()):
+                for name, _map in (cache.get(key) or {}).items():
+                    self.add_display_image(name, _map)
+
+    def chunked_map(self, func, apply_use_x_slice=True):
+        '''
+        returns the map func(x, processed_hyperspec_data) computed block by block
+        of rows, such that out-of-core hyperspec_data is never fully loaded.
+        '''
+        bg = self.get_bg()
+        maps = []
+        for rows in row_chunks(self.hyperspec_data, self.chunk_bytes):
+            x, hyperspec_data = self.get_xhyperspec_data(apply_use_x_slice, (rows, slice(None)), bg)
+            maps.append(func(x, hyperspec_data))
+        return np.concatenate(maps)
     
     def on_change_data_filename(self, fname):
         if fname == "0":
             return
         self.reset()
+        self._bg_cache = (None, None)
+        self._finish_loading(fname, lambda: self._load(self, fname))
+
+    @property
+    def supports_async_load(self):
+        return self.load_data_in_thread
+
+    def load_file(self, fname):
+        '''
+        runs load_data() on a shallow copy of the view, returns the attributes
+        it rebound and the sum map, see load_data_in_thread. The copy shares
+        settings and all other attributes with the view, only rebound
+        attributes are applied (apply_loaded_file).
+        '''
+        loader = copy.copy(self)
+        loader.h5_file = None  # do not close the file of the view
+        # the view keeps showing its display images while the file loads
+        loader.display_images = dict(self.display_images)
+        loader.spec_x_arrays = dict(self.spec_x_arrays)
+        before = dict(vars(loader))
+        sum_map = self._load(loader, fname)
+        attrs = {k: v for k, v in vars(loader).items() if k not in before or v is not before[k]}
+        return attrs, sum_map
+
+    def apply_loaded_file(self, fname, loaded):
+        attrs, sum_map = loaded
+        self.reset()
+        self._bg_cache = (None, None)
+        def apply():
+            vars(self).update(attrs)
+            return sum_map
+        self._finish_loading(fname, apply)
+
+    def _load(self, loader, fname):
+        '''load_data() and spatial binning on *loader* (the view or a copy), returns the sum map'''
+        loader.scalebar_type = None
+        loader.load_data(fname)
+        if self.settings['spatial_binning'] != 1:
+            if is_out_of_core(loader.hyperspec_data):
+                loader.hyperspec_data = bin_2D_out_of_core(loader.hyperspec_data,
+                                                           self.settings['spatial_binning'],
+                                                           self.chunk_bytes)
+            else:
+                loader.hyperspec_data = bin_2D(loader.hyperspec_data, self.settings['spatial_binning'])
+            loader.display_image = bin_2D(loader.display_image, self.settings['spatial_binning'])
+        return self.cached(
+            fname, 'load_sum', lambda: {'sum': chunked_sum(loader.hyperspec_data, self.chunk_bytes)},
+            **self.cache_settings())['sum']
+
+    def _finish_loading(self, fname, load):
         try:
-            self.scalebar_type = None
-            self.load_data(fname)
-            if self.settings['spatial_binning'] != 1:
-                self.hyperspec_data = bin_2D(self.hyperspec_data, self.settings['spatial_binning'])
-                self.display_image = bin_2D(self.display_image, self.settings['spatial_binning'])
+            sum_map = load()
             self.display_images['default'] = self.display_image
-            self.display_images['sum'] = self.hyperspec_data.sum(axis=-1)         
+            self.display_images['sum'] = sum_map
             self.spec_x_arrays['default'] = self.spec_x_array
             self.spec_x_arrays['index'] = np.arange(self.hyperspec_data.shape[-1])
             self.databrowser.ui.statusbar.clearMessage()
             self.post_load()
             self.add_scalebar()
+            self.restore_cached_maps(fname)
         except Exception as err:
             HyperSpectralBaseView.load_data(self, fname) # load default dummy data
             self.databrowser.ui.statusbar.showMessage("failed to load {}: {}".format(fname, err))
@@ -404,6 +560,7 @@ class HyperSpectralBaseView(DataBrowserView):
             del self.spec_x_arrays[key]
         self.settings.display_image.change_choice_list(self.default_display_image_choices)
         self.settings.x_axis.change_choice_list(self.default_x_axis_choices)
+        self.close_h5_file()
 
     
     def load_data(self, fname):
@@ -413,6 +570,9 @@ class HyperSpectralBaseView(DataBrowserView):
             * self.hyperspec_data (shape Ny, Nx, Nspec)
             * self.display_image (shape Ny, Nx)
             * self.spec_x_array (shape Nspec)
+        hyperspec_data can be an h5py.Dataset (see open_h5_dataset()) or a
+        np.memmap for files that do not fit into RAM, derived maps are then
+        computed in blocks of chunk_size.
         """
         self.hyperspec_data = np.arange(10*10*34).reshape( (10,10,34) )
         self.display_image = self.hyperspec_data.sum(-1)
@@ -496,25 +656,26 @@ class HyperSpectralBaseView(DataBrowserView):
         self.spec_plot.enableAutoRange()
         
     def recalc_median_map(self):
-        x,hyperspec_data = self.get_xhyperspec_data(apply_use_x_slice=True)
-        median_map = spectral_median_map(hyperspec_data,x)
+        median_map = self.cached_map('median_map', 'median_map',
+            lambda: self.chunked_map(lambda x, data: spectral_median_map(data, x)))
         self.add_display_image('median_map', median_map)
         
     def recalc_sum_map(self):
-        x,hyperspec_data = self.get_xhyperspec_data(apply_use_x_slice=True)
-        _sum = hyperspec_data.sum(-1)
+        _sum = self.cached_map('sum_map', 'sum',
+            lambda: self.chunked_map(lambda x, data: data.sum(-1)))
         self.add_display_image('sum', _sum)
         
     def recalc_peak_map(self):
-        x,hyperspec_data = self.get_xhyperspec_data(apply_use_x_slice=True)
         PS = self.peakutils_settings
-        _map = peak_map(hyperspec_data, x, PS['thres'], int(len(x)/2), 
-                        PS['gaus_fit_refinement'], PS['ignore_phony_refinements'])
         map_name = 'peak_map'
         if  PS['gaus_fit_refinement']: 
             map_name += '_refined'
             if PS['ignore_phony_refinements']:
                 map_name += '_ignored'
+        _map = self.cached_map('peak_map', map_name,
+            lambda: self.chunked_map(lambda x, data: peak_map(data, x, PS['thres'], int(len(x)/2),
+                                                              PS['gaus_fit_refinement'],
+                                                              PS['ignore_phony_refinements'])))
         self.add_display_image(map_name, _map)
           
     def on_change_corr_settings(self):
@@ -665,8 +826,73 @@ def spectral_median(spec, wls, count_min=200):
     else:
         wl = 0
     return wl
-def spectral_median_map(hyperspectral_data, wls):
-    return np.apply_along_axis(spectral_median, -1, hyperspectral_data, wls=wls)
+def spectral_median_map(hyperspectral_data, wls, count_min=200, n_workers=None):
+    '''
+    spectral_median() of every spectrum (along the last axis) of *hyperspectral_data*
+    '''
+    return map_spectra(_spectral_median_map, hyperspectral_data, n_workers,
+                             wls=wls, count_min=count_min)
+
+def _spectral_median_map(hyperspectral_data, wls, count_min=200):
+    int_spec = np.cumsum(hyperspectral_data, axis=-1)
+    total_sum = int_spec[..., -1]
+    # first index where the cumulative sum reaches half of the total
+    pos = np.argmax(int_spec >= 0.5 * total_sum[..., None], axis=-1)
+    return np.where(total_sum > count_min, np.asarray(wls)[pos], 0)
+
+_process_pool = (0, None)
+_process_pool_lock = threading.Lock()
+
+def process_pool(n_workers):
+    '''
+    the process pool of map_spectra with *n_workers* processes, kept for
+    later calls: starting the worker processes can take longer than the map
+    '''
+    global _process_pool
+    with _process_pool_lock:
+        size, pool = _process_pool
+        if pool is None or size != n_workers:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            pool = ProcessPoolExecutor(n_workers)
+            _process_pool = (n_workers, pool)
+        return pool
+
+def shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        _, pool = _process_pool
+        _process_pool = (0, None)
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+def map_spectra(func, data, n_workers=None, chunk_bytes=PARALLEL_CHUNK_BYTES, **kwargs):
+    '''
+    returns the map func(spectra, **kwargs) of *data* (..., Nspec), where *func*
+    maps spectra of shape (N, Nspec) to (N,). *func* is called on chunks of
+    about *chunk_bytes* to keep the temporary arrays small, by a pool of
+    *n_workers* processes if n_workers > 1 (then *func* has to be module level).
+    By default the pool is used for data larger than PARALLEL_MIN_BYTES only.
+    '''
+    data = np.asarray(data)
+    spectra = data.reshape(-1, data.shape[-1])
+    if n_workers is None:
+        n_workers = (os.cpu_count() or 1) if data.nbytes > PARALLEL_MIN_BYTES else 1
+    n = max(1, chunk_bytes // max(1, spectra[:1].nbytes))
+    chunks = [spectra[i:i + n] for i in range(0, len(spectra), n)]
+    func = partial(func, **kwargs)
+    results = None
+    if n_workers > 1 and len(chunks) > 1:
+        try:
+            results = list(process_pool(n_workers).map(func, chunks))
+        except BrokenProcessPool as err:
+            print('map_spectra: process pool failed, computing in this process', err)
+            shutdown_process_pool()
+    if results is None:
+        results = [func(chunk) for chunk in chunks]
+    if not results:
+        return np.zeros(data.shape[:-1])
+    return np.concatenate(results).reshape(data.shape[:-1])
 
 def norm(x):
     x_max = x.max()
@@ -713,6 +939,64 @@ def bin_2D(arr,binning=2):
         print('cropped data:', (lost_lines_0,lost_lines_1), 'lines lost' )
     return arr
 
+def is_out_of_core(data):
+    '''True if *data* is not held in RAM, e.g. an h5py.Dataset or np.memmap'''
+    return isinstance(data, np.memmap) or not isinstance(data, np.ndarray)
+
+def row_chunks(data, max_bytes=CHUNK_MB * 2**20, multiple=1):
+    '''
+    yields slices along axis 0 of *data* such that a block of rows has at most
+    *max_bytes* (at least *multiple* rows, aligned to the hdf5 chunks if possible).
+    Yields a single slice over all rows if *data* is in RAM.
+    '''
+    N = data.shape[0]
+    if not is_out_of_core(data):
+        yield slice(0, N)
+        return
+    row_bytes = max(1, int(np.prod(data.shape[1:])) * data.dtype.itemsize)
+    n = max(multiple, max_bytes // row_bytes // multiple * multiple)
+    h5_chunks = getattr(data, 'chunks', None)
+    if h5_chunks and n > h5_chunks[0]:
+        step = int(np.lcm(h5_chunks[0], multiple))
+        n = max(n // step * step, multiple)
+    for i0 in range(0, N, n):
+        yield slice(i0, min(i0 + n, N))
+
+def chunked_sum(data, max_bytes=CHUNK_MB * 2**20):
+    '''spectrally integrated map of *data*, read in blocks of rows'''
+    return np.concatenate([np.asarray(data[rows]).sum(axis=-1)
+                           for rows in row_chunks(data, max_bytes)])
+
+def chunked_mean(data, spec_slice=slice(None), max_bytes=CHUNK_MB * 2**20):
+    '''mean of data[:,:,spec_slice], read in blocks of rows'''
+    total, count = 0.0, 0
+    for rows in row_chunks(data, max_bytes):
+        block = np.asarray(data[rows, :, spec_slice])
+        total += block.sum(dtype=float)
+        count += block.size
+    return total / count if count else np.nan
+
+def bin_2D_out_of_core(data, binning=2, max_bytes=CHUNK_MB * 2**20):
+    '''
+    like bin_2D but reads *data* in blocks of rows and returns a np.memmap
+    backed by a temporary file.
+    '''
+    Ny, Nx = data.shape[0] // binning, data.shape[1] // binning
+    lost_lines = (data.shape[0] - Ny * binning, data.shape[1] - Nx * binning)
+    if sum(lost_lines) > 0:
+        print('cropped data:', lost_lines, 'lines lost')
+    binned = None
+    for rows in row_chunks(data, max_bytes, multiple=binning):
+        if rows.start >= Ny * binning:
+            break
+        rows = slice(rows.start, min(rows.stop, Ny * binning))
+        block = bin_2D(np.asarray(data[rows, :Nx * binning]), binning)
+        if binned is None:
+            binned = np.memmap(tempfile.TemporaryFile(), dtype=block.dtype, mode='w+',
+                               shape=(Ny, Nx) + block.shape[2:])
+        binned[rows.start // binning:rows.stop // binning] = block
+    return binned
+
 def peaks(spec, wls, thres=0.5, unique_solution=True, 
           min_dist=-1, refinement=True, ignore_phony_refinements=True):
     import peakutils
@@ -736,9 +1020,94 @@ def peaks(spec, wls, thres=0.5, unique_solution=True,
     else:
         return peaks_x
 
-def peak_map(hyperspectral_data, wls, thres, min_dist, refinement, ignore_phony_refinements):
-    return np.apply_along_axis(peaks, -1, hyperspectral_data, 
-                               wls=wls, thres=thres, 
-                               unique_solution=True,
-                               min_dist=min_dist, refinement=refinement,
-                               ignore_phony_refinements=ignore_phony_refinements)
\ No newline at end of file
+def local_maxima(y, thres=0.5):
+    '''
+    bool array marking the peaks along the last axis of *y* higher than the
+    normalized threshold *thres*. Vectorized peakutils.indexes without min_dist:
+    plateaus count as one peak at their center.
+    '''
+    y_min = y.min(axis=-1, keepdims=True)
+    thres = thres * (y.max(axis=-1, keepdims=True) - y_min) + y_min
+    dy = np.diff(y, axis=-1)
+    with_plateaus = (dy == 0).any(axis=-1)
+    if with_plateaus.any():
+        dy[with_plateaus] = _fill_plateaus(dy[with_plateaus])
+    is_peak = np.zeros(y.shape, dtype=bool)
+    is_peak[..., 1:-1] = (dy[..., :-1] > 0) & (dy[..., 1:] < 0)
+    is_peak &= y > thres
+    return is_peak
+
+def _fill_plateaus(dy):
+    # fills dy == 0 with the nearest slope: left of the plateau center with the
+    # slope before, otherwise with the slope after the plateau
+    n = dy.shape[-1]
+    idx = np.arange(n)
+    nonzero = dy != 0
+    prev_nz = np.maximum.accumulate(np.where(nonzero, idx, -1), axis=-1)
+    next_nz = np.minimum.accumulate(np.where(nonzero, idx, n)[..., ::-1], axis=-1)[..., ::-1]
+    use_prev = ((idx < (prev_nz + next_nz) / 2) & (prev_nz >= 0)) | (next_nz == n)
+    src = np.clip(np.where(use_prev, prev_nz, next_nz), 0, n - 1)
+    # flat spectra have no peaks
+    return np.where(nonzero.any(axis=-1, keepdims=True), np.take_along_axis(dy, src, axis=-1), 0)
+
+def refine_peaks(y, wls, ind, width=10, method='gaussian'):
+    '''
+    refines the peak positions *ind* (index along the last axis of *y*) using the
+    *width* points before and after each peak. *method* 'centroid' or 'gaussian'
+    (least squares parabola fit of log(y) weighted by y**2). Returns NaN where the
+    refinement fails.
+    '''
+    N = y.shape[-1]
+    cols = ind[..., None] + np.arange(-width, width + 1)
+    valid = (cols >= 0) & (cols < N)
+    cols = np.clip(cols, 0, N - 1)
+    yy = np.where(valid, np.take_along_axis(y, cols, axis=-1), 0.0)
+    xx = wls[cols]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == 'centroid':
+            return (xx * yy).sum(axis=-1) / yy.sum(axis=-1)
+        # x relative to the peak for numerical stability
+        x0 = wls[ind]
+        xx = xx - x0[..., None]
+        w = np.where(yy > 0, yy**2, 0.0)
+        log_y = np.log(np.where(yy > 0, yy, 1.0))
+        powers = xx[..., None] ** np.arange(5)
+        moments = (w[..., None] * powers).sum(axis=-2)
+        M = moments[..., np.array([[0, 1, 2], [1, 2, 3], [2, 3, 4]])]
+        rhs = (w[..., None] * log_y[..., None] * powers[..., :3]).sum(axis=-2)
+        det = np.linalg.det(M)
+        ok = np.isfinite(det) & (np.abs(det) > 1e-12 * np.abs(M).max(axis=(-2, -1)) ** 3)
+        M[~ok] = np.eye(3)
+        a, b, c = np.moveaxis(np.linalg.solve(M, rhs[..., None])[..., 0], -1, 0)
+        return np.where(ok & (c < 0), x0 - b / (2 * c), np.nan)
+
+def peak_map(hyperspectral_data, wls, thres, min_dist, refinement, ignore_phony_refinements,
+             width=10, n_workers=None):
+    '''
+    position of the highest peak (see peaks() with unique_solution=True) of every
+    spectrum (along the last axis) of *hyperspectral_data*, NaN where there is no peak.
+
+    *min_dist* does not change the highest peak and is ignored.
+    *refinement* False, 'centroid' or 'gaussian' (or True).
+    Unlike peaks(), which fits a gaussian with scipy, the refinements are
+    vectorized, see refine_peaks().
+    '''
+    return map_spectra(_peak_map, hyperspectral_data, n_workers,
+                             wls=wls, thres=thres, refinement=refinement,
+                             ignore_phony_refinements=ignore_phony_refinements,
+                             width=width)
+
+def _peak_map(hyperspectral_data, wls, thres, refinement, ignore_phony_refinements, width=10):
+    y = np.asarray(hyperspectral_data, dtype=float)
+    wls = np.asarray(wls)
+    is_peak = local_maxima(y, thres)
+    ind = np.argmax(np.where(is_peak, y, -np.inf), axis=-1)
+    peaks_x = wls[ind].astype(float)
+    if refinement:
+        method = 'gaussian' if refinement is True else refinement
+        refined = refine_peaks(y, wls, ind, width, method)
+        if ignore_phony_refinements:
+            phony = ~((refined >= wls.min()) & (refined <= wls.max()))
+            refined = np.where(phony, peaks_x, refined)
+        peaks_x = refined
+    return np.where(is_peak.any(axis=-1), peaks_x, np.nan)
\ No newline at end of file
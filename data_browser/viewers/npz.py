@@ -19,27 +19,33 @@ class NPZView(DataBrowserView):
         #self.ui.setWidget(self.display_label)
         
     def on_change_data_filename(self, fname=None):
-        import numpy as np
-        
         try:
-            self.dat = np.load(fname)
-            
-            self.display_txt = "File: {}\n".format(fname)
-            
-            sorted_keys = sorted(self.dat.keys())
-            
-            for key in sorted_keys:
-                val = self.dat[key]
-                if val.shape == ():
-                    self.display_txt += "    --> {}: {}\n".format(key, val)                    
-                else:
-                    self.display_txt += "    --D {}: Array of {} {}\n".format(key, val.dtype, val.shape)
-            
-            #self.display_label.setText(self.display_txt)
-            self.display_textEdit.setText(self.display_txt)
+            self.apply_loaded_file(fname, self.load_file(fname))
         except Exception as err:
             self.display_textEdit.setText("failed to load %s:\n%s" %(fname, err))
             raise(err)
+
+    def load_file(self, fname):
+        import numpy as np
+
+        dat = np.load(fname)
+        
+        display_txt = "File: {}\n".format(fname)
+        
+        sorted_keys = sorted(dat.keys())
+        
+        for key in sorted_keys:
+            val = dat[key]
+            if val.shape == ():
+                display_txt += "    --> {}: {}\n".format(key, val)                    
+            else:
+                display_txt += "    --D {}: Array of {} {}\n".format(key, val.dtype, val.shape)
+        return dat, display_txt
+
+    def apply_loaded_file(self, fname, loaded):
+        self.dat, self.display_txt = loaded
+        #self.display_label.setText(self.display_txt)
+        self.display_textEdit.setText(self.display_txt)
         
     def is_file_supported(self, fname):
         return os.path.splitext(fname)[1] == ".npz"
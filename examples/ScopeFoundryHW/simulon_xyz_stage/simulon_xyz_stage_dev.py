@@ -22,6 +22,14 @@ class SimulonXYZStageDev:
         self.z = self.z + self.noise()
         return self.z
 
+    def read_positions(self):
+        # a single query for all axes
+        return {
+            "x_position": self.read_x(),
+            "y_position": self.read_y(),
+            "z_position": self.read_z(),
+        }
+
     def write_x(self, x):
         self.x = x
 
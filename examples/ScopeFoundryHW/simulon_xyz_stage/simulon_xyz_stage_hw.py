@@ -39,6 +39,7 @@ class SimulonXYZStageHW(HardwareComponent):
         self.x_position.connect_to_hardware(read_func=dev.read_x)
         self.y_position.connect_to_hardware(read_func=dev.read_y)
         self.z_position.connect_to_hardware(read_func=dev.read_z)
+        self.connect_batch_read(dev.read_positions)
 
         self.x_target_position.connect_to_hardware(write_func=dev.write_x)
         self.y_target_position.connect_to_hardware(write_func=dev.write_y)
@@ -47,6 +48,7 @@ class SimulonXYZStageHW(HardwareComponent):
     def disconnect(self):
 
         self.settings.disconnect_all_from_hardware()
+        self.disconnect_batch_read()
 
         if hasattr(self, "stage_device"):
             self.stage_device.close()
@@ -19,4 +19,4 @@ class Example3DSlowScanMeasure(BaseRaster3DSlowScanV2):
         signal = self.detector.settings.get_lq("signal").read_from_hardware()
         self.display_image_map[k, j, i] = signal
         if self.settings["save_h5"]:
-            self.signal_map[k, j, i] = signal
+            self.h5_writer.write(self.signal_map, (k, j, i), signal)
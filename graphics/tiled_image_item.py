@@ -0,0 +1,97 @@
+import itertools
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import pyqtgraph as pg
+
+
+class TiledImageItem(pg.ImageItem):
+    """
+    ImageItem that renders its image as square tiles of *tile_size* pixels.
+
+    Drop-in replacement for pg.ImageItem (works with HistogramLUTItem, setRect,
+    setLevels, ...). In addition, update_region() re-renders only the tiles
+    overlapping a region of the image. For live displays where only a few pixels
+    change between updates, e.g. raster scans, this avoids re-rendering the
+    whole image on every update. The image array is not copied, so changes made
+    in place are picked up by update_region().
+    """
+
+    def __init__(self, image: np.ndarray = None, tile_size: int = 256, **kargs):
+        self.tile_size = tile_size
+        self.tiles: Dict[Tuple[int, int], pg.ImageItem] = {}
+        super().__init__(image, **kargs)
+
+    def image_size(self) -> Tuple[int, int]:
+        """returns the (x, y) size of the image in pixels"""
+        if self.image is None:
+            return 0, 0
+        h, w = self.image.shape[:2]
+        if self.axisOrder == "col-major":
+            return h, w
+        return w, h
+
+    def _tile_keys(self, x_slice: slice, y_slice: slice) -> Iterator[Tuple[int, int]]:
+        nx, ny = self.image_size()
+        x0, x1, _ = x_slice.indices(nx)
+        y0, y1, _ = y_slice.indices(ny)
+        if x1 <= x0 or y1 <= y0:
+            return iter(())
+        Nt = self.tile_size
+        return itertools.product(
+            range(x0 // Nt, (x1 - 1) // Nt + 1), range(y0 // Nt, (y1 - 1) // Nt + 1)
+        )
+
+    def _tile_data(self, key: Tuple[int, int]) -> np.ndarray:
+        Nt = self.tile_size
+        xs = slice(key[0] * Nt, (key[0] + 1) * Nt)
+        ys = slice(key[1] * Nt, (key[1] + 1) * Nt)
+        if self.axisOrder == "col-major":
+            return self.image[xs, ys]
+        return self.image[ys, xs]
+
+    def update_region(self, x_slice: slice = slice(None), y_slice: slice = slice(None)):
+        """
+        re-renders the tiles overlapping image[x_slice, y_slice]
+        (in x, y coordinates, independent of axisOrder)
+        """
+        if self.image is None:
+            return
+        opts = dict(autoLevels=False, autoDownsample=self.autoDownsample)
+        if self.levels is not None:
+            opts["levels"] = self.levels
+        for key in self._tile_keys(x_slice, y_slice):
+            tile = self.tiles.get(key)
+            if tile is None:
+                tile = self.tiles[key] = pg.ImageItem(axisOrder=self.axisOrder)
+                tile.setParentItem(self)
+                tile.setPos(key[0] * self.tile_size, key[1] * self.tile_size)
+            tile.setImage(self._tile_data(key), lut=self.lut, **opts)
+
+    def clear_tiles(self):
+        for tile in self.tiles.values():
+            tile.setParentItem(None)
+            if tile.scene() is not None:
+                tile.scene().removeItem(tile)
+        self.tiles.clear()
+
+    def setImage(self, image: np.ndarray = None, autoLevels: bool = None, **kargs):
+        if image is not None and (
+            self.image is None or np.shape(image) != self.image.shape
+        ):
+            self.clear_tiles()
+        super().setImage(image, autoLevels, **kargs)
+        # levels, lookup table and new data change all tiles
+        self.update_region()
+
+    def clear(self):
+        self.clear_tiles()
+        super().clear()
+
+    def render(self):
+        # tiles render themselves
+        self._renderRequired = False
+        self._unrenderable = True
+
+    def paint(self, painter, *args):
+        pass
@@ -0,0 +1,283 @@
+"""
+Multi-resolution pyramid of images that may be larger than memory, used by the
+ZoomableMapImageItem.
+
+Level N of the pyramid is the image averaged over blocks of 2**N x 2**N pixels.
+Levels are stored as datasets /pyramid/level_N of an HDF5 file next to the data
+and are reused when the same image is shown again, or kept in memory for images
+that change, e.g. live scans (see ImagePyramid.update_region).
+"""
+
+import logging
+import os
+import threading
+import h5py
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def box_downsample(a, zf, region=None, max_bytes=32 * 2**20):
+    """
+    averages *a* over blocks of zf x zf pixels (first two axes). Blocks at the
+    edges that extend beyond *a* are averaged over their valid pixels.
+    Returns an array of the dtype of *a*.
+
+    region: (slice, slice) of the first two axes of *a* to downsample, default all
+
+    *a* is read in bands of rows such that temporary arrays stay below
+    *max_bytes*, so it can be an h5py dataset or memmap larger than memory.
+    """
+    if region is None:
+        region = (slice(None), slice(None))
+    i0, i1, _ = region[0].indices(a.shape[0])
+    j0, j1, _ = region[1].indices(a.shape[1])
+    h, w = max(0, i1 - i0), max(0, j1 - j0)
+    if zf == 1:
+        return np.asarray(a[i0 : i0 + h, j0 : j0 + w])
+    extra = tuple(a.shape[2:])
+    H, W = -(-h // zf), -(-w // zf)
+    out = np.empty((H, W) + extra, dtype=a.dtype)
+    # number of valid pixels in the blocks of each column
+    cols = np.minimum(zf, w - np.arange(W) * zf).reshape((1, W) + (1,) * len(extra))
+    band_bytes = max(1, zf * W * zf * int(np.prod(extra)) * 8)
+    n_rows = max(1, max_bytes // band_bytes)
+    for r0 in range(0, H, n_rows):
+        r1 = min(H, r0 + n_rows)
+        band = np.asarray(a[i0 + r0 * zf : min(i0 + h, i0 + r1 * zf), j0 : j0 + w])
+        padded = np.zeros(((r1 - r0) * zf, W * zf) + extra)
+        padded[: band.shape[0], :w] = band
+        sums = padded.reshape((r1 - r0, zf, W, zf) + extra).sum(axis=(1, 3))
+        rows = np.minimum(zf, band.shape[0] - np.arange(r1 - r0) * zf)
+        mean = sums / (rows.reshape((-1, 1) + (1,) * len(extra)) * cols)
+        if out.dtype.kind in "biu":
+            mean = np.rint(mean)
+        out[r0:r1] = mean
+    return out
+
+
+class MemoryGroup(dict):
+    """stands in for an h5py.Group to keep the levels in memory"""
+
+    def __init__(self):
+        super().__init__()
+        self.attrs = {}
+
+    def create_dataset(self, name, shape, dtype, chunks=None):
+        self[name] = np.zeros(shape, dtype=dtype)
+        return self[name]
+
+
+def memmap_layout(source):
+    """
+    (byte offset in the file, strides) of a memmap *source*, which tell apart
+    views of the same file (e.g. channels or slices), None for other sources
+    """
+    if not isinstance(source, np.memmap):
+        return None
+    root = source
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    address = source.__array_interface__["data"][0]
+    root_address = root.__array_interface__["data"][0]
+    return int(root.offset) + address - root_address, tuple(source.strides)
+
+
+def default_pyramid_location(source):
+    """
+    (file path, group name) of the pyramid of *source*: a file
+    <data file>.pyramid.h5 next to the h5 file or memmap holding *source*,
+    None if *source* is not stored in a file. Views of a memmap have their
+    own group, named after their offset, shape and strides (see memmap_layout).
+    """
+    if isinstance(source, h5py.Dataset):
+        return f"{source.file.filename}.pyramid.h5", f"pyramid{source.name}"
+    filename = getattr(source, "filename", None)
+    if filename:
+        if not isinstance(source.base, np.ndarray):
+            return f"{filename}.pyramid.h5", "pyramid"
+        offset, strides = memmap_layout(source)
+        shape = "x".join(str(n) for n in source.shape)
+        strides = "_".join(str(s) for s in strides)
+        return f"{filename}.pyramid.h5", f"pyramid_{offset}_{shape}_{strides}"
+    return None
+
+
+def source_mtime_ns(source):
+    if isinstance(source, h5py.Dataset):
+        filename = source.file.filename
+    else:
+        filename = getattr(source, "filename", None)
+    try:
+        return os.stat(filename).st_mtime_ns
+    except (TypeError, OSError):
+        return 0
+
+
+class ImagePyramid:
+    """
+    *source*: image (ndarray, h5py dataset or memmap), level 0 of the pyramid
+    *location*: h5py.Group or (file path, group name) where the levels are
+        stored, see default_pyramid_location, or "memory"
+    *n_levels*: number of levels above the source
+    """
+
+    def __init__(self, source, location=None, n_levels=1, max_bytes=32 * 2**20):
+        self.source = source
+        self.n_levels = n_levels
+        self.max_bytes = max_bytes
+        self.file = None
+        if location is None:
+            location = default_pyramid_location(source)
+        if isinstance(location, str) and location == "memory":
+            self.group = MemoryGroup()
+        elif isinstance(location, h5py.Group):
+            self.group = location
+        else:
+            path, group_name = location
+            self.file = h5py.File(path, "a")
+            self.group = self.file.require_group(group_name)
+        # levels up to built_levels can be read
+        self.built_levels = 0
+        # (level, rows written) while building, see update_region
+        self.building = None
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def source_attrs(self):
+        attrs = {
+            "source_shape": np.array(self.source.shape),
+            "source_dtype": str(self.source.dtype),
+            "source_mtime_ns": source_mtime_ns(self.source),
+        }
+        layout = memmap_layout(self.source)
+        if layout is not None:
+            attrs["source_offset"] = layout[0]
+            attrs["source_strides"] = np.array(layout[1])
+        return attrs
+
+    def is_valid(self):
+        """whether the stored levels were built from the current source"""
+        attrs = self.group.attrs
+        for key, val in self.source_attrs().items():
+            if key not in attrs or not np.array_equal(attrs[key], val):
+                return False
+        return True
+
+    def open(self):
+        """uses the stored levels if complete, returns whether they are"""
+        if self.is_valid() and self.group.attrs.get("built_levels", 0) >= self.n_levels:
+            self.built_levels = self.n_levels
+            return True
+        return False
+
+    def invalidate(self):
+        """the source changed, levels have to be built again"""
+        self._stop.set()
+        self.wait()
+        self.group.attrs["built_levels"] = 0
+        self.built_levels = 0
+
+    def level(self, z):
+        """the image at level *z* or None if it is not built yet"""
+        if z == 0:
+            return self.source
+        if z > self.built_levels:
+            return None
+        return self.group[f"level_{z}"]
+
+    def level_shape(self, z):
+        zf = 2**z
+        shape = self.source.shape
+        return (-(-shape[0] // zf), -(-shape[1] // zf)) + tuple(shape[2:])
+
+    def build(self, progress=None):
+        """
+        computes and stores the missing levels, each from the level below
+        band by band. *progress(z)* is called after each level.
+        """
+        if not self.is_valid():
+            for name in list(self.group.keys()):
+                del self.group[name]
+            self.group.attrs.update(self.source_attrs())
+            self.group.attrs["built_levels"] = 0
+        self.built_levels = int(self.group.attrs["built_levels"])
+        for z in range(self.built_levels + 1, self.n_levels + 1):
+            prev = self.level(z - 1)
+            shape = self.level_shape(z)
+            if f"level_{z}" in self.group:
+                del self.group[f"level_{z}"]
+            dset = self.group.create_dataset(
+                f"level_{z}",
+                shape=shape,
+                dtype=self.source.dtype,
+                chunks=(min(256, shape[0]), min(256, shape[1])) + shape[2:],
+            )
+            row_bytes = max(1, 4 * int(np.prod(shape[1:])) * 8)
+            n_rows = max(1, self.max_bytes // row_bytes)
+            for r0 in range(0, shape[0], n_rows):
+                if self._stop.is_set():
+                    return
+                r1 = min(shape[0], r0 + n_rows)
+                with self.lock:
+                    dset[r0:r1] = box_downsample(
+                        prev, 2, (slice(2 * r0, 2 * r1), slice(None)), self.max_bytes
+                    )
+                    self.building = (z, r1)
+            self.group.attrs["built_levels"] = z
+            if self.file is not None:
+                self.file.flush()
+            with self.lock:
+                self.built_levels = z
+                self.building = None
+            if progress is not None:
+                progress(z)
+
+    def update_region(self, i_slice, j_slice):
+        """
+        the source changed in source[i_slice, j_slice]: recomputes the
+        corresponding regions of the levels built so far
+        """
+        i0, i1, _ = i_slice.indices(self.source.shape[0])
+        j0, j1, _ = j_slice.indices(self.source.shape[1])
+        with self.lock:
+            for z in range(1, self.n_levels + 1):
+                i0, i1, j0, j1 = i0 // 2, -(-i1 // 2), j0 // 2, -(-j1 // 2)
+                if z > self.built_levels:
+                    if self.building is None or self.building[0] != z:
+                        break
+                    # rows not written yet will be built from the updated level below
+                    i1 = min(i1, self.building[1])
+                    if i1 <= i0:
+                        break
+                prev = self.source if z == 1 else self.group[f"level_{z - 1}"]
+                region = (slice(2 * i0, 2 * i1), slice(2 * j0, 2 * j1))
+                self.group[f"level_{z}"][i0:i1, j0:j1] = box_downsample(
+                    prev, 2, region, self.max_bytes
+                )
+
+    def build_in_background(self, progress=None):
+        def run():
+            try:
+                self.build(progress)
+            except Exception as err:
+                logger.error(f"failed to build image pyramid: {err!r}")
+
+        # restart a running build
+        self._stop.set()
+        self.wait()
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="image_pyramid", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def close(self):
+        self._stop.set()
+        self.wait()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
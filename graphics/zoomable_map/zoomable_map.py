@@ -3,56 +3,62 @@ import pyqtgraph as pg
 from pyqtgraph.Qt import QtGui, QtCore
 import numpy as np
 import math
-import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+import logging
+
+from ScopeFoundry.graphics.zoomable_map.image_pyramid import ImagePyramid, MemoryGroup, box_downsample
+
+logger = logging.getLogger(__name__)
 
 # TODO 
 #  connect color scales together DONE (If connected to a HistLut)
 #  always show lowest zoom behind DONE
-# show one lower zoom underneath
+#  show one lower zoom underneath DONE (placeholder while tiles are built)
+
+# generation of tiles whose region changed, see update_region
+STALE = -1
 
 
 class TileItem(object):
     
-    def __init__(self, zmi, zoom, ii, jj):
+    def __init__(self, zmi, zoom, ii, jj, data=None):
         self.zmi = zmi
         self.image_item = None
         self.zoom_tile_coord = zoom, ii, jj
+        self.generation = zmi.generation
         
-        self.update_data()
+        if data is None:
+            self.update_data()
+        else:
+            self.data = data
         
         self.transform = QtGui.QTransform()
         
         self.rebuild_data = False
         self.visible = False
     
-    def update_data(self):
-        zoom, ii,jj = self.zoom_tile_coord
-        # zoom
-        # zoom z=0 --> original size: tile slice (ii*tile_size : (ii+1)*tile_size : 1)
-        # zoom z=1 --> half size: tile slice (ii*tile_size*2 : (ii+1)*tile_size*2 : 2)
-        # zoom z=N ---> tile slice (ii*tile_size*(2**z) : (ii+1)*tile_size*(2**z) : (2**z) )
-        z = zoom
-        zf = 2**z
-        Nt = self.zmi.tile_size
+    @property
+    def nbytes(self):
+        return self.data.nbytes
 
-        tile_shape = list(self.zmi.image.shape)
-        tile_shape[0] = Nt
-        tile_shape[1] = Nt
-        self.data = np.zeros(tuple(tile_shape), dtype=self.zmi.image.dtype)
-        if self.zmi.fill is not None:
-            self.data += self.zmi.fill
-        
-        #print("---", ii, jj, Nt, zoom, zf)
-        im = self.zmi.image[ii*Nt*zf:(ii+1)*Nt*zf:zf,
-                            jj*Nt*zf:(jj+1)*Nt*zf:zf]
-        self.data[:im.shape[0], :im.shape[1]] = im
+    def update_data(self):
+        self.data = self.zmi.compute_tile_data(self.zoom_tile_coord)
+        self.generation = self.zmi.generation
 
+    def set_data(self, data, generation):
+        self.data = data
+        self.generation = generation
+        if self.image_item is not None:
+            self.image_item.setImage(self.data, **self.zmi.im_kwargs)
         
     def set_visible(self, vis=True, force_replacement=False):
         
         #print("set_visible", self.zoom_tile_coord, vis)
 
-        if (not vis) or (not self.image_item is None) or force_replacement:
+        if self.image_item is not None and ((not vis) or force_replacement):
             self.zmi.plot.removeItem(self.image_item)
             self.image_item = None
             self.visible = False
@@ -62,6 +68,7 @@ class TileItem(object):
             #self.image_item.setRect(pg.QtCore.QRectF(*self.rect))
             self.image_item.setTransform(self.recomputeTransform())
             self.image_item.setZValue(self.zmi.z_value-self.zoom_tile_coord[0])
+            self.image_item.setVisible(self.zmi.shown)
             self.zmi.plot.addItem(self.image_item)
             self.visible = True
     
@@ -70,8 +77,6 @@ class TileItem(object):
         zoom, ii, jj = self.zoom_tile_coord
         zf = 2**zoom
         
-        Nx, Ny = self.zmi.image.shape[0:2]
-        
         Nt = self.zmi.tile_size 
         
         x = ii*zf* Nt
@@ -96,9 +101,13 @@ class ZoomableMapImageItem(QtCore.QObject):
     
     sigImageChanged = QtCore.Signal()
 
+    # (tile coord, generation, data) emitted from the worker threads
+    sigTileReady = QtCore.Signal(object, object, object)
+
     
     def __init__(self, plot_item, image=None, rect=None, transform=None, 
                  tile_size=256, z_value=100, fill=None,
+                 n_workers=4, cache_bytes=512*2**20, pyramid=None,
                  **kwargs):
         
         QtCore.QObject.__init__(self)
@@ -109,7 +118,8 @@ class ZoomableMapImageItem(QtCore.QObject):
         
         plot_item: pyqtgraph PlotItem where Zoomable Map will appear
         
-        image: large image array that will be shown        
+        image: large image array that will be shown, an ndarray or, for
+            images larger than memory, an h5py dataset or memmap        
         
         rect: Bounding rectangle for image
             if rect=None, go by pixels otherwise rect=(x0,y0,w,h)
@@ -122,6 +132,18 @@ class ZoomableMapImageItem(QtCore.QObject):
         
         fill: value to place on edge tiles that extend beyond original image
         
+        n_workers: number of threads building tiles. Until a tile is built
+            the nearest available tile of a lower zoom is shown instead.
+
+        cache_bytes: size limit of the tile cache, least recently used tiles
+            that are not visible are dropped beyond it
+
+        pyramid: where the zoom levels are stored, an ImagePyramid, h5py.Group
+            or (file path, group name). By default images in h5py datasets
+            and memmaps get a file <data file>.pyramid.h5, built in the
+            background on first view and reused afterwards. False to compute
+            all tiles from the image.
+
         kwargs are sent to setImage of imageItems
         """
         
@@ -129,12 +151,24 @@ class ZoomableMapImageItem(QtCore.QObject):
         self.z_value = z_value
         self.fill = fill
         self.im_kwargs = kwargs
+        self.cache_bytes = cache_bytes
 
         self.plot = plot_item
         self.vb  = self.plot.getViewBox()
         
-        self.tile_cache = dict()
+        # least recently used first
+        self.tile_cache = OrderedDict()
         self.visible_tiles = dict()
+        # tiles of the current view, shown once built
+        self.wanted_tiles = set()
+        self.pending = dict()
+        # pending tiles whose region changed while they were built
+        self.redo = set()
+        self.generation = 0
+        self.shown = True
+        self.closed = False
+        self.pool = ThreadPoolExecutor(n_workers, thread_name_prefix="zoomable_map")
+        self.sigTileReady.connect(self.on_tile_ready)
         
         self.lut = kwargs.get('lut', None)
         
@@ -149,6 +183,9 @@ class ZoomableMapImageItem(QtCore.QObject):
 
         
         self.image = image
+        self.pyramid_location = pyramid
+        self.pyramid = None
+        self.setup_pyramid()
         
         if transform is None:
             self.transform = QtGui.QTransform()
@@ -157,21 +194,198 @@ class ZoomableMapImageItem(QtCore.QObject):
         else: 
             self.transform = transform
 
-        self.lock = threading.Lock()
-        
-        z_max = self.get_max_zoom()
-        #print('z_max', z_max)
-        self.get_tile(z_max, 0,0).set_visible()
+        # the lowest zoom is always shown behind
+        if self.image is not None:
+            self.update_visible_tiles()
 
     def clear_tile_cache(self, clear_visible=False):
-        pass
-        #TODO
+        for tile_coord, tile in list(self.tile_cache.items()):
+            if tile.visible and not clear_visible:
+                continue
+            tile.set_visible(False)
+            self.visible_tiles.pop(tile_coord, None)
+            del self.tile_cache[tile_coord]
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.redo.clear()
+
+    def setup_pyramid(self, image_changed=False):
+        """opens or starts building the pyramid of the image, see pyramid argument"""
+        location = self.pyramid_location
+        if self.pyramid is not None and self.keeps_pyramid(self.image):
+            self.pyramid.source = self.image
+            if image_changed:
+                self.pyramid.invalidate()
+                self.pyramid.build_in_background()
+            return
+        if self.pyramid is not None:
+            self.pyramid.close()
+            self.pyramid = None
+        if location is False or self.image is None:
+            return
+        if location is None and not isinstance(self.image, (h5py.Dataset, np.memmap)):
+            return
+        if isinstance(location, ImagePyramid):
+            self.pyramid = location
+        else:
+            try:
+                self.pyramid = ImagePyramid(self.image, location, n_levels=self.get_max_zoom())
+            except (OSError, TypeError) as err:
+                logger.warning(f"tiles are computed without pyramid: {err}")
+                return
+        if image_changed:
+            self.pyramid.invalidate()
+        if not self.pyramid.open():
+            self.pyramid.build_in_background()
+
+    def keeps_pyramid(self, image):
+        """
+        whether the pyramid can be kept for *image*: the same array, a new view of
+        the same buffer (e.g. image.T of a live scan passed on every update) or, for
+        pyramids in memory, any image of the same shape and dtype
+        """
+        source = self.pyramid.source
+        if source is image:
+            return True
+        if not (isinstance(source, np.ndarray) and isinstance(image, np.ndarray)):
+            return False
+        if source.shape != image.shape or source.dtype != image.dtype:
+            return False
+        if isinstance(self.pyramid.group, MemoryGroup):
+            return True
+        return (
+            source.__array_interface__['data'][0] == image.__array_interface__['data'][0]
+            and source.strides == image.strides
+        )
+
+    def compute_tile_data(self, tile_coord):
+        """tile of the image box-filtered to zoom level z, runs in the worker threads"""
+        # zoom z=0 --> original size: tile slice (ii*tile_size : (ii+1)*tile_size)
+        # zoom z=N --> 2**N x 2**N pixels averaged: tile slice (ii*tile_size*(2**z) : (ii+1)*tile_size*(2**z))
+        z, ii, jj = tile_coord
+        zf = 2**z
+        Nt = self.tile_size
+        image = self.image
+
+        tile_shape = (Nt, Nt) + tuple(image.shape[2:])
+        data = np.zeros(tile_shape, dtype=image.dtype)
+        if self.fill is not None:
+            data += self.fill
+
+        level = None if self.pyramid is None else self.pyramid.level(z)
+        if level is not None:
+            im = np.asarray(level[ii*Nt:(ii+1)*Nt, jj*Nt:(jj+1)*Nt])
+            data[:im.shape[0], :im.shape[1]] = im
+            return data
+
+        Nx, Ny = image.shape[:2]
+        interior = (ii+1)*Nt*zf <= Nx and (jj+1)*Nt*zf <= Ny
+        children = [self.tile_cache.get((z-1, 2*ii+di, 2*jj+dj)) for di in (0,1) for dj in (0,1)]
+        if z > 0 and interior and all(
+            c is not None and c.generation == self.generation for c in children):
+            # from the four tiles of the next zoom
+            top = np.concatenate([children[0].data, children[1].data], axis=1)
+            bottom = np.concatenate([children[2].data, children[3].data], axis=1)
+            data[:] = box_downsample(np.concatenate([top, bottom], axis=0), 2)
+            return data
+
+        im = box_downsample(image, zf, (slice(ii*Nt*zf, (ii+1)*Nt*zf),
+                                        slice(jj*Nt*zf, (jj+1)*Nt*zf)))
+        data[:im.shape[0], :im.shape[1]] = im
+        return data
                    
     def get_tile(self, z, ii,jj):
-        if (z, ii,jj) not in self.tile_cache:
-            self.tile_cache[(z,ii,jj)] = TileItem(self, z, ii, jj)
-        return self.tile_cache[(z,ii,jj)]
+        """returns the tile, built on the calling thread if it is not cached"""
+        tile_coord = (z, ii, jj)
+        if tile_coord not in self.tile_cache:
+            self.add_tile(TileItem(self, z, ii, jj))
+        self.tile_cache.move_to_end(tile_coord)
+        return self.tile_cache[tile_coord]
+
+    def add_tile(self, tile):
+        self.tile_cache[tile.zoom_tile_coord] = tile
+        self.limit_cache_size()
+
+    def limit_cache_size(self):
+        total = sum(tile.nbytes for tile in self.tile_cache.values())
+        for tile_coord, tile in list(self.tile_cache.items()):
+            if total <= self.cache_bytes:
+                break
+            if tile.visible:
+                continue
+            total -= tile.nbytes
+            del self.tile_cache[tile_coord]
+
+    def request_tile(self, tile_coord):
+        """builds the tile in a worker thread unless it is up to date or pending"""
+        tile = self.tile_cache.get(tile_coord)
+        if tile is not None and tile.generation == self.generation:
+            self.tile_cache.move_to_end(tile_coord)
+            return
+        if tile_coord in self.pending:
+            return
+        generation = self.generation
+
+        def build():
+            data = self.compute_tile_data(tile_coord)
+            self.sigTileReady.emit(tile_coord, generation, data)
+
+        self.pending[tile_coord] = self.pool.submit(build)
+
+    def on_tile_ready(self, tile_coord, generation, data):
+        if generation != self.generation:
+            return  # image changed since
+        self.pending.pop(tile_coord, None)
+        if tile_coord in self.redo:
+            # shown until rebuilt
+            self.redo.discard(tile_coord)
+            generation = STALE
+        tile = self.tile_cache.get(tile_coord)
+        if tile is None:
+            tile = TileItem(self, *tile_coord, data=data)
+            tile.generation = generation
+            self.add_tile(tile)
+        else:
+            tile.set_data(data, generation)
+        self.update_visible_tiles()
 
+    def update_region(self, x_slice=slice(None), y_slice=slice(None)):
+        """
+        the image changed in image[x_slice, y_slice]: updates the pyramid and
+        rebuilds the tiles overlapping the region at every zoom. Visible tiles
+        keep showing their previous data until rebuilt, the others are dropped.
+        """
+        if self.image is None or self.closed:
+            return
+        x0, x1, _ = x_slice.indices(self.image.shape[0])
+        y0, y1, _ = y_slice.indices(self.image.shape[1])
+        if x1 <= x0 or y1 <= y0:
+            return
+        if self.pyramid is not None:
+            self.pyramid.update_region(slice(x0, x1), slice(y0, y1))
+
+        def overlaps(tile_coord):
+            z, ii, jj = tile_coord
+            span = self.tile_size * 2**z
+            return ii*span < x1 and (ii+1)*span > x0 and jj*span < y1 and (jj+1)*span > y0
+
+        for tile_coord in list(self.tile_cache.keys()):
+            if not overlaps(tile_coord):
+                continue
+            tile = self.tile_cache[tile_coord]
+            if tile.visible:
+                tile.generation = STALE
+            else:
+                del self.tile_cache[tile_coord]
+        for tile_coord in list(self.pending.keys()):
+            if not overlaps(tile_coord):
+                continue
+            if self.pending[tile_coord].cancel():
+                del self.pending[tile_coord]
+            else:
+                self.redo.add(tile_coord)
+        self.update_visible_tiles()
         
     def tiles_at_zoom(self, z):
         zfi = 2**z
@@ -194,6 +408,8 @@ class ZoomableMapImageItem(QtCore.QObject):
         return z_max
     
     def on_range_changed(self, src, new_range=None):
+        if self.image is None or self.closed:
+            return
         if new_range is None:
             new_range = self.vb.viewRange()
         
@@ -215,13 +431,8 @@ class ZoomableMapImageItem(QtCore.QObject):
         
         
         #
-        bl_tr_dist_view = np.sqrt( (xr-xl)**2 + (yt-yb)**2)
         bl_tr_dist_view_px = np.sqrt( ((xr-xl)/px)**2 + ((yt-yb)/py)**2)
         bl_tr_dist_orig = np.sqrt( (x1-x0)**2 + (y1-y0)**2)
-        
-        # print("bl_tr_dist_view", bl_tr_dist_view)
-        # print("bl_tr_dist_view_px", bl_tr_dist_view_px)
-        # print("bl_tr_dist_orig", bl_tr_dist_orig)
 
         zf = bl_tr_dist_orig/bl_tr_dist_view_px
         
@@ -239,63 +450,86 @@ class ZoomableMapImageItem(QtCore.QObject):
         #print("zoom", zoom,'zfi', zfi, "Tiles at zoom", Nx_tiles, Ny_tiles )
 
         # Tile limits ii0 to ii1, jj0 to jj1
-        ii0 = x0 / (zfi*Nt)
+        ii0 = min(x0, x1) / (zfi*Nt)
         ii0 = max(0, math.floor(ii0)) # clip at zero
-        ii1 = x1 / (zfi*Nt)
+        ii1 = max(x0, x1) / (zfi*Nt)
         ii1 = min(math.ceil(ii1), Nx_tiles)
     
-        jj0 = y0 / (zfi*Nt)
+        jj0 = min(y0, y1) / (zfi*Nt)
         jj0 = max(0, math.floor(jj0)) # clip at zero
-        jj1 = y1 / (zfi*Nt)
+        jj1 = max(y0, y1) / (zfi*Nt)
         jj1 = min(math.ceil(jj1), Ny_tiles)    
 
                 
         #print(f"allowed tiles zoom level {zoom}, x: {ii0} to {ii1}, y: {jj0} to {jj1}")
         
-        if self.lock.locked():
-            return
-        with self.lock:
-            # find tiles in visible_tiles that are not allowed and set_visible False
-            for (zt, iit, jjt) in list(self.visible_tiles.keys()):
-                tile = self.visible_tiles[(zt, iit, jjt)]
-                vis = True
-                if zt != zoom: # Wrong zoom
-                    vis = False
-                else:
-                    if not ii0 <= iit < ii1: # out of range x
-                        vis = False
-                    if not jj0 <= jjt < jj1: # out of range y
-                        vis = False            
-                if not vis:
-                    tile.set_visible(False)
-                    del self.visible_tiles[(zt, iit, jjt)]
+        self.wanted_tiles = {(zoom, ii, jj) for ii in range(ii0, ii1) for jj in range(jj0, jj1)}
+        # tiles that left the view are not built anymore
+        for tile_coord in list(self.pending):
+            if tile_coord not in self.wanted_tiles and self.pending[tile_coord].cancel():
+                del self.pending[tile_coord]
+        self.update_visible_tiles()
             
-            # find or create allowed Tiles in tile cache
-            for ii in range(ii0,ii1):
-                for jj in range(jj0,jj1):
-                    t = self.get_tile(zoom, ii, jj)
-                    # set tiles to visible (add image item)
-                    t.set_visible(True)
-                    # add tiles to visible_tiles dictionary
-                    self.visible_tiles[(zoom,ii,jj)] = t
-        
+    def update_visible_tiles(self):
+        """
+        shows the wanted tiles that are built, the nearest built tile of a lower
+        zoom in place of the others and all tiles of the lowest zoom behind.
+        Requests the missing and outdated ones.
+        """
+        if self.closed:
+            return
+        z_max = self.get_max_zoom()
         Nx, Ny = self.tiles_at_zoom(z_max)
-        for ii in range(Nx):
-            for jj in range(Ny):
-                self.get_tile(z_max, ii,jj).set_visible(True)
-        
-        N_visible = len(self.visible_tiles)
-        #print(f"zf={zf} z={zoom}, zfi={zfi}. Tiles {Nx_tiles} x {Ny_tiles}, {N_visible} tiles shown")
+        lowest = [(z_max, ii, jj) for ii in range(Nx) for jj in range(Ny)]
+        
+        show = set()
+        for tile_coord in sorted(self.wanted_tiles) + lowest:
+            self.request_tile(tile_coord)
+            z, ii, jj = tile_coord
+            while z <= z_max:
+                if (z, ii, jj) in self.tile_cache:
+                    show.add((z, ii, jj))
+                    break
+                z, ii, jj = z+1, ii//2, jj//2
+        
+        for tile_coord in list(self.visible_tiles.keys()):
+            if tile_coord not in show:
+                self.visible_tiles.pop(tile_coord).set_visible(False)
+        for tile_coord in show:
+            tile = self.tile_cache[tile_coord]
+            tile.set_visible(True)
+            self.visible_tiles[tile_coord] = tile
+        self.limit_cache_size()
 
+    def shutdown(self):
+        """removes all tiles from the plot and stops the worker threads"""
+        self.closed = True
+        self.sigprox.disconnect()
+        self.clear_tile_cache(clear_visible=True)
+        self.pool.shutdown(wait=False)
+        if self.pyramid is not None:
+            self.pyramid.close()
 
     # The following methods act like the equivalent single ImageItem methods 
 
     def getHistogram(self, bins='auto', step='auto', perChannel=False, targetImageSize=200,
                      targetHistogramSize=500, **kwds):
-        z_max = self.get_max_zoom()
         # Use biggest tile to get histogram
-        return self.get_tile(z_max,0,0).image_item.getHistogram()
+        return self.lowest_zoom_image_item().getHistogram()
+
+    def lowest_zoom_image_item(self):
+        z_max = self.get_max_zoom()
+        tile = self.get_tile(z_max,0,0)
+        if tile.image_item is None:
+            # not shown yet
+            return pg.ImageItem(tile.data, **self.im_kwargs)
+        return tile.image_item
             
+    def setVisible(self, visible):
+        self.shown = visible
+        for tile in self.visible_tiles.values():
+            tile.image_item.setVisible(visible)
+
     def setLookupTable(self, lut, update=True):
         if lut is not self.lut:
             self.lut = lut
@@ -313,7 +547,7 @@ class ZoomableMapImageItem(QtCore.QObject):
             
     def setRect(self, rect):
         """Scale and translate the image to fit within rect (must be a QRect or QRectF) or iterable [left top width hight]."""
-        if not isinstance(rect, QtCore.QRect) or  isinstance(rect, QtCore.QRect):
+        if not isinstance(rect, (QtCore.QRect, QtCore.QRectF)):
             rect = QtCore.QRectF(*rect)
         tr = QtGui.QTransform()
         tr.translate(rect.left(), rect.top())
@@ -324,30 +558,42 @@ class ZoomableMapImageItem(QtCore.QObject):
         self.transform = tr
         for (zt, iit, jjt) in list(self.visible_tiles.keys()):
             tile = self.visible_tiles[(zt, iit, jjt)]
-            tile.recomputeTransform()
+            tile.image_item.setTransform(tile.recomputeTransform())
 
     def setImage(self, image=None, autoLevels=None, slice_changed=None, **kargs):
+        """
+        slice_changed: (x_slice, y_slice) of *image* that changed, to rebuild
+            only the overlapping tiles of an image of the same shape,
+            see update_region
+        """
+
+        if kargs.get('levels') is not None:
+            self.im_kwargs['levels'] = kargs['levels']
+
+        shape_changed = image is None or self.image is None or image.shape != self.image.shape
+        if slice_changed is not None and not shape_changed:
+            if image is not self.image and self.pyramid is not None:
+                self.pyramid.source = image
+            self.image = image
+            self.update_region(*slice_changed)
+            self.sigImageChanged.emit()
+            return
 
         self.image = image
+        self.generation += 1
+        self.setup_pyramid(image_changed=True)
         
-        for tile_coord in list(self.tile_cache.keys()):
-            tile = self.tile_cache[tile_coord]
-            if tile.visible:
-                tile.update_data()
-                tile.set_visible(vis=True, force_replacement=True)
-            else:
-                del self.tile_cache[tile_coord]
+        # visible tiles show the previous image until they are rebuilt
+        self.clear_tile_cache(clear_visible=shape_changed)
+        if image is not None:
+            self.update_visible_tiles()
         
         self.sigImageChanged.emit()
 
-        # TODO setImage use slice_changed to limit updates 
-
     @property
     def levels(self):
         return self.getLevels()
     
     def getLevels(self):
-        z_max = self.get_max_zoom()
-        return self.get_tile(z_max,0,0).image_item.getLevels()
+        return self.lowest_zoom_image_item().getLevels()
         
-
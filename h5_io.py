@@ -131,6 +131,26 @@ def h5_save_measurement_settings(measurement, h5_meas_group: h5py.Group) -> None
     h5_save_lqcoll_to_attrs(measurement.settings, settings_group)
 
 
+def h5_save_lq_history(
+    app, h5group: h5py.Group, paths, t0: float = None, t1: float = None
+) -> h5py.Group:
+    """
+    saves the history (see LoggedQuantity.enable_history) between t0 and t1 of
+    the LQs defined by *paths* to h5group/lq_history/<path>/{time, value}
+    """
+    history_group = h5group.require_group("lq_history")
+    for path in paths:
+        lq = app.get_lq(path)
+        if lq is None or lq.history is None:
+            continue
+        lq_group = history_group.create_group(path)
+        lq_group.attrs["path"] = path
+        if lq.unit:
+            lq_group.attrs["unit"] = lq.unit
+        lq.history.save_window(lq_group, t0, t1)
+    return history_group
+
+
 def h5_measurement_file(measurement, fname=None) -> None:
     """Default way to create HDF5 file and fill with
     metadata for measurement and hardware
@@ -5,7 +5,7 @@ import time
 import warnings
 from functools import partial
 from pathlib import Path
-from typing import Callable
+from typing import Any, Callable, Dict, Iterable
 
 from qtpy import QtCore, QtGui, QtWidgets
 
@@ -76,7 +76,12 @@ class HardwareComponent:
         # self.connect_success = False # ever used?
         self.auto_thread_lock = True
 
+        # reads many settings in one round trip, see connect_batch_read
+        self.batch_read_func: Callable[[], Dict[str, Any]] = None
+
+        t0 = time.perf_counter()
         self.setup()
+        self.setup_duration = time.perf_counter() - t0
 
         if self.auto_thread_lock:
             self.thread_lock_all_lq()
@@ -98,7 +103,9 @@ class HardwareComponent:
     def enable_connection(self, enable=True):
         if enable:
             try:
+                t0 = time.perf_counter()
                 self.connect()
+                self.connect_duration = time.perf_counter() - t0
                 # start thread if needed
                 if hasattr(self, "run"):
                     self.update_thread_interrupted = False
@@ -136,15 +143,56 @@ class HardwareComponent:
                     print("threaded update failed", err)
                     time.sleep(1.0)
 
-    def read_from_hardware(self):
+    def connect_batch_read(self, read_func: Callable[[], Dict[str, Any]]):
+        """
+        Registers *read_func* that reads many settings in a single device round
+        trip and returns a dict {setting name: value}, e.g. a status query.
+
+        Used by :meth:`read_from_hardware` (and thereby App.read_from_hardwares and
+        App.read_settings(read_from_hardware=True)) instead of reading each of
+        these settings one by one. Typically called in :meth:`connect`.
+        """
+        assert callable(read_func)
+        self.batch_read_func = read_func
+
+    def disconnect_batch_read(self):
+        self.batch_read_func = None
+
+    def read_from_hardware(self, names: Iterable[str] = None, send_signal=True):
         """
         Read all settings (:class:`LoggedQuantity`) connected to hardware states
+
+        *names*: only read these settings, default all.
+
+        Settings returned by the batch read function (see connect_batch_read) are
+        updated from a single call, the others are read one by one. Signals are
+        sent after all values are updated, unless *send_signal* is False.
         """
-        for name, lq in self.settings.as_dict().items():
-            if lq.has_hardware_read():
-                lq.read_from_hardware()
-                if self.debug_mode.val:
-                    self.log.debug(f"read_from_hardware {name}: {lq.val}")
+        if names is None:
+            lqs = self.settings.as_dict()
+        else:
+            lqs = {name: self.settings.get_lq(name) for name in names}
+
+        batch = {}
+        if self.batch_read_func is not None:
+            with self.lock:
+                batch = self.batch_read_func()
+
+        updated = []
+        for name, lq in lqs.items():
+            if name in batch:
+                lq.update_value(batch[name], update_hardware=False, send_signal=False)
+            elif lq.has_hardware_read():
+                lq.read_from_hardware(send_signal=False)
+            else:
+                continue
+            updated.append(lq)
+            if self.debug_mode.val:
+                self.log.debug(f"read_from_hardware {name}: {lq.val}")
+
+        if send_signal:
+            for lq in updated:
+                lq.schedule_display_updates()
 
     def add_logged_quantity(self, name, **kwargs):
         return self.settings.New(name, **kwargs)
@@ -5,3 +5,4 @@ from .lq_3_vector import LQ3Vector
 from .lq_range import LQRange
 from .lq_intervaled_range import IntervaledLQRange
 from .collection import LQCollection
+from .history import LQHistory
@@ -75,6 +75,13 @@ class ArrayLQ(LoggedQuantity):
         self.proposed_values = deque([], 7)
         self.actions = []
 
+        self.coalesce_rate = None
+        self.n_emitted = 0
+        self.n_coalesced = 0
+        self._coalesce_pending = False
+        self._last_emit_time = 0.0
+        self._coalesced_update_requested.connect(self._on_coalesced_update_requested)
+
     def same_values(self, v1, v2):
         if v1.shape == v2.shape:
             return np.all(v1 == v2)
@@ -101,6 +108,7 @@ class ArrayLQ(LoggedQuantity):
         with self.lock:
             self.log.debug(f"{self.name} send_display_updates")
             if force or np.any(self.oldval != self.val):
+                self.n_emitted += 1
 
                 str_val = self.string_value()
                 self.updated_value[str].emit(str_val)
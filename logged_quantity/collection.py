@@ -51,6 +51,7 @@ class LQCollection:
         self.path = path
         self._widgets_managers_ = []
         self.event_filter = event_filter
+        self.coalesce_rate = None
 
     def new_file(
         self,
@@ -174,9 +175,20 @@ class LQCollection:
         self.__dict__[name] = lq  # allow attribute access
 
         lq.set_path(f"{self.path}/{name}")
+        if self.coalesce_rate:
+            lq.set_coalesce_rate(self.coalesce_rate)
         self.q_object.lq_added[LoggedQuantity].emit(lq)
         return lq
 
+    def set_coalesce_rate(self, max_rate: float = 30.0):
+        """
+        coalesce display updates of all LQs of this collection, including those
+        added later. See LoggedQuantity.set_coalesce_rate
+        """
+        self.coalesce_rate = max_rate
+        for lq in self.as_list():
+            lq.set_coalesce_rate(max_rate)
+
     def get_lq(self, key) -> LoggedQuantity:
         return self._logged_quantities[key]
 
@@ -0,0 +1,165 @@
+"""
+time series of the values of a LoggedQuantity, see LoggedQuantity.enable_history
+"""
+
+import bisect
+import threading
+import time
+from typing import Tuple
+
+import h5py
+import numpy as np
+
+from ScopeFoundry.h5_io import (
+    create_extendable_h5_dataset,
+    extend_h5_dataset_along_axis,
+)
+
+
+class LQHistory:
+    """
+    Ring buffer of (timestamp, value) samples.
+
+    Arrays are preallocated, appending does not allocate. Once *size* samples
+    are stored the oldest are overwritten, unless spilled to a HDF5 log (see
+    spill_to), in which case window() reads older samples from the log.
+
+    Timestamps are time.time() and assumed to be increasing.
+    """
+
+    def __init__(self, dtype=float, size: int = 100_000):
+        self.size = size
+        self.times = np.zeros(size, dtype=float)
+        self.values = np.zeros(size, dtype=dtype)
+        self.n = 0  # number of samples appended so far
+        self.lock = threading.Lock()
+
+        self.h5_group = None
+        self.h5_offset = 0  # sample number of the first row of the log
+        self.n_spilled = 0
+        self.spill_size = size // 2
+
+    def __len__(self):
+        return min(self.n, self.size)
+
+    def append(self, value, t: float = None):
+        if t is None:
+            t = time.time()
+        with self.lock:
+            i = self.n % self.size
+            self.times[i] = t
+            self.values[i] = value
+            self.n += 1
+            if self.h5_group is not None and self.n - self.n_spilled >= self.spill_size:
+                self._spill()
+
+    def _samples(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """copies of samples number start to stop, which have to be in memory"""
+        ii = np.arange(start, stop) % self.size
+        return self.times[ii], self.values[ii]
+
+    def spill_to(
+        self,
+        h5_group: h5py.Group,
+        spill_size: int = None,
+        include_buffered: bool = True,
+    ):
+        """
+        log samples to extendable datasets 'time' and 'value' in *h5_group*,
+        appending to existing ones. Samples are written in blocks of *spill_size*
+        (defaults to half the buffer size) and by flush().
+
+        *include_buffered*: also log the samples currently in memory
+        """
+        with self.lock:
+            if spill_size is not None:
+                self.spill_size = max(1, min(spill_size, self.size))
+            self.h5_group = h5_group
+            if include_buffered:
+                self.n_spilled = max(0, self.n - self.size)
+            else:
+                self.n_spilled = self.n
+            n_rows = 0
+            if "time" in h5_group:
+                n_rows = len(h5_group["time"])
+            else:
+                for name, dtype in [("time", float), ("value", self.values.dtype)]:
+                    create_extendable_h5_dataset(
+                        h5_group,
+                        name,
+                        shape=(0,),
+                        dtype=dtype,
+                        chunks=(min(self.spill_size, 65536),),
+                    )
+            self.h5_offset = self.n_spilled - n_rows
+            self._spill()
+
+    def _spill(self):
+        times, values = self._samples(self.n_spilled, self.n)
+        r0 = self.n_spilled - self.h5_offset
+        r1 = r0 + len(times)
+        for name, data in [("time", times), ("value", values)]:
+            dset = self.h5_group[name]
+            extend_h5_dataset_along_axis(dset, r1)
+            dset[r0:r1] = data
+        self.n_spilled = self.n
+
+    def flush(self):
+        """writes pending samples to the HDF5 log"""
+        with self.lock:
+            if self.h5_group is not None:
+                self._spill()
+                self.h5_group.file.flush()
+
+    def close(self):
+        """flushes and detaches from the HDF5 log"""
+        self.flush()
+        with self.lock:
+            self.h5_group = None
+
+    def window(self, t0: float = None, t1: float = None):
+        """
+        returns (times, values) of the samples with t0 <= time <= t1, None means
+        unbounded. Samples no longer in memory are read from the HDF5 log.
+        """
+        with self.lock:
+            start = max(0, self.n - self.size)
+            times, values = self._samples(start, self.n)
+            h5_group = self.h5_group
+            h5_stop = min(start, self.n_spilled) - self.h5_offset
+
+        i0 = 0 if t0 is None else np.searchsorted(times, t0, side="left")
+        i1 = len(times) if t1 is None else np.searchsorted(times, t1, side="right")
+        times, values = times[i0:i1], values[i0:i1]
+
+        if h5_group is not None and h5_stop > 0 and i0 == 0:
+            # older samples from the log
+            dset = h5_group["time"]
+            r0 = 0 if t0 is None else bisect.bisect_left(_H5Sequence(dset), t0)
+            r1 = h5_stop
+            if t1 is not None:
+                r1 = bisect.bisect_right(_H5Sequence(dset), t1, r0, h5_stop)
+            if r1 > r0:
+                times = np.concatenate([dset[r0:r1], times])
+                values = np.concatenate([h5_group["value"][r0:r1], values])
+        return times, values
+
+    def save_window(self, h5_group: h5py.Group, t0: float = None, t1: float = None):
+        """writes window(t0, t1) as datasets 'time' and 'value' to h5_group"""
+        times, values = self.window(t0, t1)
+        h5_group.create_dataset("time", data=times)
+        h5_group.create_dataset("value", data=values)
+        return h5_group
+
+
+class _H5Sequence:
+    """1D dataset as a sequence for bisect, reads only the probed elements"""
+
+    def __init__(self, dset):
+        self.dset = dset
+
+    def __len__(self):
+        return len(self.dset)
+
+    def __getitem__(self, i):
+        return self.dset[i]
@@ -1,4 +1,7 @@
+import logging
 import subprocess
+import threading
+import time
 from collections import deque
 from enum import Enum
 from functools import partial
@@ -8,7 +11,8 @@ from typing import Any, Iterable, List, Tuple, Union
 import pyqtgraph as pg
 from qtpy import QtCore, QtGui, QtWidgets
 
-from ScopeFoundry.helper_funcs import QLock, bool2str, get_logger_from_class, str2bool
+from ScopeFoundry.helper_funcs import bool2str, get_logger_from_class, str2bool
+from ScopeFoundry.logged_quantity.history import LQHistory
 from ScopeFoundry.widgets import MinMaxQSlider
 
 
@@ -45,6 +49,15 @@ class LoggedQuantity(QtCore.QObject):
     # signal sent when read only (ro) status has changed
     updated_readonly = QtCore.Signal((bool,), ())
 
+    # internal: requests a coalesced display update on the thread of the LQ
+    _coalesced_update_requested = QtCore.Signal()
+
+    # set in __init__ if coerce_to_type can be skipped for values of type dtype
+    _default_coercion = False
+
+    # LQHistory of the values, see enable_history
+    history = None
+
     def __init__(
         self,
         name,
@@ -129,8 +142,8 @@ class LoggedQuantity(QtCore.QObject):
         self.widget_list = []
         self.listeners = []
 
-        # threading lock
-        self.lock = QLock(mode=1)  # mode 0 is non-reentrant lock
+        # threading lock (reentrant)
+        self.lock = threading.RLock()
 
         self.path = ""
 
@@ -144,6 +157,25 @@ class LoggedQuantity(QtCore.QObject):
         self.actions = []
         self.event_filter: QtCore.QObject = None
 
+        # coalescing of display updates from other threads, see set_coalesce_rate
+        self.coalesce_rate = None
+        self.n_emitted = 0  # number of display updates sent
+        self.n_coalesced = 0  # number of display updates merged into a pending one
+        self._coalesce_pending = False
+        self._last_emit_time = 0.0
+        self._coalesced_update_requested.connect(self._on_coalesced_update_requested)
+
+        # keeps the wrapper of the LQ's thread alive, makes self.thread() cheap
+        current_qthread()
+
+        # update_value skips coerce_to_type for values of type dtype, unless
+        # coerce_to_type or same_values are overridden
+        cls = type(self)
+        self._default_coercion = (
+            cls.coerce_to_type is LoggedQuantity.coerce_to_type
+            and cls.same_values is LoggedQuantity.same_values
+        )
+
     def coerce_to_type(self, x):
         """
         Force x to dtype of the LQ
@@ -240,31 +272,40 @@ class LoggedQuantity(QtCore.QObject):
         :returns: None
 
         """
-        # use a thread lock during update_value to avoid another thread
-        # calling update_value during the update_value
-
         if reread_hardware is None:
             # if undefined, default to stored reread_from_hardware_after_write bool
             reread_hardware = self.reread_from_hardware_after_write
 
-        with self.lock:
-
-            # sometimes a the sender is a textbox that does not send its new value,
-            # grab the text() from it instead
-            if new_val is None:
-                if hasattr(self.sender(), "text"):
-                    new_val = self.sender().text()
-
-            self.oldval = self.coerce_to_type(self.val)
+        # sometimes a the sender is a textbox that does not send its new value,
+        # grab the text() from it instead. There is no sender if called from
+        # another thread.
+        if new_val is None and current_qthread() is self.thread():
+            sender = self.sender()
+            if hasattr(sender, "text"):
+                new_val = sender.text()
+
+        if self._default_coercion and type(new_val) is self.dtype:
+            # fast path: no coercion needed and unchanged values return without
+            # taking the lock
+            if new_val == self.val:
+                return
+        else:
             new_val = self.coerce_to_type(new_val)
 
-            self.log.debug(
-                f"{self.path}: update_value {repr(self.oldval)} --> {repr(new_val)}  from sender:{repr(self.sender())}"
-            )
+        # use a thread lock during update_value to avoid another thread
+        # calling update_value during the update_value
+        with self.lock:
+            self.oldval = self.val
+            if type(self.oldval) is not self.dtype:
+                self.oldval = self.coerce_to_type(self.oldval)
+
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug(
+                    f"{self.path}: update_value {repr(self.oldval)} --> {repr(new_val)}"
+                )
 
             # check for equality of new vs old, do not proceed if they are same
             if self.same_values(self.oldval, new_val):
-                self.log.debug(f"{self.path}: same_value so returning")
                 return
             # else:
             #     self.log.debug(f"{self.path}: different values {self.oldval} {new_val}")
@@ -272,6 +313,8 @@ class LoggedQuantity(QtCore.QObject):
             # actually change internal state value and store prev. values
             self.prev_vals.appendleft(self.val)
             self.val = new_val
+            if self.history is not None:
+                self.history.append(new_val)
 
         # Read from Hardware
         if update_hardware and self.hardware_set_func:
@@ -280,7 +323,37 @@ class LoggedQuantity(QtCore.QObject):
                 self.read_from_hardware(send_signal=False)
         # Send Qt Signals
         if send_signal:
-            self.send_display_updates()
+            self.schedule_display_updates()
+
+    def enable_history(self, size: int = 100_000) -> LQHistory:
+        """
+        Opt-in recording of (timestamp, value) of every value change in a ring
+        buffer of *size* samples, see LQHistory and get_history.
+        Only available for numeric and bool LQs.
+
+        returns LoggedQuantity.history
+        """
+        if self.history is None:
+            if self.is_array or self.dtype not in (float, int, bool):
+                raise ValueError(f"{self.path}: history needs a numeric dtype")
+            with self.lock:
+                self.history = LQHistory(self.dtype, size)
+                self.history.append(self.val)
+        return self.history
+
+    def disable_history(self):
+        history, self.history = self.history, None
+        if history is not None:
+            history.close()
+
+    def get_history(self, t0: float = None, t1: float = None):
+        """
+        returns (times, values) with t0 <= times <= t1 (time.time() timestamps,
+        None means unbounded), see enable_history
+        """
+        if self.history is None:
+            raise ValueError(f"{self.path}: history not enabled")
+        return self.history.window(t0, t1)
 
     def send_display_updates(self, force=False):
         """
@@ -296,11 +369,13 @@ class LoggedQuantity(QtCore.QObject):
         """
         # self.log.debug("{self.name}:send_display_updates: {force=}. From {self.oldval} to {self.val}")
         if (not self.same_values(self.oldval, self.val)) or (force):
+            self.n_emitted += 1
             self.updated_value[()].emit()
 
-            str_val = self.string_value()
-            self.updated_value[str].emit(str_val)
-            self.updated_text_value.emit(str_val)
+            if self.has_text_listeners():
+                str_val = self.string_value()
+                self.updated_value[str].emit(str_val)
+                self.updated_text_value.emit(str_val)
 
             if self.dtype in [float, int]:
                 self.updated_value[float].emit(self.val)
@@ -316,6 +391,65 @@ class LoggedQuantity(QtCore.QObject):
             # no updates sent
             pass
 
+    def has_text_listeners(self) -> bool:
+        """True if anything is connected to the str signals (string_value is needed)"""
+        try:
+            return bool(
+                self.receivers(self.updated_text_value)
+                or self.receivers(self.updated_value[str])
+            )
+        except TypeError:
+            # bindings whose receivers() only accepts signatures
+            return True
+
+    def set_coalesce_rate(self, max_rate: float = 30.0):
+        """
+        Opt-in coalescing of display updates: value changes made from threads other
+        than the LQ's (GUI) thread are collapsed to the latest value and signals are
+        emitted at most *max_rate* times per second. None or 0 disables coalescing.
+
+        See n_emitted and n_coalesced for the number of emitted and merged updates.
+        """
+        self.coalesce_rate = max_rate
+
+    def schedule_display_updates(self):
+        """
+        send_display_updates, coalesced if enabled (see set_coalesce_rate) and
+        called from a thread other than the LQ's
+        """
+        if self.coalesce_rate and current_qthread() is not self.thread():
+            self.coalesce_display_updates()
+        else:
+            self.send_display_updates()
+
+    def coalesce_display_updates(self):
+        """
+        schedules send_display_updates on the LQ's thread unless one is already
+        pending, in which case the pending one will pick up the latest value.
+        """
+        if self._coalesce_pending:
+            self.n_coalesced += 1
+            return
+        self._coalesce_pending = True
+        self._coalesced_update_requested.emit()
+
+    def _on_coalesced_update_requested(self):
+        delay = 0.0
+        if self.coalesce_rate:
+            delay = self._last_emit_time + 1.0 / self.coalesce_rate - time.monotonic()
+        QtCore.QTimer.singleShot(
+            max(0, int(delay * 1000)), self._send_coalesced_display_updates
+        )
+
+    def _send_coalesced_display_updates(self):
+        # clear the flag before reading self.val, updates made from now on
+        # schedule a new one
+        self._coalesce_pending = False
+        self._last_emit_time = time.monotonic()
+        # forced: the value changed when the update was scheduled, oldval may
+        # have been overwritten since by an update with an equal value
+        self.send_display_updates(force=True)
+
     def same_values(self, v1, v2):
         """
         Compares two values of the LQ type, used in update_value
@@ -1444,6 +1578,22 @@ class LoggedQuantity(QtCore.QObject):
         )
 
 
+_thread_local = threading.local()
+
+
+def current_qthread() -> QtCore.QThread:
+    """
+    QtCore.QThread.currentThread(), a reference to it is kept for each thread so
+    that repeated calls (and QObject.thread() of objects living in this thread)
+    return the same, cached wrapper
+    """
+    try:
+        return _thread_local.qthread
+    except AttributeError:
+        _thread_local.qthread = QtCore.QThread.currentThread()
+        return _thread_local.qthread
+
+
 def to_q_color(color, default="lightgrey"):
     try:
         qcolor = QtGui.QColor(color)
@@ -77,9 +77,20 @@ class Measurement:
         self.display_update_period = 0.1  # seconds
 
         self.acq_thread = None
+        self.h5_writer = None
+
+        # paths of LQs whose history during a run is saved to h5_meas_group,
+        # see close_h5_file
+        self.lq_history_paths = []
+        self._history_t0 = None
 
         self.interrupt_measurement_called = False
 
+        # notified on run_state changes and interrupts, see start_nested_measure_and_wait
+        self.run_state_changed = threading.Condition()
+        self.run_count = 0  # number of calls to _start
+        self._nested_measure = None
+
         self.settings = LQCollection(
             path=f"mm/{self.name}", event_filter=self.app.event_filter
         )
@@ -124,10 +135,13 @@ class Measurement:
         )
         self.add_operation("Reload_Code", self.reload_code)
 
+        t0 = time.perf_counter()
         if hasattr(self, "ui_filename"):
             self.load_ui()
         self.setup()
+        self.setup_duration = time.perf_counter() - t0
         self.subwin = None  # will be set when the measurement is added to the app
+        self._setting_up_figure = False
 
     def setup(self):
         """Override this to set up logged quantities and gui connections
@@ -139,7 +153,8 @@ class Measurement:
     def setup_figure(self):
         """
         Override setup_figure to build graphical interfaces.
-        This function is run on ScopeFoundry startup.
+        This function is run when the measurement is first shown or started, or
+        when the app is idle after startup, see BaseMicroscopeApp.lazy_measure_uis.
         """
         self.log.info("Empty setup_figure called")
         pass
@@ -169,8 +184,31 @@ class Measurement:
         starts display timer which calls update_display periodically
         connects a signal/slot that calls post run when thread is finished
         """
+        if self._setting_up_figure:
+            # widgets of activation created in setup_figure report True again
+            return
+
         self.interrupt_measurement_called = False
-        self.run_state.update_value("run_starting")
+        # threads waiting for the start (start_nested_measure_and_wait) see the
+        # new run_state together with run_count
+        with self.run_state_changed:
+            self.run_state.update_value("run_starting")
+            self.run_count += 1
+            self.run_state_changed.notify_all()
+
+        if self.app.mdi and self.app.lazy_measure_uis:
+            # update_display and often pre_run need the figure
+            self._setting_up_figure = True
+            try:
+                self.app.load_measure_ui(self)
+            except Exception:
+                self._set_run_state("stop_failure")
+                self.activation.update_value(False)
+                raise
+            finally:
+                self._setting_up_figure = False
+
+        self.enable_lq_history()
 
         msg = f"measurement {self.name} start called from thread: {repr(threading.get_ident())}"
         self.log.info(msg)
@@ -186,21 +224,29 @@ class Measurement:
         self.acq_thread.finished.connect(self._call_post_run)
         # self.measurement_state_changed.emit(True)
         # self.running.update_value(True)
-        self.run_state.update_value("run_prerun")
+        self._set_run_state("run_prerun")
         try:
             self.pre_run()
         except Exception as err:
             # print("err", err)
-            self.run_state.update_value("stop_failure")
+            self._set_run_state("stop_failure")
             self.activation.update_value(False)
             raise
 
-        self.run_state.update_value("run_thread_starting")
+        self._set_run_state("run_thread_starting")
         self.acq_thread.start()
-        self.run_state.update_value("run_thread_run")
+        self._set_run_state("run_thread_run")
         self.t_start = time.time()
         self.q_object.display_update_timer.start(int(self.display_update_period * 1000))
 
+    def _set_run_state(self, state: str):
+        self.run_state.update_value(state)
+        self._notify_run_state_changed()
+
+    def _notify_run_state_changed(self):
+        with self.run_state_changed:
+            self.run_state_changed.notify_all()
+
     def pre_run(self):
         """Override this method to enable main-thread initialization prior to measurement thread start"""
         pass
@@ -225,14 +271,15 @@ class Measurement:
         """
         Don't call this directly!
         """
-        self.run_state.update_value("run_post_run")
+        self._set_run_state("run_post_run")
         try:
+            self.close_async_h5_writer()
             self.post_run()
         except Exception as err:
             raise
         finally:
             self.activation.update_value(False)
-            self.run_state.update_value(self.end_state)
+            self._set_run_state(self.end_state)
 
     def post_run(self):
         """Override this method to enable main-thread finalization after to measurement thread completes"""
@@ -257,7 +304,7 @@ class Measurement:
             success = False
             raise
         finally:
-            self.run_state.update_value("run_thread_end")
+            self._set_run_state("run_thread_end")
 
             # self.running.update_value(False)
             self.set_progress(0.0)  # set progress bars back to zero
@@ -301,7 +348,7 @@ class Measurement:
         else:
             text = self.name
 
-        if hasattr(self, "subwin"):
+        if getattr(self, "subwin", None) is not None:
             self.subwin.setWindowTitle(text)
 
         for manager in self._subtree_managers_:
@@ -320,6 +367,10 @@ class Measurement:
         if self.settings["run_state"].startswith("run"):
             self.log.info(f"measurement {self.name} interrupt called")
             self.interrupt_measurement_called = True
+            # wake up threads waiting on this (or a nested) measurement
+            self._notify_run_state_changed()
+            if self._nested_measure is not None:
+                self._nested_measure._notify_run_state_changed()
         # self.activation.update_value(False)
         # Make sure display is up to date
         # self.q_object._on_display_update_timer()
@@ -412,52 +463,84 @@ class Measurement:
         )
 
         measure.interrupt_measurement_called = False
+        run_count = measure.run_count
         measure.start()
 
         # Wait until measurement has started, timeout of 1 second
-        t0 = time.time()
-        while not measure.is_measuring():
-            time.sleep(0.010)
-            if time.time() - t0 > 1.0:
-                print(
-                    f"{self.name}: nested measurement {measure.name} has not started before timeout"
-                )
-                return measure.settings["run_state"] == "stop_success"
+        with measure.run_state_changed:
+            started = measure.run_state_changed.wait_for(
+                lambda: measure.run_count > run_count, timeout=1.0
+            )
+        if not started:
+            print(
+                f"{self.name}: nested measurement {measure.name} has not started before timeout"
+            )
+            return measure.settings["run_state"] == "stop_success"
 
         last_polling = time.time()
+        outer_interrupt_sent = False
+        nested_interrupt_sent = False
+
+        def nested_interrupted():
+            # interrupt_measurement_called is also raised when activation is reset
+            # during post_run of a successful run
+            return (
+                nested_interrupt
+                and measure.interrupt_measurement_called
+                and measure.settings["run_state"] != "run_post_run"
+            )
 
-        # Now that it is running, wait until done
-        while measure.is_measuring():
-            if self.interrupt_measurement_called:
-                # print('nest outer interrupted', self.interrupt_measurement_called)
-                measure.interrupt()
-
-            if measure.interrupt_measurement_called and nested_interrupt:
-                # THIS IS MAYBE UNSAFE???: measure.interrupt_measurement_called might be also TRUE if measure finished successfully?
-                # IDEA to TEST: also check the measure.settings['run_state'].startswidth('stop')
-                print(
-                    "nested interrupt bubbling up",
-                    measure.interrupt_measurement_called,
-                    self.interrupt_measurement_called,
-                )
-                self.interrupt()
-
-            time.sleep(0.010)
+        def should_wake():
+            return (
+                not measure.is_measuring()
+                or (self.interrupt_measurement_called and not outer_interrupt_sent)
+                or (nested_interrupted() and not nested_interrupt_sent)
+            )
 
-            # polling
-            t = time.time()
-            if (
-                measure.settings["run_state"] == "run_thread_run"
-                and polling_func
-                and t - last_polling > polling_time
-            ):
-                try:
-                    polling_func()
-                except Exception as err:
-                    self.log.error(
-                        f"start_nested_measure_and_wait polling failed {err}"
+        # Now that it is running, wait until done. Woken up by run_state changes
+        # and interrupts of either measurement, or when polling_func is due.
+        self._nested_measure = measure
+        try:
+            while measure.is_measuring():
+                if self.interrupt_measurement_called and not outer_interrupt_sent:
+                    # print('nest outer interrupted', self.interrupt_measurement_called)
+                    measure.interrupt()
+                    outer_interrupt_sent = True
+
+                if nested_interrupted() and not nested_interrupt_sent:
+                    print(
+                        "nested interrupt bubbling up",
+                        measure.interrupt_measurement_called,
+                        self.interrupt_measurement_called,
                     )
-                last_polling = t
+                    self.interrupt()
+                    nested_interrupt_sent = True
+
+                # polling
+                timeout = 1.0  # guards against changes that are not notified
+                if polling_func and measure.settings["run_state"] == "run_thread_run":
+                    t = time.time()
+                    if t - last_polling > polling_time:
+                        try:
+                            polling_func()
+                        except Exception as err:
+                            self.log.error(
+                                f"start_nested_measure_and_wait polling failed {err}"
+                            )
+                        last_polling = t
+                    timeout = min(timeout, max(0.0, last_polling + polling_time - t))
+
+                with measure.run_state_changed:
+                    measure.run_state_changed.wait_for(should_wake, timeout=timeout)
+        finally:
+            self._nested_measure = None
+
+        if (
+            nested_interrupt
+            and not nested_interrupt_sent
+            and measure.settings["run_state"] == "stop_interrupted"
+        ):
+            self.interrupt()
 
         # returns True if successful run, otherwise,
         # returns false for a run failure or interrupted measurement
@@ -660,10 +743,62 @@ class Measurement:
 
         return self.h5_meas_group
 
+    def enable_lq_history(self):
+        """enables the history of the LQs in lq_history_paths, called on start"""
+        self._history_t0 = time.time()
+        for path in self.lq_history_paths:
+            lq = self.app.get_lq(path)
+            if lq is None:
+                self.log.warning(f"lq_history_paths: {path} not found")
+                continue
+            lq.enable_history()
+
     def close_h5_file(self):
+        """
+        closes Measurement.h5_file, saving the history of the LQs in
+        lq_history_paths since the start of the run to h5_meas_group/lq_history
+        """
+        self.close_async_h5_writer()
         if hasattr(self, "h5_file") and self.h5_file.id is not None:
+            if self.lq_history_paths and hasattr(self, "h5_meas_group"):
+                from ScopeFoundry import h5_io
+
+                h5_io.h5_save_lq_history(
+                    self.app,
+                    self.h5_meas_group,
+                    self.lq_history_paths,
+                    t0=self._history_t0,
+                )
             self.h5_file.close()
 
+    def open_async_h5_writer(self, h5_file=None, max_queue_size: int = 1024):
+        """
+        starts Measurement.h5_writer, an AsyncH5Writer that writes to *h5_file*
+        (defaults to Measurement.h5_file) on a dedicated thread. Use it in run
+        to queue writes instead of writing to h5 datasets directly:
+
+            self.h5_writer.write(dset, index, value)
+
+        The writer is closed (all pending writes processed and file flushed) by
+        close_h5_file() and before post_run().
+
+        returns Measurement.h5_writer
+        """
+        from ScopeFoundry.async_h5_writer import AsyncH5Writer
+
+        self.close_async_h5_writer()
+        if h5_file is None:
+            h5_file = self.h5_file
+        self.h5_writer = AsyncH5Writer(
+            h5_file, max_queue_size=max_queue_size, name=f"{self.name}_h5_writer"
+        )
+        return self.h5_writer
+
+    def close_async_h5_writer(self):
+        if self.h5_writer is not None:
+            h5_writer, self.h5_writer = self.h5_writer, None
+            h5_writer.close()
+
 
 class MeasurementQObject(QtCore.QObject):
 
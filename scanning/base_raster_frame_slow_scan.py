@@ -26,6 +26,7 @@ class BaseRaster2DFrameSlowScan(BaseRaster2DScan):
         self.compute_scan_arrays()
 
         self.initial_scan_setup_plotting = True
+        self.display_dirty.reset()
 
         self.display_image_map = np.zeros(self.scan_shape, dtype=float)
         self.pixel_times = np.zeros(self.scan_shape, dtype=float)
@@ -54,6 +55,7 @@ class BaseRaster2DFrameSlowScan(BaseRaster2DScan):
             self.pixel_times_h5 = self.create_h5_framed_dataset(
                 name="pixel_times", single_frame_map=self.pixel_times, dtype=float
             )
+            self.open_async_h5_writer()
 
         self.frame_i = 0
         self.pixel_i = 0
@@ -98,7 +100,7 @@ class BaseRaster2DFrameSlowScan(BaseRaster2DScan):
                         if self.scan_slow_move[i]:
                             self.move_position_slow(h, v, dh, dv)
                             if self.settings["save_h5"]:
-                                self.h5_file.flush()  # flush data to file every slow move
+                                self.h5_writer.flush()  # flush data to file every slow move
                             # self.app.qtapp.ProcessEvents()
                             time.sleep(0.01)
                         else:
@@ -110,8 +112,13 @@ class BaseRaster2DFrameSlowScan(BaseRaster2DScan):
                         pixel_t0 = time.time()
                         self.pixel_times[kk, jj, ii] = pixel_t0
                         if self.settings["save_h5"]:
-                            self.pixel_times_h5[self.frame_i, kk, jj, ii] = pixel_t0
+                            self.h5_writer.write(
+                                self.pixel_times_h5,
+                                (self.frame_i, kk, jj, ii),
+                                pixel_t0,
+                            )
                         self.collect_pixel(self.pixel_i, self.frame_i, kk, jj, ii)
+                        self.display_dirty.add(kk, jj, ii)
                         S["progress"] = (
                             100.0
                             * (self.frame_i * self.Npixels + self.pixel_i)
@@ -124,7 +131,7 @@ class BaseRaster2DFrameSlowScan(BaseRaster2DScan):
         finally:
             self.post_scan_cleanup()
             if self.settings["save_h5"] and hasattr(self, "h5_file"):
-                self.h5_file.close()
+                self.close_h5_file()
 
     def move_position_start(self, x, y):
         self.stage.settings["x_position"] = x
@@ -4,17 +4,142 @@ Created on Feb 4, 2016
 @author: Edward Barnard
 """
 
+import threading
 import time
-from typing import Tuple
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import pyqtgraph as pg
 from qtpy import QtCore
 
 from ScopeFoundry import LQRange, Measurement
+from ScopeFoundry.graphics.tiled_image_item import TiledImageItem
+from ScopeFoundry.graphics.zoomable_map import ZoomableMapImageItem
 from ScopeFoundry.helper_funcs import load_qt_ui_file, sibling_path
 from ScopeFoundry.logged_quantity.collection import LQCollection
 
+from .scan_paths import (
+    gen_scan_path,
+    iter_scan_path,
+    scan_path_npixels,
+    zigzag_indices,
+)
+
+
+@dataclass
+class ScanChunk:
+    """consecutive pixels of a scan, see iter_scan_chunks"""
+
+    start: int  # pixel number of first pixel
+    scan_index_array: np.ndarray
+    scan_slow_move: np.ndarray
+    scan_start_move: np.ndarray
+    scan_h_positions: np.ndarray
+    scan_v_positions: np.ndarray
+    scan_z_positions: np.ndarray = None
+
+    def __len__(self):
+        return len(self.scan_index_array)
+
+
+class DisplayDirtyRegions:
+    """
+    Thread-safe record of the pixels of a display_image_map[kk, jj, ii] that
+    changed since the last display update, kept as one bounding box per kk.
+
+    Filled by the scan loop (add), consumed by update_display (pop). Stays
+    inactive (and update_display redraws whole frames) until the first add.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.boxes: Dict[int, list] = {}
+        self.active = False
+
+    def reset(self):
+        with self.lock:
+            self.boxes.clear()
+            self.active = False
+
+    def add(self, kk: int, jj: int, ii: int):
+        with self.lock:
+            self.active = True
+            box = self.boxes.get(kk)
+            if box is None:
+                self.boxes[kk] = [jj, jj + 1, ii, ii + 1]
+                return
+            box[0] = min(box[0], jj)
+            box[1] = max(box[1], jj + 1)
+            box[2] = min(box[2], ii)
+            box[3] = max(box[3], ii + 1)
+
+    def pop(self, kk: int) -> Optional[Tuple[slice, slice]]:
+        """returns (jj_slice, ii_slice) changed in frame kk, None if unchanged"""
+        with self.lock:
+            box = self.boxes.pop(kk, None)
+        if box is None:
+            return None
+        return slice(box[0], box[1]), slice(box[2], box[3])
+
+
+def nan_min_max(a: np.ndarray) -> Optional[Tuple[float, float]]:
+    """returns (min, max) of the finite values of *a*, None if there are none"""
+    finite = a[np.isfinite(a)]
+    if finite.size == 0:
+        return None
+    return float(finite.min()), float(finite.max())
+
+
+def merge_levels(levels, new_levels):
+    if levels is None:
+        return new_levels
+    if new_levels is None:
+        return levels
+    return min(levels[0], new_levels[0]), max(levels[1], new_levels[1])
+
+
+def update_display_region(m) -> None:
+    """
+    updates only the pixels of the current frame of raster scan *m* that changed
+    since the last update (see display_dirty) and keeps running min/max display
+    levels, shared by BaseRaster2DScan and BaseRaster3DScan
+    """
+    kk = m.current_scan_index[0]
+    region = m.display_dirty.pop(kk)
+    if kk != m.display_kk:
+        m.display_kk = kk
+        m.disp_img = m.display_image_map[kk, :, :].T
+        if kk not in m.display_levels:
+            m.display_levels[kk] = nan_min_max(m.disp_img)
+        elif region is not None:
+            m.display_levels[kk] = merge_levels(
+                m.display_levels[kk],
+                nan_min_max(m.display_image_map[kk][region]),
+            )
+        levels = m.display_levels[kk]
+        if levels is None:
+            m.img_item.setImage(m.disp_img, autoRange=False, autoLevels=True)
+        else:
+            m.img_item.setImage(m.disp_img, autoRange=False, levels=levels)
+        # Important to set rectangle after setImage for non-square pixels
+        m.img_item.setRect(m.img_item_rect)
+    elif region is not None:
+        jj_slice, ii_slice = region
+        levels = merge_levels(
+            m.display_levels[kk],
+            nan_min_max(m.display_image_map[kk][region]),
+        )
+        if levels != m.display_levels[kk]:
+            # re-renders all tiles
+            m.display_levels[kk] = levels
+            m.img_item.setLevels(levels)
+        else:
+            m.img_item.update_region(ii_slice, jj_slice)
+    else:
+        return
+    m.update_LUT()
+
 
 class BaseRaster2DScan(Measurement):
     name = "base_raster_2D_scan"
@@ -43,6 +168,7 @@ class BaseRaster2DScan(Measurement):
         self.v_unit = v_unit
         self.use_external_range_sync = use_external_range_sync
         self.circ_roi_size = circ_roi_size
+        self.display_dirty = DisplayDirtyRegions()
         self.img_items = []
         self.current_scan_index = (0, 0, 0)
         Measurement.__init__(self, app)
@@ -161,6 +287,13 @@ class BaseRaster2DScan(Measurement):
         self.settings.New("save_h5", dtype=bool, initial=True, ro=False)
 
         self.settings.New("show_previous_scans", dtype=bool, initial=True)
+        self.settings.New(
+            "zoomable_display",
+            dtype=bool,
+            initial=False,
+            description="display scans as zoomable map (tile pyramid), "
+            "recommended for scans with many pixels. Applies to the next scan.",
+        )
 
         self.settings.New("n_frames", dtype=int, initial=1, vmin=1)
 
@@ -332,7 +465,7 @@ class BaseRaster2DScan(Measurement):
 
         self.img_items = []
 
-        self.img_item = pg.ImageItem()
+        self.img_item = TiledImageItem()
         self.img_items.append(self.img_item)
 
         self.img_plot.addItem(self.img_item)
@@ -450,21 +583,32 @@ class BaseRaster2DScan(Measurement):
     def update_display(self):
         # self.log.debug('update_display')
         if self.initial_scan_setup_plotting:
-            self.img_item = pg.ImageItem()
+            if self.settings["zoomable_display"]:
+                # pyramid levels are updated along with the changed pixels
+                self.img_item = ZoomableMapImageItem(
+                    self.img_plot, self.display_image_map[0, :, :].T, pyramid="memory"
+                )
+            else:
+                self.img_item = TiledImageItem()
+                self.img_plot.addItem(self.img_item)
             self.img_items.append(self.img_item)
-            self.img_plot.addItem(self.img_item)
             self.hist_lut.setImageItem(self.img_item)
 
-            self.img_item.setImage(self.display_image_map[0, :, :])
+            if not self.settings["zoomable_display"]:
+                self.img_item.setImage(self.display_image_map[0, :, :])
             x0, x1, y0, y1 = self.imshow_extent
             self.log.debug(f"update_display set bounds {x0} {x1} {y0} {y1}")
             self.img_item_rect = QtCore.QRectF(x0, y0, x1 - x0, y1 - y0)
             self.img_item.setRect(self.img_item_rect)
             self.log.debug(f"update_display set bounds {self.img_item_rect}")
+            self.display_kk = None
+            self.display_levels = {}
 
             self.initial_scan_setup_plotting = False
+        elif self.display_dirty.active:
+            self.update_display_region()
         else:
-            # if self.settings.scan_type.val in ['raster']
+            # scan loop does not report changed pixels: redraw the whole frame
             kk, jj, ii = self.current_scan_index
             self.disp_img = self.display_image_map[kk, :, :].T
             self.img_item.setImage(self.disp_img, autoRange=False, autoLevels=True)
@@ -472,6 +616,13 @@ class BaseRaster2DScan(Measurement):
             self.img_item.setRect(self.img_item_rect)
             self.update_LUT()
 
+    def update_display_region(self):
+        """
+        updates only the pixels of the current frame that changed since the last
+        update (see display_dirty) and keeps running min/max display levels
+        """
+        update_display_region(self)
+
     def update_LUT(self):
         """override this function to control display LUT scaling"""
         self.hist_lut.imageChanged(autoLevel=False)
@@ -487,6 +638,8 @@ class BaseRaster2DScan(Measurement):
         # current_img = img_items.pop()
         for img_item in self.img_items[:-1]:
             print("removing", img_item)
+            if isinstance(img_item, ZoomableMapImageItem):
+                img_item.shutdown()
             self.img_plot.removeItem(img_item)
             img_item.deleteLater()
 
@@ -553,114 +706,57 @@ class BaseRaster2DScan(Measurement):
         S["total_time"] = S["frame_time"] * S["n_frames"]
 
     #### Scan Generators
-    def gen_raster_scan(self, gen_arrays=True):
-        self.Npixels = self.Nh.val * self.Nv.val
-        self.scan_shape = (1, self.Nv.val, self.Nh.val)
+    def _gen_path_scan(self, scan_type, gen_arrays=True):
+        """computes Npixels, scan_shape and, if gen_arrays, the scan arrays
+        of *scan_type* (see scan_paths.SCAN_PATHS)"""
+        Nh, Nv = self.Nh.val, self.Nv.val
+        self.Npixels = scan_path_npixels(scan_type, Nh, Nv)
+        self.scan_shape = (self.Npixels // (Nv * Nh), Nv, Nh)
 
         if gen_arrays:
-
-            self.create_empty_scan_arrays()
-
             t0 = time.time()
-
-            H, V = np.meshgrid(self.h_array, self.v_array)
-            self.scan_h_positions[:] = H.flat
-            self.scan_v_positions[:] = V.flat
-
-            self.scan_slow_move[:: self.Nh.val] = True
-
-            II, JJ = np.meshgrid(np.arange(self.Nh.val), np.arange(self.Nv.val))
-            self.scan_index_array[:, 1] = JJ.flat
-            self.scan_index_array[:, 2] = II.flat
-            # self.scan_v_positions
-            print("array flatten raster gen", time.time() - t0)
-
-    def gen_serpentine_scan(self, gen_arrays=True):
-        self.Npixels = self.Nh.val * self.Nv.val
-        self.scan_shape = (1, self.Nv.val, self.Nh.val)
-
-        if gen_arrays:
             self.create_empty_scan_arrays()
-            pixel_i = 0
-            for jj in range(self.Nv.val):
-                self.scan_slow_move[pixel_i] = True
+            index_array, slow_move, _ = gen_scan_path(scan_type, Nh, Nv)
+            self.scan_index_array[:] = index_array
+            self.scan_slow_move[:] = slow_move
+            self.scan_h_positions[:] = self.h_array[index_array[:, 2]]
+            self.scan_v_positions[:] = self.v_array[index_array[:, 1]]
+            self.log.debug(f"gen_{scan_type}_scan {time.time() - t0:.3f}s")
+
+    def iter_scan_chunks(self, chunk_size: int = 1 << 16):
+        """
+        lazy alternative to compute_scan_arrays for very large scans,
+        yields ScanChunk of at most *chunk_size* pixels in scan order.
+        Only available for scan types defined in scan_paths.SCAN_PATHS
+        """
+        self.compute_scan_params()
+        h_array, v_array = self.h_array, self.v_array
+        for start, index_array, slow_move, start_move in iter_scan_path(
+            self.scan_type.val, self.Nh.val, self.Nv.val, 1, chunk_size
+        ):
+            yield ScanChunk(
+                start=start,
+                scan_index_array=index_array,
+                scan_slow_move=slow_move,
+                scan_start_move=start_move,
+                scan_h_positions=h_array[index_array[:, 2]],
+                scan_v_positions=v_array[index_array[:, 1]],
+            )
 
-                if jj % 2:  # odd lines
-                    h_line_indicies = range(self.Nh.val)[::-1]
-                else:  # even lines -- traverse in opposite direction
-                    h_line_indicies = range(self.Nh.val)
+    def gen_raster_scan(self, gen_arrays=True):
+        self._gen_path_scan("raster", gen_arrays)
 
-                for ii in h_line_indicies:
-                    self.scan_v_positions[pixel_i] = self.v_array[jj]
-                    self.scan_h_positions[pixel_i] = self.h_array[ii]
-                    self.scan_index_array[pixel_i, :] = [0, jj, ii]
-                    pixel_i += 1
+    def gen_serpentine_scan(self, gen_arrays=True):
+        self._gen_path_scan("serpentine", gen_arrays)
 
     def gen_trace_retrace_scan(self, gen_arrays=True):
-        self.Npixels = 2 * self.Nh.val * self.Nv.val
-        self.scan_shape = (2, self.Nv.val, self.Nh.val)
-
-        if gen_arrays:
-            self.create_empty_scan_arrays()
-            pixel_i = 0
-            for jj in range(self.Nv.val):
-                self.scan_slow_move[pixel_i] = True
-                for kk, step in [(0, 1), (1, -1)]:  # trace kk =0, retrace kk=1
-                    h_line_indicies = range(self.Nh.val)[::step]
-                    for ii in h_line_indicies:
-                        self.scan_v_positions[pixel_i] = self.v_array[jj]
-                        self.scan_h_positions[pixel_i] = self.h_array[ii]
-                        self.scan_index_array[pixel_i, :] = [kk, jj, ii]
-                        pixel_i += 1
+        self._gen_path_scan("trace_retrace", gen_arrays)
 
     def gen_ortho_raster_scan(self, gen_arrays=True):
-        self.Npixels = 2 * self.Nh.val * self.Nv.val
-        self.scan_shape = (2, self.Nv.val, self.Nh.val)
-
-        if gen_arrays:
-            self.create_empty_scan_arrays()
-            pixel_i = 0
-            for jj in range(self.Nv.val):
-                self.scan_slow_move[pixel_i] = True
-                for ii in range(self.Nh.val):
-                    self.scan_v_positions[pixel_i] = self.v_array[jj]
-                    self.scan_h_positions[pixel_i] = self.h_array[ii]
-                    self.scan_index_array[pixel_i, :] = [0, jj, ii]
-                    pixel_i += 1
-            for ii in range(self.Nh.val):
-                self.scan_slow_move[pixel_i] = True
-                for jj in range(self.Nv.val):
-                    self.scan_v_positions[pixel_i] = self.v_array[jj]
-                    self.scan_h_positions[pixel_i] = self.h_array[ii]
-                    self.scan_index_array[pixel_i, :] = [1, jj, ii]
-                    pixel_i += 1
+        self._gen_path_scan("ortho_raster", gen_arrays)
 
     def gen_ortho_trace_retrace_scan(self, gen_arrays=True):
-        print("gen_ortho_trace_retrace_scan")
-        self.Npixels = 4 * len(self.h_array) * len(self.v_array)
-        self.scan_shape = (4, self.Nv.val, self.Nh.val)
-
-        if gen_arrays:
-            self.create_empty_scan_arrays()
-            pixel_i = 0
-            for jj in range(self.Nv.val):
-                self.scan_slow_move[pixel_i] = True
-                for kk, step in [(0, 1), (1, -1)]:  # trace kk =0, retrace kk=1
-                    h_line_indicies = range(self.Nh.val)[::step]
-                    for ii in h_line_indicies:
-                        self.scan_v_positions[pixel_i] = self.v_array[jj]
-                        self.scan_h_positions[pixel_i] = self.h_array[ii]
-                        self.scan_index_array[pixel_i, :] = [kk, jj, ii]
-                        pixel_i += 1
-            for ii in range(self.Nh.val):
-                self.scan_slow_move[pixel_i] = True
-                for kk, step in [(2, 1), (3, -1)]:  # trace kk =2, retrace kk=3
-                    v_line_indicies = range(self.Nv.val)[::step]
-                    for jj in v_line_indicies:
-                        self.scan_v_positions[pixel_i] = self.v_array[jj]
-                        self.scan_h_positions[pixel_i] = self.h_array[ii]
-                        self.scan_index_array[pixel_i, :] = [kk, jj, ii]
-                        pixel_i += 1
+        self._gen_path_scan("ortho_trace_retrace", gen_arrays)
 
 
 class BaseRaster3DScan(Measurement):
@@ -698,6 +794,7 @@ class BaseRaster3DScan(Measurement):
         self.z_unit = z_unit
         self.use_external_range_sync = use_external_range_sync
         self.circ_roi_size = circ_roi_size
+        self.display_dirty = DisplayDirtyRegions()
         Measurement.__init__(self, app)
 
     def setup(self):
@@ -838,6 +935,13 @@ class BaseRaster3DScan(Measurement):
         self.scan_type = self.settings.New(
             "scan_type", dtype=str, initial="raster", choices=("raster", "serpentine")
         )
+        self.settings.New(
+            "lazy_scan_arrays",
+            dtype=bool,
+            initial=False,
+            description="compute scan positions chunk by chunk during the scan "
+            "instead of all at once. Use for very large scans.",
+        )
 
         self.continuous_scan = self.settings.New(
             "continuous_scan", dtype=bool, initial=False
@@ -1028,7 +1132,7 @@ class BaseRaster3DScan(Measurement):
 
         self.img_items = []
 
-        self.img_item = pg.ImageItem()
+        self.img_item = TiledImageItem()
         self.img_items.append(self.img_item)
 
         self.img_plot.addItem(self.img_item)
@@ -1147,7 +1251,7 @@ class BaseRaster3DScan(Measurement):
         # self.log.debug('update_display')
         if self.initial_scan_setup_plotting:
             if self.settings["show_previous_scans"]:
-                self.img_item = pg.ImageItem()
+                self.img_item = TiledImageItem()
                 self.img_items.append(self.img_item)
                 self.img_plot.addItem(self.img_item)
                 self.hist_lut.setImageItem(self.img_item)
@@ -1158,10 +1262,14 @@ class BaseRaster3DScan(Measurement):
             self.img_item_rect = QtCore.QRectF(x0, y0, x1 - x0, y1 - y0)
             self.img_item.setRect(self.img_item_rect)
             self.log.debug(f"update_display set bounds {self.img_item_rect}")
+            self.display_kk = None
+            self.display_levels = {}
 
             self.initial_scan_setup_plotting = False
+        elif self.display_dirty.active:
+            self.update_display_region()
         else:
-            # if self.settings.scan_type.val in ['raster']
+            # scan loop does not report changed pixels: redraw the whole frame
             kk, jj, ii = self.current_scan_index
             self.disp_img = self.display_image_map[kk, :, :].T
             self.img_item.setImage(self.disp_img, autoRange=False, autoLevels=True)
@@ -1169,6 +1277,13 @@ class BaseRaster3DScan(Measurement):
             self.img_item.setRect(self.img_item_rect)
             self.update_LUT()
 
+    def update_display_region(self):
+        """
+        updates only the pixels of the current frame that changed since the last
+        update (see display_dirty) and keeps running min/max display levels
+        """
+        update_display_region(self)
+
     def update_LUT(self):
         """override this function to control display LUT scaling"""
         self.hist_lut.imageChanged(autoLevel=True)
@@ -1255,72 +1370,63 @@ class BaseRaster3DScan(Measurement):
         S["total_time"] = S["frame_time"] * S["Nz"]
 
     #### Scan Generators
-    def gen_raster_scan(self, gen_arrays=True):
-        self.Npixels = self.Nh.val * self.Nv.val * self.Nz.val
-        self.scan_shape = (self.Nz.val, self.Nv.val, self.Nh.val)
+    def _gen_path_scan(self, scan_type, gen_arrays=True):
+        """computes Npixels, scan_shape and, if gen_arrays, the scan arrays
+        of *scan_type* (see scan_paths.SCAN_PATHS)"""
+        Nh, Nv, Nz = self.Nh.val, self.Nv.val, self.Nz.val
+        self.Npixels = scan_path_npixels(scan_type, Nh, Nv, Nz)
+        self.scan_shape = (Nz, Nv, Nh)
 
         if gen_arrays:
-            # print "t0", time.time() - t0
-            self.create_empty_scan_arrays()
-            # print "t1", time.time() - t0
-
-            #             t0 = time.time()
-            #             pixel_i = 0
-            #             for jj in range(self.Nv.val):
-            #                 #print "tjj", jj, time.time() - t0
-            #                 self.scan_slow_move[pixel_i] = True
-            #                 for ii in range(self.Nh.val):
-            #                     self.scan_v_positions[pixel_i] = self.v_array[jj]
-            #                     self.scan_h_positions[pixel_i] = self.h_array[ii]
-            #                     self.scan_index_array[pixel_i,:] = [0, jj, ii]
-            #                     pixel_i += 1
-            #             print "for loop raster gen", time.time() - t0
-
             t0 = time.time()
+            self.create_empty_scan_arrays()
+            index_array, slow_move, start_move = gen_scan_path(scan_type, Nh, Nv, Nz)
+            self.scan_index_array[:] = index_array
+            self.scan_slow_move[:] = slow_move
+            self.scan_start_move[:] = start_move
+            self.scan_h_positions[:] = self.h_array[index_array[:, 2]]
+            self.scan_v_positions[:] = self.v_array[index_array[:, 1]]
+            self.scan_z_positions[:] = self.z_array[index_array[:, 0]]
+            self.log.debug(f"gen_{scan_type}_scan {time.time() - t0:.3f}s")
+
+    def full_scan_chunk(self):
+        """returns the scan arrays computed by compute_scan_arrays as a ScanChunk"""
+        return ScanChunk(
+            start=0,
+            scan_index_array=self.scan_index_array,
+            scan_slow_move=self.scan_slow_move,
+            scan_start_move=self.scan_start_move,
+            scan_h_positions=self.scan_h_positions,
+            scan_v_positions=self.scan_v_positions,
+            scan_z_positions=self.scan_z_positions,
+        )
 
-            V, Z, H = np.meshgrid(self.v_array, self.z_array, self.h_array)
-            self.scan_h_positions[:] = H.flat
-            self.scan_v_positions[:] = V.flat
-            self.scan_z_positions[:] = Z.flat
-            # print(self.scan_h_positions[0:self.Nh.val])
-            # print(self.scan_v_positions[0:self.Nh.val*self.Nv.val])
-            # print(self.scan_z_positions[0:self.Nh.val*self.Nv.val])
-
-            self.scan_slow_move[:: self.Nh.val] = True
-            self.scan_start_move[:: self.Nh.val * self.Nv.val] = True
-
-            JJ, KK, II = np.meshgrid(
-                np.arange(self.Nv.val), np.arange(self.Nz.val), np.arange(self.Nh.val)
+    def iter_scan_chunks(self, chunk_size: int = 1 << 16):
+        """
+        lazy alternative to compute_scan_arrays for very large scans,
+        yields ScanChunk of at most *chunk_size* pixels in scan order.
+        Only available for scan types defined in scan_paths.SCAN_PATHS
+        """
+        self.compute_scan_params()
+        h_array, v_array, z_array = self.h_array, self.v_array, self.z_array
+        for start, index_array, slow_move, start_move in iter_scan_path(
+            self.scan_type.val, self.Nh.val, self.Nv.val, self.Nz.val, chunk_size
+        ):
+            yield ScanChunk(
+                start=start,
+                scan_index_array=index_array,
+                scan_slow_move=slow_move,
+                scan_start_move=start_move,
+                scan_h_positions=h_array[index_array[:, 2]],
+                scan_v_positions=v_array[index_array[:, 1]],
+                scan_z_positions=z_array[index_array[:, 0]],
             )
-            self.scan_index_array[:, 0] = KK.flat
-            self.scan_index_array[:, 1] = JJ.flat
-            self.scan_index_array[:, 2] = II.flat
-            # self.scan_v_positions
-            print("array flatten raster gen", time.time() - t0)
-
-    def gen_serpentine_scan(self, gen_arrays=True):
-        self.Npixels = self.Nh.val * self.Nv.val * self.Nz.val
-        self.scan_shape = (self.Nz.val, self.Nv.val, self.Nh.val)
 
-        if gen_arrays:
-            self.create_empty_scan_arrays()
-            pixel_i = 0
-            for kk in range(self.Nz.val):
-                self.scan_start_move[pixel_i] = True
-                for jj in range(self.Nv.val):
-                    self.scan_slow_move[pixel_i] = True
-
-                    if jj % 2:  # odd lines
-                        h_line_indicies = range(self.Nh.val)[::-1]
-                    else:  # even lines -- traverse in opposite direction
-                        h_line_indicies = range(self.Nh.val)
+    def gen_raster_scan(self, gen_arrays=True):
+        self._gen_path_scan("raster", gen_arrays)
 
-                    for ii in h_line_indicies:
-                        self.scan_z_positions[pixel_i] = self.z_array[kk]
-                        self.scan_v_positions[pixel_i] = self.v_array[jj]
-                        self.scan_h_positions[pixel_i] = self.h_array[ii]
-                        self.scan_index_array[pixel_i, :] = [kk, jj, ii]
-                        pixel_i += 1
+    def gen_serpentine_scan(self, gen_arrays=True):
+        self._gen_path_scan("serpentine", gen_arrays)
 
 
 #
@@ -1389,21 +1495,9 @@ class BaseRaster3DScan(Measurement):
 #                         self.scan_h_positions[pixel_i] = self.h_array[ii]
 #                         self.scan_index_array[pixel_i,:] = [kk, jj, ii]
 #                         pixel_i += 1
-def ijk_zigzag_generator(dims, axis_order=(0, 1, 2)):
+def ijk_zigzag_generator(dims, axis_order=(0, 1, 2), chunk_size=1 << 16):
     """3D zig-zag scan pattern generator with arbitrary fast axis order"""
-
-    ax0, ax1, ax2 = axis_order
-
-    for i_ax0 in range(dims[ax0]):
-        zig_or_zag0 = (1, -1)[i_ax0 % 2]
-        for i_ax1 in range(dims[ax1])[::zig_or_zag0]:
-            zig_or_zag1 = (1, -1)[(i_ax0 + i_ax1) % 2]
-            for i_ax2 in range(dims[ax2])[::zig_or_zag1]:
-
-                ijk = [0, 0, 0]
-                ijk[ax0] = i_ax0
-                ijk[ax1] = i_ax1
-                ijk[ax2] = i_ax2
-
-                yield tuple(ijk)
-    return
+    n = int(np.prod(dims))
+    for start in range(0, n, chunk_size):
+        p = np.arange(start, min(start + chunk_size, n))
+        yield from map(tuple, zigzag_indices(dims, axis_order, p).tolist())
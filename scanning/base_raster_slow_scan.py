@@ -1,22 +1,62 @@
+import itertools
 import time
 import traceback
 
 import numpy as np
 
 from .base_raster_scan import BaseRaster2DScan, BaseRaster3DScan
+from .min_travel_path import min_travel_order, move_times, path_time
+from .scan_paths import SCAN_PATHS, scan_path_moves
 
 
 class BaseRaster2DSlowScan(BaseRaster2DScan):
 
     name = "base_raster_2Dslowscan"
 
+    def setup(self):
+        super().setup()
+        S = self.settings
+        self.scan_type.add_choices("min_travel")
+        for ax, unit in (("h", self.h_unit), ("v", self.v_unit)):
+            S.New(
+                f"{ax}_velocity",
+                initial=1.0,
+                vmin=1e-12,
+                unit=f"{unit}/s",
+                description="stage speed, used to predict travel_time and by scan_type min_travel",
+            )
+            S.New(
+                f"{ax}_settle_time",
+                initial=0.0,
+                vmin=0,
+                unit="s",
+                si=True,
+                description="time the stage needs to settle after a move, used to predict travel_time and by scan_type min_travel",
+            )
+            S.get_lq(f"{ax}_velocity").add_listener(self.compute_times)
+            S.get_lq(f"{ax}_settle_time").add_listener(self.compute_times)
+        S.New(
+            "travel_time",
+            dtype=float,
+            ro=True,
+            si=True,
+            unit="s",
+            description="predicted time per frame spent moving between pixels",
+        )
+        self.scan_type.add_listener(self.compute_times)
+        self._min_travel_cache = (None, None)
+        self.compute_times()
+
     def run(self):
         S = self.settings
 
         # Compute data arrays
         self.compute_scan_arrays()
+        if self.scan_type.val == "min_travel":
+            self.compute_times()  # the path is known now
 
         self.initial_scan_setup_plotting = True
+        self.display_dirty.reset()
 
         # Fill display image with nan
         # this allows for pyqtgraph histogram to ignore unfilled data
@@ -52,6 +92,7 @@ class BaseRaster2DSlowScan(BaseRaster2DScan):
                     self.pixel_time_h5 = H.create_dataset(
                         name="pixel_time", shape=self.scan_shape, dtype=float
                     )
+                    self.open_async_h5_writer()
 
                 self.pre_scan_setup()
 
@@ -82,7 +123,7 @@ class BaseRaster2DSlowScan(BaseRaster2DScan):
                             break
                         self.move_position_slow(h, v, dh, dv)
                         if self.settings["save_h5"]:
-                            self.h5_file.flush()  # flush data to file every slow move
+                            self.h5_writer.flush()  # flush data to file every slow move
                         # self.app.qtapp.ProcessEvents()
                         time.sleep(0.01)
                     else:
@@ -94,8 +135,9 @@ class BaseRaster2DSlowScan(BaseRaster2DScan):
                     pixel_t0 = time.time()
                     self.pixel_time[kk, jj, ii] = pixel_t0
                     if self.settings["save_h5"]:
-                        self.pixel_time_h5[kk, jj, ii] = pixel_t0
+                        self.h5_writer.write(self.pixel_time_h5, (kk, jj, ii), pixel_t0)
                     self.collect_pixel(self.pixel_i, kk, jj, ii)
+                    self.display_dirty.add(kk, jj, ii)
                     self.set_progress(100.0 * self.pixel_i / (self.Npixels))
             except Exception as err:
                 self.last_err = err
@@ -107,7 +149,7 @@ class BaseRaster2DSlowScan(BaseRaster2DScan):
                 if hasattr(self, "h5_file"):
                     print("h5_file", self.h5_file)
                     try:
-                        self.h5_file.close()
+                        self.close_h5_file()
                     except ValueError as err:
                         self.log.warning("failed to close h5_file: {}".format(err))
                 if not self.settings["continuous_scan"]:
@@ -117,6 +159,107 @@ class BaseRaster2DSlowScan(BaseRaster2DScan):
     def new_pt_pos(self, x, y):
         self.move_position_start(x, y)
 
+    def compute_times(self):
+        super().compute_times()
+        S = self.settings
+        if "travel_time" not in S:
+            return  # still in setup
+        S["travel_time"] = self.predict_travel_time()
+        S["total_time"] = (S["frame_time"] + S["travel_time"]) * S["n_frames"]
+
+    def move_costs(self):
+        """(velocities, settle_times) of the h and v axis"""
+        S = self.settings
+        return (
+            (S["h_velocity"], S["v_velocity"]),
+            (S["h_settle_time"], S["v_settle_time"]),
+        )
+
+    def predict_travel_time(self) -> float:
+        """time per frame spent moving between the pixels of the current scan_type
+
+        Regular paths are predicted from their move counts, scan_type
+        min_travel only once its order was computed (see run), else 0.
+        """
+        scan_type = self.scan_type.val
+        if scan_type == "min_travel":
+            cached_key, index_array = self._min_travel_cache
+            if cached_key != self.min_travel_key():
+                return 0.0
+            positions = np.stack(
+                [self.h_array[index_array[:, 2]], self.v_array[index_array[:, 1]]],
+                axis=1,
+            )
+            return path_time(positions, *self.move_costs())
+        if scan_type not in SCAN_PATHS:
+            return 0.0
+        moves = np.array(scan_path_moves(scan_type, self.Nh.val, self.Nv.val))
+        steps = np.array([self.step(self.h_array), self.step(self.v_array)])
+        t = move_times(0.0, moves[:, 1:] * steps, *self.move_costs())
+        return float((moves[:, 0] * t).sum())
+
+    @staticmethod
+    def step(array: np.ndarray) -> float:
+        return abs(array[1] - array[0]) if len(array) > 1 else 0.0
+
+    def scan_mask(self):
+        """Optional override.
+
+        Returns a bool array of shape (Nv, Nh) marking the pixels to visit with
+        scan_type min_travel, e.g. regions of interest of a sparse sample.
+        None (default) visits all pixels.
+        """
+        return None
+
+    def min_travel_key(self):
+        mask = self.scan_mask()
+        h_array, v_array = self.h_array, self.v_array
+        return (
+            self.Nh.val,
+            self.Nv.val,
+            h_array[0],
+            h_array[-1],
+            v_array[0],
+            v_array[-1],
+            self.move_costs(),
+            None if mask is None else hash(np.asarray(mask).tobytes()),
+        )
+
+    def min_travel_index_array(self) -> np.ndarray:
+        """scan_index_array of the pixels of scan_mask in the order of least travel time,
+        computed once per min_travel_key (slow for large scans, called from run)"""
+        key = self.min_travel_key()
+        cached_key, index_array = self._min_travel_cache
+        if key != cached_key:
+            mask = self.scan_mask()
+            if mask is None:
+                jj, ii = np.indices((self.Nv.val, self.Nh.val)).reshape(2, -1)
+            else:
+                jj, ii = np.nonzero(mask)
+            positions = np.stack([self.h_array[ii], self.v_array[jj]], axis=1)
+            order = min_travel_order(positions, *self.move_costs())
+            index_array = np.zeros((len(order), 3), dtype=int)
+            index_array[:, 1] = jj[order]
+            index_array[:, 2] = ii[order]
+            self._min_travel_cache = (key, index_array)
+        return index_array
+
+    def gen_min_travel_scan(self, gen_arrays=True):
+        Nh, Nv = self.Nh.val, self.Nv.val
+        mask = self.scan_mask()
+        self.Npixels = Nh * Nv if mask is None else int(np.count_nonzero(mask))
+        self.scan_shape = (1, Nv, Nh)
+        if gen_arrays:
+            index_array = self.min_travel_index_array()
+            self.create_empty_scan_arrays()
+            self.scan_index_array[:] = index_array
+            # moves that skip pixels are slow moves
+            steps = np.abs(np.diff(index_array[:, 1:], axis=0)).sum(axis=1)
+            self.scan_slow_move[0] = True
+            self.scan_slow_move[1:] = steps > 1
+            self.scan_h_positions[:] = self.h_array[index_array[:, 2]]
+            self.scan_v_positions[:] = self.v_array[index_array[:, 1]]
+
     # Override these methods in subclasses to implement hardware specific movement
     def move_position_start(self, h, v):
         if hasattr(self, "stage"):
@@ -152,11 +295,16 @@ class BaseRaster3DSlowScan(BaseRaster3DScan):
 
     def run(self):
         S = self.settings
+        lazy = S["lazy_scan_arrays"]
 
         # Compute data arrays
-        self.compute_scan_arrays()
+        if lazy:
+            self.compute_scan_params()
+        else:
+            self.compute_scan_arrays()
 
         self.initial_scan_setup_plotting = True
+        self.display_dirty.reset()
 
         self.display_image_map = np.zeros(self.scan_shape, dtype=float)
 
@@ -176,80 +324,114 @@ class BaseRaster3DSlowScan(BaseRaster3DScan):
                     H["range_extent"] = self.range_extent
                     H["corners"] = self.corners
                     H["imshow_extent"] = self.imshow_extent
-                    H["scan_h_positions"] = self.scan_h_positions
-                    H["scan_v_positions"] = self.scan_v_positions
-                    H["scan_z_positions"] = self.scan_z_positions
-                    H["scan_slow_move"] = self.scan_slow_move
-                    H["scan_index_array"] = self.scan_index_array
+                    if lazy:
+                        # filled chunk by chunk during the scan
+                        scan_arrays_h5 = {
+                            name: H.create_dataset(name, shape=shape, dtype=dtype)
+                            for name, shape, dtype in (
+                                ("scan_h_positions", (self.Npixels,), float),
+                                ("scan_v_positions", (self.Npixels,), float),
+                                ("scan_z_positions", (self.Npixels,), float),
+                                ("scan_slow_move", (self.Npixels,), bool),
+                                ("scan_index_array", (self.Npixels, 3), int),
+                            )
+                        }
+                    else:
+                        H["scan_h_positions"] = self.scan_h_positions
+                        H["scan_v_positions"] = self.scan_v_positions
+                        H["scan_z_positions"] = self.scan_z_positions
+                        H["scan_slow_move"] = self.scan_slow_move
+                        H["scan_index_array"] = self.scan_index_array
+
+                if lazy:
+                    chunks = self.iter_scan_chunks()
+                else:
+                    chunks = iter([self.full_scan_chunk()])
+                first_chunk = next(chunks)
 
                 # start scan
                 self.pixel_i = 0
-                self.current_scan_index = self.scan_index_array[0]
+                self.current_scan_index = first_chunk.scan_index_array[0]
 
                 self.pixel_time = np.zeros(self.scan_shape, dtype=float)
                 if self.settings["save_h5"]:
                     self.pixel_time_h5 = H.create_dataset(
                         name="pixel_time", shape=self.scan_shape, dtype=float
                     )
+                    self.open_async_h5_writer()
 
                 self.pre_scan_setup()
 
                 self.move_position_start(
-                    self.scan_h_positions[0],
-                    self.scan_v_positions[0],
-                    self.scan_z_positions[0],
+                    first_chunk.scan_h_positions[0],
+                    first_chunk.scan_v_positions[0],
+                    first_chunk.scan_z_positions[0],
                 )
 
-                for self.pixel_i in range(self.Npixels):
+                h_prev, v_prev = None, None
+                for chunk in itertools.chain([first_chunk], chunks):
                     if self.interrupt_measurement_called:
                         break
 
-                    i = self.pixel_i
-
-                    self.current_scan_index = self.scan_index_array[i]
-                    kk, jj, ii = self.current_scan_index
-
-                    h, v, z = (
-                        self.scan_h_positions[i],
-                        self.scan_v_positions[i],
-                        self.scan_z_positions[i],
-                    )
-
-                    if self.pixel_i == 0:
-                        dh = 0
-                        dv = 0
-                    else:
-                        dh = self.scan_h_positions[i] - self.scan_h_positions[i - 1]
-                        dv = self.scan_v_positions[i] - self.scan_v_positions[i - 1]
+                    if lazy and self.settings["save_h5"]:
+                        sl = slice(chunk.start, chunk.start + len(chunk))
+                        for name, dset in scan_arrays_h5.items():
+                            self.h5_writer.write(dset, sl, getattr(chunk, name))
 
-                    if self.scan_start_move[i]:
-                        if self.interrupt_measurement_called:
-                            break
-                        self.move_position_start(h, v, z)
-                        if self.settings["save_h5"]:
-                            self.h5_file.flush()  # flush data to file every slow move
-                        # self.app.qtapp.ProcessEvents()
-                        time.sleep(0.01)
-                    elif self.scan_slow_move[i]:
+                    for c in range(len(chunk)):
                         if self.interrupt_measurement_called:
                             break
-                        self.move_position_slow(h, v, dh, dv)
-                        if self.settings["save_h5"]:
-                            self.h5_file.flush()  # flush data to file every slow move
-                        # self.app.qtapp.ProcessEvents()
-                        time.sleep(0.01)
-                    else:
-                        self.move_position_fast(h, v, dh, dv)
 
-                    self.pos = (h, v)
-                    # each pixel:
-                    # acquire signal and save to data array
-                    pixel_t0 = time.time()
-                    self.pixel_time[kk, jj, ii] = pixel_t0
-                    if self.settings["save_h5"]:
-                        self.pixel_time_h5[kk, jj, ii] = pixel_t0
-                    self.collect_pixel(self.pixel_i, kk, jj, ii)
-                    self.set_progress(100.0 * self.pixel_i / (self.Npixels))
+                        self.pixel_i = chunk.start + c
+
+                        self.current_scan_index = chunk.scan_index_array[c]
+                        kk, jj, ii = self.current_scan_index
+
+                        h, v, z = (
+                            chunk.scan_h_positions[c],
+                            chunk.scan_v_positions[c],
+                            chunk.scan_z_positions[c],
+                        )
+
+                        if self.pixel_i == 0:
+                            dh = 0
+                            dv = 0
+                        else:
+                            dh = h - h_prev
+                            dv = v - v_prev
+                        h_prev, v_prev = h, v
+
+                        if chunk.scan_start_move[c]:
+                            if self.interrupt_measurement_called:
+                                break
+                            self.move_position_start(h, v, z)
+                            if self.settings["save_h5"]:
+                                self.h5_writer.flush()  # flush data to file every slow move
+                            # self.app.qtapp.ProcessEvents()
+                            time.sleep(0.01)
+                        elif chunk.scan_slow_move[c]:
+                            if self.interrupt_measurement_called:
+                                break
+                            self.move_position_slow(h, v, dh, dv)
+                            if self.settings["save_h5"]:
+                                self.h5_writer.flush()  # flush data to file every slow move
+                            # self.app.qtapp.ProcessEvents()
+                            time.sleep(0.01)
+                        else:
+                            self.move_position_fast(h, v, dh, dv)
+
+                        self.pos = (h, v)
+                        # each pixel:
+                        # acquire signal and save to data array
+                        pixel_t0 = time.time()
+                        self.pixel_time[kk, jj, ii] = pixel_t0
+                        if self.settings["save_h5"]:
+                            self.h5_writer.write(
+                                self.pixel_time_h5, (kk, jj, ii), pixel_t0
+                            )
+                        self.collect_pixel(self.pixel_i, kk, jj, ii)
+                        self.display_dirty.add(kk, jj, ii)
+                        self.set_progress(100.0 * self.pixel_i / (self.Npixels))
             except Exception as err:
                 self.last_err = err
                 self.log.error("Failed to Scan {}".format(repr(err)))
@@ -260,7 +442,7 @@ class BaseRaster3DSlowScan(BaseRaster3DScan):
                 if hasattr(self, "h5_file"):
                     print("h5_file", self.h5_file)
                     try:
-                        self.h5_file.close()
+                        self.close_h5_file()
                     except ValueError as err:
                         self.log.warning("failed to close h5_file: {}".format(err))
                 if not self.settings["continuous_scan"]:
@@ -0,0 +1,162 @@
+"""
+Vectorized scan path generators for raster scans.
+
+A scan path maps pixel numbers (the order in which pixels are visited) to
+scan indices (kk, jj, ii) and flags marking the start of lines (slow moves) and
+frames (start moves). Because pixel numbers are mapped independently, the arrays
+can be computed for the whole scan at once or chunk by chunk (see iter_scan_path)
+without materializing all positions of very large scans.
+"""
+
+from typing import Iterator, Tuple
+
+import numpy as np
+
+ScanPathArrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _stack(kk, jj, ii) -> np.ndarray:
+    scan_index_array = np.empty((len(ii), 3), dtype=int)
+    scan_index_array[:, 0] = kk
+    scan_index_array[:, 1] = jj
+    scan_index_array[:, 2] = ii
+    return scan_index_array
+
+
+def raster_path(p: np.ndarray, Nh: int, Nv: int, Nz: int = 1) -> ScanPathArrays:
+    """kk slowest, ii fastest, every line traversed in the same direction"""
+    kk, jj, ii = np.unravel_index(p, (Nz, Nv, Nh))
+    return _stack(kk, jj, ii), ii == 0, (ii == 0) & (jj == 0)
+
+
+def serpentine_path(p: np.ndarray, Nh: int, Nv: int, Nz: int = 1) -> ScanPathArrays:
+    """as raster_path, but odd lines are traversed in opposite direction"""
+    kk, jj, ii = np.unravel_index(p, (Nz, Nv, Nh))
+    start = ii == 0
+    ii = np.where(jj % 2, Nh - 1 - ii, ii)
+    return _stack(kk, jj, ii), start, start & (jj == 0)
+
+
+def trace_retrace_path(p: np.ndarray, Nh: int, Nv: int, Nz: int = 1) -> ScanPathArrays:
+    """every line is traced (kk=0) and retraced (kk=1)"""
+    jj, kk, ii = np.unravel_index(p, (Nv, 2, Nh))
+    start = (ii == 0) & (kk == 0)
+    ii = np.where(kk, Nh - 1 - ii, ii)
+    return _stack(kk, jj, ii), start, start & (jj == 0)
+
+
+def ortho_raster_path(p: np.ndarray, Nh: int, Nv: int, Nz: int = 1) -> ScanPathArrays:
+    """raster along h (kk=0) followed by raster along v (kk=1)"""
+    kk, q = np.divmod(p, Nv * Nh)
+    jj0, ii0 = np.divmod(q, Nh)
+    ii1, jj1 = np.divmod(q, Nv)
+    jj = np.where(kk, jj1, jj0)
+    ii = np.where(kk, ii1, ii0)
+    start = np.where(kk, jj1 == 0, ii0 == 0)
+    return _stack(kk, jj, ii), start, q == 0
+
+
+def ortho_trace_retrace_path(
+    p: np.ndarray, Nh: int, Nv: int, Nz: int = 1
+) -> ScanPathArrays:
+    """trace_retrace along h (kk=0,1) followed by trace_retrace along v (kk=2,3)"""
+    block, q = np.divmod(p, 2 * Nv * Nh)
+    jj0, kk0, ii0 = np.unravel_index(q, (Nv, 2, Nh))
+    ii1, kk1, jj1 = np.unravel_index(q, (Nh, 2, Nv))
+    ii0 = np.where(kk0, Nh - 1 - ii0, ii0)
+    start = np.where(block, (jj1 == 0) & (kk1 == 0), (ii0 == 0) & (kk0 == 0))
+    jj1 = np.where(kk1, Nv - 1 - jj1, jj1)
+    kk = np.where(block, kk1 + 2, kk0)
+    jj = np.where(block, jj1, jj0)
+    ii = np.where(block, ii1, ii0)
+    return _stack(kk, jj, ii), start, q == 0
+
+
+SCAN_PATHS = {
+    "raster": (raster_path, lambda Nh, Nv, Nz: Nz * Nv * Nh),
+    "serpentine": (serpentine_path, lambda Nh, Nv, Nz: Nz * Nv * Nh),
+    "trace_retrace": (trace_retrace_path, lambda Nh, Nv, Nz: 2 * Nv * Nh),
+    "ortho_raster": (ortho_raster_path, lambda Nh, Nv, Nz: 2 * Nv * Nh),
+    "ortho_trace_retrace": (ortho_trace_retrace_path, lambda Nh, Nv, Nz: 4 * Nv * Nh),
+}
+
+
+def scan_path_moves(scan_type: str, Nh: int, Nv: int) -> Tuple[Tuple[int, int, int]]:
+    """
+    moves between consecutive pixels of a 2D *scan_type* path, without
+    generating it: tuples (count, di, dj) of moves by di pixels along h and
+    dj pixels along v. Used to predict travel times of large scans.
+    """
+    if scan_type == "raster":
+        return ((Nv * (Nh - 1), 1, 0), (Nv - 1, Nh - 1, 1))
+    if scan_type == "serpentine":
+        return ((Nv * (Nh - 1), 1, 0), (Nv - 1, 0, 1))
+    if scan_type == "trace_retrace":
+        return ((2 * Nv * (Nh - 1), 1, 0), (Nv - 1, 0, 1))
+    if scan_type == "ortho_raster":
+        return (
+            (Nv * (Nh - 1), 1, 0),
+            (Nv - 1, Nh - 1, 1),
+            (1, Nh - 1, Nv - 1),
+            (Nh * (Nv - 1), 0, 1),
+            (Nh - 1, 1, Nv - 1),
+        )
+    if scan_type == "ortho_trace_retrace":
+        return (
+            (2 * Nv * (Nh - 1), 1, 0),
+            (Nv - 1, 0, 1),
+            (1, 0, Nv - 1),
+            (2 * Nh * (Nv - 1), 0, 1),
+            (Nh - 1, 1, 0),
+        )
+    raise KeyError(scan_type)
+
+
+def scan_path_npixels(scan_type: str, Nh: int, Nv: int, Nz: int = 1) -> int:
+    return SCAN_PATHS[scan_type][1](Nh, Nv, Nz)
+
+
+def gen_scan_path(
+    scan_type: str, Nh: int, Nv: int, Nz: int = 1, start: int = 0, stop: int = None
+) -> ScanPathArrays:
+    """
+    returns scan_index_array, scan_slow_move and scan_start_move
+    of pixels start to stop (default: all pixels)
+    """
+    path_func, npixels_func = SCAN_PATHS[scan_type]
+    if stop is None:
+        stop = npixels_func(Nh, Nv, Nz)
+    return path_func(np.arange(start, stop), Nh, Nv, Nz)
+
+
+def iter_scan_path(
+    scan_type: str, Nh: int, Nv: int, Nz: int = 1, chunk_size: int = 1 << 16
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    lazy version of gen_scan_path,
+    yields (start, scan_index_array, scan_slow_move, scan_start_move)
+    for consecutive chunks of at most *chunk_size* pixels.
+    """
+    npixels = scan_path_npixels(scan_type, Nh, Nv, Nz)
+    for start in range(0, npixels, chunk_size):
+        stop = min(start + chunk_size, npixels)
+        yield (start,) + gen_scan_path(scan_type, Nh, Nv, Nz, start, stop)
+
+
+def zigzag_indices(dims: Tuple[int], axis_order=(0, 1, 2), p: np.ndarray = None):
+    """
+    3D zig-zag scan pattern with arbitrary fast axis order as an (N, 3) array,
+    see ijk_zigzag_generator. *p* selects pixel numbers (default: all)
+    """
+    ax0, ax1, ax2 = axis_order
+    n0, n1, n2 = dims[ax0], dims[ax1], dims[ax2]
+    if p is None:
+        p = np.arange(n0 * n1 * n2)
+    i0, i1, i2 = np.unravel_index(p, (n0, n1, n2))
+    i1 = np.where(i0 % 2, n1 - 1 - i1, i1)
+    i2 = np.where((i0 + i1) % 2, n2 - 1 - i2, i2)
+    ijk = np.empty((len(p), 3), dtype=int)
+    ijk[:, ax0] = i0
+    ijk[:, ax1] = i1
+    ijk[:, ax2] = i2
+    return ijk
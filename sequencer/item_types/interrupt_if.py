@@ -30,7 +30,7 @@ class InterruptIf(BaseItem):
 
     def visit(self):
         relate = OPERATORS[self.kwargs["operator"]]
-        lq = self.app.get_lq(self.kwargs["setting"])
+        lq = self.app.resolve(self.kwargs["setting"]).lq
         val = lq.coerce_to_type(self.kwargs["value"])
         if relate(lq.val, val):
             self.measure.interrupt()
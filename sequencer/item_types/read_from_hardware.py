@@ -17,7 +17,7 @@ class ReadFromHardWare(BaseItem):
     item_type = ITEM_TYPE
 
     def visit(self):
-        self.app.get_lq(self.kwargs["setting"]).read_from_hardware()
+        self.app.resolve(self.kwargs["setting"]).lq.read_from_hardware()
 
 
 class ReadFromHardWareEditorUI(EditorBaseUI):
@@ -28,7 +28,7 @@ class UpdateSetting(BaseItem):
             if "__" in v:
                 letter = v[v.find("__") + 2]
                 v = self.measure.iter_values[letter]
-        self.app.get_lq(self.kwargs["setting"]).update_value(v)
+        self.app.resolve(self.kwargs["setting"]).write(v)
 
 
 LE_TOOL_TIP = """value used to update. Can be a value, a setting, 
@@ -32,7 +32,7 @@ class WaitUntil(BaseItem):
 
     def visit(self):
         relate = OPERATORS[self.kwargs["operator"]]
-        lq = self.app.get_lq(self.kwargs["setting"])
+        lq = self.app.resolve(self.kwargs["setting"]).lq
         val = lq.coerce_to_type(self.kwargs["value"])
         while True:
             if relate(lq.val, val) or self.measure.interrupt_measurement_called:
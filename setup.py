@@ -45,6 +45,7 @@ setup(
         "ScopeFoundry.sweeping.sweep_2D_docs",
         "ScopeFoundry.sweeping.sweep_3D_docs",
         "ScopeFoundry.sweeping.sweep_4D_docs",
+        "ScopeFoundry.telemetry",
         "ScopeFoundry.tools",
         "ScopeFoundry.tools.features",
         "ScopeFoundry.tools.templates",
@@ -3,6 +3,7 @@ from .sweep_1D import Sweep1D
 from .sweep_2D import Sweep2D
 from .sweep_3D import Sweep3D
 from .sweep_4D import Sweep4D
+from .sweep_ND import SweepND
 from .map_2D import Map2D
 from .any_measurement_collector import AnyMeasurementCollector
 from .any_setting_collector import AnySettingCollector
@@ -40,5 +40,5 @@ class AnySettingCollector(Collector):
         **kwargs,
     ):
         self.repeated_dset_names = (self.setting_lq.val,)
-        new_val = self.app.get_lq(self.setting_lq.val).read_from_hardware()
+        new_val = self.app.resolve(self.setting_lq.val).read()
         self.data = {self.setting_lq.val: new_val}
@@ -23,6 +23,9 @@ class Collector:
     color: Tuple[int] = (255, 0, 0)  # currently not used
     to_sec_multiplier: float = 1.0
     description: str = ""  # description of the collector displayed in the GUI
+    h5_compression: str = None  # None, "gzip", "lzf" or "lz4" (requires hdf5plugin)
+    h5_compression_opts = None  # e.g. gzip level
+    h5_shuffle: bool = False  # byte shuffle filter, improves compression ratio
 
     def __init__(
         self,
@@ -1,24 +1,200 @@
-from typing import Tuple, Dict
+import itertools
+from typing import Dict, Iterable, Tuple
+from warnings import warn
 
+import h5py
 import numpy as np
 
 from ScopeFoundry import Measurement
+from ScopeFoundry.async_h5_writer import AsyncH5Writer, AsyncWorker
 from .collector import Collector
 
+CHUNK_TARGET_BYTES = 1 << 20  # aim for ~1 MiB chunks
+WRITE_BUFFER_MAX_BYTES = 64 << 20  # max size of not yet written chunks per dataset
+MAX_STAGED = 16  # max number of collected but not yet stored results (pipelined)
+
 
 def to_dstname(name: str) -> str:
     return name.replace("/", "__")
 
 
+def axis_order_from_indices(
+    indices: Iterable[Tuple[int]], n_probe: int = 4096
+) -> Tuple[int]:
+    """
+    returns the axes of the scan sorted from slowest to fastest varying,
+    inferred from the first *n_probe* entries of an indices generator
+    (e.g. mk_indices_gen of the sweep modes)
+    """
+    probe = np.array(list(itertools.islice(indices, n_probe)))
+    if probe.ndim != 2:
+        return ()
+    if len(probe) < 2:
+        return tuple(range(probe.shape[1]))
+    n_changes = np.count_nonzero(np.diff(probe, axis=0), axis=0)
+    return tuple(int(i) for i in np.argsort(n_changes, kind="stable"))
+
+
+def plan_chunk_shape(
+    point_shape: Tuple[int],
+    item_shape: Tuple[int],
+    itemsize: int,
+    axis_order: Tuple[int] = None,
+    target_bytes: int = CHUNK_TARGET_BYTES,
+) -> Tuple[int]:
+    """
+    returns a chunk shape for a dataset of shape point_shape + item_shape
+    where one item is written per point.
+
+    Items are kept whole (unless a single item exceeds *target_bytes*) and chunks
+    grow along the point axes in iteration order, fastest first, such that
+    consecutive points of a scan end up in the same chunk.
+
+    *axis_order*: point axes sorted from slowest to fastest varying, defaults to
+    C-order (last axis fastest)
+    """
+    if axis_order is None:
+        axis_order = tuple(range(len(point_shape)))
+    point_shape = tuple(max(1, n) for n in point_shape)
+    item_shape = tuple(max(1, n) for n in item_shape)
+
+    item_chunk = list(item_shape)
+    nbytes = itemsize * int(np.prod(item_chunk))
+    while nbytes > target_bytes and max(item_chunk) > 1:
+        ax = int(np.argmax(item_chunk))
+        item_chunk[ax] = (item_chunk[ax] + 1) // 2
+        nbytes = itemsize * int(np.prod(item_chunk))
+
+    point_chunk = [1] * len(point_shape)
+    for ax in reversed(axis_order):
+        n = int(min(point_shape[ax], max(1, target_bytes // nbytes)))
+        point_chunk[ax] = n
+        nbytes *= n
+        if n < point_shape[ax]:
+            break
+
+    return tuple(point_chunk) + tuple(item_chunk)
+
+
+def h5_filter_kwargs(
+    compression: str = None, compression_opts=None, shuffle: bool = False
+) -> Dict:
+    """
+    returns keyword arguments for h5py create_dataset for the given filters.
+
+    *compression*: None, "gzip", "lzf" or "lz4". lz4 requires hdf5plugin
+    (pip install hdf5plugin), falls back to lzf if unavailable.
+    """
+    kwargs = {}
+    if compression == "lz4":
+        try:
+            import hdf5plugin
+
+            kwargs.update(hdf5plugin.LZ4())
+        except Exception as err:
+            warn(
+                f"lz4 compression unavailable, using lzf instead. pip install hdf5plugin: {err}",
+                RuntimeWarning,
+            )
+            kwargs["compression"] = "lzf"
+    elif compression is not None:
+        kwargs["compression"] = compression
+        if compression_opts is not None:
+            kwargs["compression_opts"] = compression_opts
+    if shuffle:
+        kwargs["shuffle"] = True
+    return kwargs
+
+
+class ChunkWriteBuffer:
+    """
+    write-back buffer for a chunked dataset that is filled one point at a time.
+
+    Points are written to the in-memory *data* array and whole chunks are written to
+    *dset* once all their points are collected. If more than *max_pending_bytes*
+    of chunks are partially filled, the oldest one is written early.
+
+    If *h5_writer* is given, chunks are written on its writer thread.
+    """
+
+    def __init__(
+        self,
+        dset: h5py.Dataset,
+        data: np.ndarray,
+        n_point_dims: int,
+        max_pending_bytes: int = WRITE_BUFFER_MAX_BYTES,
+        h5_writer: AsyncH5Writer = None,
+    ):
+        self.dset = dset
+        self.h5_writer = h5_writer
+        self.data = data
+        self.n_point_dims = n_point_dims
+        chunks = dset.chunks if dset.chunks is not None else dset.shape
+        self.point_chunk = chunks[:n_point_dims]
+        self.chunk_nbytes = int(np.prod(chunks)) * dset.dtype.itemsize
+        self.max_pending_bytes = max_pending_bytes
+        self.counts: Dict[Tuple[int], int] = {}  # chunk key -> points collected
+        self.dirty: Dict[Tuple[int], None] = {}  # ordered by age
+
+    def write(self, indices: Tuple[int], value) -> None:
+        self.data[indices] = value
+        key = tuple(i // c for i, c in zip(indices, self.point_chunk))
+        n = self.counts.get(key, 0) + 1
+        self.dirty[key] = None
+        if n >= self._n_points_in_chunk(key):
+            self.counts.pop(key, None)
+            self.flush_chunk(key)
+            return
+        self.counts[key] = n
+        if len(self.dirty) * self.chunk_nbytes > self.max_pending_bytes:
+            self.flush_chunk(next(iter(self.dirty)))
+
+    def _chunk_slices(self, key: Tuple[int]) -> Tuple[slice]:
+        return tuple(
+            slice(k * c, min((k + 1) * c, n))
+            for k, c, n in zip(key, self.point_chunk, self.dset.shape)
+        )
+
+    def _n_points_in_chunk(self, key: Tuple[int]) -> int:
+        return int(np.prod([s.stop - s.start for s in self._chunk_slices(key)]))
+
+    def flush_chunk(self, key: Tuple[int]) -> None:
+        slices = self._chunk_slices(key)
+        if self.h5_writer is not None:
+            self.h5_writer.write(self.dset, slices, self.data[slices])
+        else:
+            self.dset[slices] = self.data[slices]
+        self.dirty.pop(key, None)
+
+    def flush(self) -> None:
+        for key in list(self.dirty):
+            self.flush_chunk(key)
+
+
 class NDScanData:
 
     def __init__(
         self,
         base_shape: Tuple[int],
         measurement: Measurement,
+        axis_order: Tuple[int] = None,
+        pipelined: bool = False,
+        max_staged: int = MAX_STAGED,
     ):
+        """
+        *axis_order*: axes of base_shape sorted from slowest to fastest varying in the
+        scan, see axis_order_from_indices. Used to align the chunks of the datasets
+        to the scan. Defaults to C-order.
+
+        *pipelined*: incorporate() only takes a snapshot of the collected data and
+        stores it on a storage thread, such that the scan can move on to the next
+        point meanwhile. At most *max_staged* results are waiting to be stored.
+        """
         self.data: Dict[str, np.ndarray] = {}
         self.base_shape = base_shape
+        if axis_order is None:
+            axis_order = tuple(range(len(base_shape)))
+        self.axis_order = tuple(axis_order)
 
         self.measurement = measurement
         self.app = measurement.app
@@ -27,10 +203,20 @@ class NDScanData:
         self.read_positions = []
         self.indices = []
 
+        self._settings_data: Dict[str, np.ndarray] = {}
+        self.write_buffers: Dict[str, ChunkWriteBuffer] = {}
+
         self.h5_meas_group = measurement.open_new_h5_file()
         self.h5_file = measurement.h5_file
+        self.h5_writer = measurement.open_async_h5_writer()
         self.metadata = measurement.dataset_metadata
 
+        self.staging = None
+        if pipelined:
+            # not the h5_writer: _store queues writes to it, a full queue would
+            # block its own thread
+            self.staging = AsyncWorker(max_staged, f"{measurement.name}_staging")
+
     def add_position(self, positions: Tuple[float]):
         self.positions.append(positions)
 
@@ -40,8 +226,30 @@ class NDScanData:
     def add_indices(self, indices: Tuple[int]):
         self.indices.append(indices)
 
+    def _create_buffered_dataset(
+        self, global_name: str, data: np.ndarray, filter_kwargs: Dict
+    ) -> None:
+        n_point_dims = len(self.base_shape) + 1
+        chunks = plan_chunk_shape(
+            point_shape=data.shape[:n_point_dims],
+            item_shape=data.shape[n_point_dims:],
+            itemsize=data.dtype.itemsize,
+            axis_order=self.axis_order + (len(self.base_shape),),
+        )
+        dset = self.h5_meas_group.create_dataset(
+            global_name, data.shape, dtype=data.dtype, chunks=chunks, **filter_kwargs
+        )
+        self.write_buffers[global_name] = ChunkWriteBuffer(
+            dset, data, n_point_dims, h5_writer=self.h5_writer
+        )
+
     def init_dsets(self, collector: Collector):
         collector.repeats = []
+        filter_kwargs = h5_filter_kwargs(
+            collector.h5_compression,
+            collector.h5_compression_opts,
+            collector.h5_shuffle,
+        )
         for name, d in collector.data.items():
             if not hasattr(d, "dtype"):
                 try:
@@ -56,7 +264,9 @@ class NDScanData:
                 shape = self.base_shape + (collector.reps,) + d.shape
                 self.data[global_name] = np.zeros(shape, dtype=d.dtype)
                 collector.repeats.append((name, global_name))
-                self.h5_meas_group.create_dataset(global_name, shape, dtype=d.dtype)
+                self._create_buffered_dataset(
+                    global_name, self.data[global_name], filter_kwargs
+                )
                 print("init", global_name, shape, d.dtype)
             else:
                 global_name = to_dstname(f"{collector.name}_{name}")
@@ -64,19 +274,42 @@ class NDScanData:
                 self.h5_meas_group.create_dataset(global_name, data=d)
 
         for lq_path in collector.settings_to_collect:
-            self.h5_meas_group.create_dataset(to_dstname(lq_path), shape)
+            global_name = to_dstname(lq_path)
+            shape = self.base_shape + (collector.reps,)
+            self._settings_data[global_name] = np.zeros(shape, dtype="f")
+            self._create_buffered_dataset(
+                global_name, self._settings_data[global_name], filter_kwargs
+            )
 
     def incorporate(self, collector: Collector, *indices):
         """collects data from collectors and writes it to the h5 file"""
 
-        for name, global_name in collector.repeats:
-            self.data[global_name][indices] = collector.data[name]
-            self.h5_meas_group[global_name][indices] = collector.data[name]
+        values = [
+            (global_name, collector.data[name])
+            for name, global_name in collector.repeats
+        ]
         for lq_path in collector.settings_to_collect:
-            val = self.app.get_lq(lq_path).read_from_hardware()
-            self.h5_meas_group[to_dstname(lq_path)][indices] = val
+            val = self.app.resolve(lq_path).read()
+            values.append((to_dstname(lq_path), val))
+
+        if self.staging is None:
+            self._store(indices, values)
+        else:
+            # collectors may reuse their arrays on the next run
+            values = [(name, np.array(val, copy=True)) for name, val in values]
+            self.staging.call(self._store, indices, values)
+
+    def _store(self, indices: Tuple[int], values: Iterable[Tuple[str, object]]):
+        for global_name, val in values:
+            self.write_buffers[global_name].write(indices, val)
+
+    def wait_for_staged(self):
+        """blocks until all staged results are stored (pipelined only)"""
+        if self.staging is not None:
+            self.staging.join()
 
     def average_repeats(self, collector: Collector):
+        self.wait_for_staged()
         for name, d in collector.data.items():
             if name in collector.repeated_dset_names:
                 avg_name = to_dstname(f"{collector.name}_{name}")
@@ -85,16 +318,24 @@ class NDScanData:
                 self.h5_meas_group.create_dataset(avg_name, data=d)
                 print("saved", avg_name, d.shape, d.dtype)
 
+    def flush_write_buffers(self):
+        for write_buffer in self.write_buffers.values():
+            write_buffer.flush()
+
     def flush_h5(self):
-        self.h5_file.flush()
+        self.wait_for_staged()
+        self.flush_write_buffers()
+        self.h5_writer.flush()
 
     def create_dataset(self, name, shape=None, dtype=None, data=None, **kwds):
         self.h5_meas_group.create_dataset(name, shape, dtype, data, **kwds)
 
 
     def close_h5(self):
+        if self.staging is not None:
+            self.staging.close()
+        self.flush_write_buffers()
         self.h5_meas_group.create_dataset("positions", data=self.positions)
         self.h5_meas_group.create_dataset("read_positions", data=self.read_positions)
         self.h5_meas_group.create_dataset("indices", data=self.indices)
-        self.h5_file.flush()
-        self.h5_file.close()
+        self.measurement.close_h5_file()
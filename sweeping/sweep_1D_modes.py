@@ -1,25 +1,28 @@
-SCAN_MODES = ("NA",)
-SCAN_MODES_DESCRIPTION = """
--
 """
+scan modes of Sweep1D, implemented by the path strategies in sweep_paths.
+"""
+
+from .sweep_paths import get_sweep_path, sweep_paths_description
+
+SCAN_MODES = ("NA",)
+SCAN_MODES_DESCRIPTION = sweep_paths_description(SCAN_MODES)
 
 
 def mk_positions_gen(ar_1, mode="NA"):
-    if mode == "NA":
-        for k, kv in enumerate(ar_1):
-            yield (kv,)
+    positions, _ = get_sweep_path(mode).path(ar_1)
+    return (tuple(p) for p in positions)
 
 
 def mk_data_shape(ar_1, mode="NA"):
-    if mode == "NA":
-        return (len(ar_1),)
+    return get_sweep_path(mode).data_shape(ar_1)
 
 
 def mk_indices_gen(ar_1, mode="NA"):
-    if mode == "NA":
-        for k, v in enumerate(ar_1):
-            yield k,
+    _, indices = get_sweep_path(mode).path(ar_1)
+    return (tuple(ii) for ii in indices.tolist())
 
 
-def mk_ranges_consistent(settings, actuator_names=("1", "2", "3")):
-    return
+def mk_ranges_consistent(settings, actuator_names=("1",)):
+    get_sweep_path(settings["scan_mode"]).make_ranges_consistent(
+        settings, actuator_names
+    )
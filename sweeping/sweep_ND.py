@@ -0,0 +1,493 @@
+import time
+from copy import copy
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+import pyqtgraph as pg
+from qtpy import QtWidgets
+
+from ScopeFoundry import BaseMicroscopeApp, Measurement
+from ScopeFoundry.scanning.actuators import (
+    ActuatorDefinitions,
+    add_all_possible_actuators_and_parse_definitions,
+    get_actuator_funcs,
+)
+
+from ..scanning.min_travel_path import path_time
+from .any_measurement_collector import AnyMeasurementCollector
+from .any_setting_collector import AnySettingCollector
+from .collector import Collector
+from .collector_ui_list import InteractiveCollectorList
+from .nd_scan_data import NDScanData, axis_order_from_indices
+from .sweep_paths import get_sweep_path, sweep_path_names, sweep_paths_description
+from .utils import filtered_lq_paths, mk_new_dir
+
+
+class SweepND(Measurement):
+    """
+    sweeps any number of actuators and runs the collectors at each position.
+
+    The order of the positions is defined by the path strategies registered in
+    sweep_paths, see the scan_mode setting.
+    """
+
+    name = "sweep_nd"
+
+    def run(self):
+        s = self.settings
+
+        s.get_lq("plot_option").change_choice_list([])
+        self.display_ready = False
+
+        sweep_path = get_sweep_path(s["scan_mode"])
+        sweep_path.make_ranges_consistent(s, self.actuator_names)
+
+        collectors = self.collector_list_widget.get_collectors()
+        if not collectors:
+            self.set_status("set a collector repetitions to non-zero", "r")
+            print("set a collector repetitions to non-zero")
+            return
+
+        actuators = self.current_actuator_funcs
+
+        if not actuators:
+            self.set_status("no actuators selected", "r")
+            print("no actuators selected")
+            return
+
+        if "any_measurement" in (col.name for col in collectors):
+            self.pre_res_in_new_dir = s["res_in_new_dir"]
+            s["res_in_new_dir"] = True
+
+        if s["res_in_new_dir"]:
+            self.root = self.app.settings["save_dir"]
+            self.app.settings["save_dir"] = mk_new_dir(self.root, self.name)
+
+        arrays = tuple([r.sweep_array for r in self.scan_ranges])
+        velocities = [s[f"velocity_{name}"] for name in self.actuator_names]
+        settle_times = [s[f"settle_time_{name}"] for name in self.actuator_names]
+        path_positions, path_indices = sweep_path.path(
+            *arrays, velocities=velocities, settle_times=settle_times
+        )
+        s["predicted_time"] = (
+            path_time(path_positions, velocities, settle_times)
+            + len(path_positions) * s["collection_delay"]
+        )
+
+        self.scan_data = scan_data = NDScanData(
+            base_shape=sweep_path.data_shape(*arrays),
+            measurement=self,
+            axis_order=axis_order_from_indices(path_indices),
+            pipelined=s["pipelined"],
+        )
+
+        for array, name in zip(arrays, self.actuator_names):
+            self.scan_data.create_dataset(f"range_{name}", data=array)
+
+        N = len(path_positions)
+        self.index = 0
+
+        for positions, base_indices in zip(
+            path_positions.tolist(), path_indices.tolist()
+        ):
+            positions = tuple(positions)
+            base_indices = tuple(base_indices)
+
+            # set positions and wait
+            pretty_pos = ", ".join([f"{p:.1f}" for p in positions])
+            self.set_status(f"setting {pretty_pos} and wait ", "g")
+            for (_, write), position in zip(actuators, positions):
+                write(position)
+            time.sleep(s["collection_delay"])
+            read_positions = tuple([read() for read, _ in actuators])
+
+            self.prepare_at_position(positions, base_indices)
+
+            for collector in collectors:
+                self.set_status(f"collecting {collector.name} on {pretty_pos}", "g")
+                self.prepare_collector_at_position(collector, positions, base_indices)
+                for r in range(collector.reps):
+                    collector.run(self.index, self)
+
+                    # collect data
+                    if self.index == 0 and r == 0:
+                        scan_data.init_dsets(collector)
+                        s.get_lq("plot_option").add_choices(list(scan_data.data.keys()))
+                        self.display_ready = True
+
+                    scan_data.incorporate(collector, *base_indices, r)
+                self.release_collector(collector, positions, base_indices)
+
+            scan_data.add_position(positions)
+            scan_data.add_read_positions(read_positions)
+            scan_data.add_indices(base_indices)
+            # manager.flush_h5()
+
+            self.index += 1
+            self.set_progress(100 * (self.index + 1) / N)
+
+            if self.interrupt_measurement_called:
+                break
+
+        self.post_scan()
+
+        for collector in collectors:
+            scan_data.average_repeats(collector)
+        scan_data.close_h5()
+
+        if s["res_in_new_dir"]:
+            s["res_in_new_dir"] = self.pre_res_in_new_dir
+            self.app.settings["save_dir"] = self.root
+
+        self.set_status(f"{self.name} finished", "g")
+        print("finished - data collected:")
+        for k, v in scan_data.data.items():
+            print(k, np.array(v).shape)
+
+    def prepare_at_position(
+        self, positions: Tuple[float], base_indices: Tuple[int]
+    ) -> None:
+        """Optional override.
+
+        Intended for setting up detectors.
+        Gets called after position is set, But before data collection.
+
+        - positions: tuple of positions
+        - base_indices: tuple of indices of the current position in the scan data
+
+        Note, that data handling is defined in respective collectors and not here.
+        """
+        pass
+
+    def prepare_collector_at_position(
+        self, collector: Collector, positions: Tuple[float], base_indices: Tuple[int]
+    ) -> None:
+        """Optional override.
+
+        Intended for setting up a specific collector.
+        This method is called for each collector before data collection.
+
+        Note that the default behavior is to call the collector's prepare method.
+
+        Arguments:
+        - positions: tuple of positions
+        - base_indices: tuple of indices of the current position in the scan data
+
+        Note, that data handling is defined in respective collectors and not here.
+        """
+        collector.prepare(self, positions)
+
+    def release_collector(
+        self, collector: Collector, positions: Tuple[float], base_indices: Tuple[int]
+    ) -> None:
+        """Optional override.
+        Intended to 'undo' the prepare_collector_at_position method if needed.
+        """
+        collector.release(self, positions)
+
+    def post_scan(self):
+        """Optional override.
+        Gets called after data collection is finished - before file is closed.
+        """
+        pass
+
+    def __init__(
+        self,
+        app: BaseMicroscopeApp,
+        name: Union[str, None] = None,
+        collectors: Sequence[Collector] = (),
+        actuators: Sequence[ActuatorDefinitions] = (),
+        actuator_names: Sequence[str] = "123",
+        range_n_intervals: Sequence[int] = None,
+        n_read_any_settings: int = 2,
+        n_any_measurements: int = 2,
+        scan_modes: Sequence[str] = None,
+    ):
+        """
+        *actuator_names*: one character per actuator, the length defines the
+                          number of actuators
+        *range_n_intervals*: number of intervals of the range of each actuator,
+                             defaults to 1 for all
+        *scan_modes*: names of the paths in sweep_paths to choose from, defaults
+                      to all that support len(actuator_names) actuators
+        """
+        self.collectors = [copy(x) for x in collectors]
+        self.user_defined_actuators = list(actuators)
+        self.actuator_names = actuator_names
+        self.ndim = len(actuator_names)
+        if range_n_intervals is None:
+            range_n_intervals = (1,) * self.ndim
+        self.range_n_intervals = range_n_intervals
+        if scan_modes is None:
+            scan_modes = sweep_path_names(self.ndim)
+        self.scan_modes = tuple(scan_modes)
+        self.n_read_any_settings = n_read_any_settings
+        self.n_any_measurements = n_any_measurements
+        super().__init__(app, name)
+
+    def setup(self):
+        s = self.settings
+        s.New(
+            name="scan_mode",
+            dtype=str,
+            initial=self.scan_modes[0],
+            choices=self.scan_modes,
+            description=sweep_paths_description(self.scan_modes),
+        )
+        s.New(
+            name="collection_delay",
+            initial=0.01,
+            unit="s",
+            description="after setting the wheel position, data collection is delayed allowing system to reach steady state",
+        )
+        s.New(
+            name="pipelined",
+            dtype=bool,
+            initial=False,
+            description="stores the data of a position while moving to the next one",
+        )
+        s.New(
+            name="predicted_time",
+            initial=0.0,
+            ro=True,
+            si=True,
+            unit="s",
+            description="predicted time spent moving and waiting for collection_delay, updated on run",
+        )
+
+        s.New(
+            name="res_in_new_dir",
+            dtype=bool,
+            initial=False,
+            description="dumps data in a new sub folder. Intended for <i>any_measurement</i> where a file is stored per acquisition",
+        )
+        s.New(
+            name="plot_option",
+            dtype=str,
+            initial="powers",
+            choices=("",),
+            description="plot option",
+        )
+
+        for i in range(self.n_any_measurements):
+            self.collectors.append(
+                AnyMeasurementCollector(self, name=f"any_measurement_{i}")
+            )
+
+        for i in range(self.n_read_any_settings):
+            self.collectors.append(AnySettingCollector(self, name=f"any_setting_{i}"))
+
+        for collector in self.collectors:
+            collector.setup_reps_lq(s)
+
+        self.scan_ranges = []
+        for name, n in zip(self.actuator_names, self.range_n_intervals):
+            s.New(f"actuator_{name}", dtype=str, choices=["none"])
+            s.New(
+                f"velocity_{name}",
+                initial=1.0,
+                vmin=1e-12,
+                description="speed of the actuator in position units per second, used by the min_travel scan_mode and predicted_time",
+            )
+            s.New(
+                f"settle_time_{name}",
+                initial=0.0,
+                vmin=0,
+                unit="s",
+                description="time the actuator needs to settle after a move, used by the min_travel scan_mode and predicted_time",
+            )
+            if n == 1:
+                self.scan_ranges.append(
+                    s.New_Range(f"range_{name}", True, False, initials=(1, 2, 11))
+                )
+            else:
+                self.scan_ranges.append(
+                    s.new_intervaled_range(f"range_{name}", n, False, True)
+                )
+
+        self.add_operation(
+            "update widgets",
+            self.update_widgets,
+            description="click after connecting to a hardware to extend actuator options",
+            icon_path=self.app.qtapp.style().standardIcon(
+                QtWidgets.QStyle.SP_BrowserReload
+            ),
+        )
+
+    def update_widgets(self):
+
+        s = self.settings
+
+        for i in range(self.n_read_any_settings):
+            s.get_lq(f"any_setting_{i}").change_choice_list(filtered_lq_paths(self.app))
+
+        self.actuator_defs = add_all_possible_actuators_and_parse_definitions(
+            actuator_definitions=self.user_defined_actuators, app=self.app
+        )
+        self.actuators_funcs = get_actuator_funcs(self.app, self.actuator_defs)
+
+        for i in self.actuator_names:
+            s.get_lq(f"actuator_{i}").change_choice_list(self.actuators_funcs.keys())
+
+    @property
+    def current_actuators_defs(self):
+        """Returns a list of currently selected actuator definitions."""
+        s = self.settings
+        return [self.actuator_defs[s[f"actuator_{i}"]] for i in self.actuator_names]
+
+    @property
+    def current_actuator_funcs(self):
+        s = self.settings
+        return [self.actuators_funcs[s[f"actuator_{i}"]] for i in self.actuator_names]
+
+    @property
+    def current_positions_lqs(self):
+        return (self.app.resolve(paths[1]).lq for paths in self.current_actuators_defs)
+
+    @property
+    def current_target_position_funcs(self):
+        return (a[-1] for a in self.current_actuator_funcs)
+
+    def setup_figure(self):
+
+        s = self.settings
+
+        h_widget = QtWidgets.QWidget()
+        h_widget.setSizePolicy(
+            QtWidgets.QSizePolicy.Policy.Preferred, QtWidgets.QSizePolicy.Policy.Fixed
+        )
+        h_layout = QtWidgets.QHBoxLayout(h_widget)
+        h_layout.addWidget(self.mk_run_widget())
+        h_layout.addWidget(self.mk_scan_settings_widget())
+        h_layout.addWidget(self.mk_collect_widget())
+
+        self.ui = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(self.ui)
+        layout.addWidget(h_widget)
+        layout.addWidget(s.get_lq("plot_option").new_default_widget())
+        layout.addWidget(self.mk_graph_widget())
+
+        self.display_ready = False
+        self.set_status("starting power scan", "y")
+        s.get_lq("plot_option").add_listener(self.update_display)
+        for i in range(self.n_any_measurements):
+            s.get_lq(f"any_measurement_{i}").change_choice_list(
+                self.app.measurements.keys()
+            )
+        for i in range(self.n_read_any_settings):
+            s.get_lq(f"any_setting_{i}").change_choice_list(
+                self.app.get_setting_paths(True)
+            )
+        self.set_status("welc\u1e4fme", (253, 188, 24), True)
+
+        self.update_widgets()
+
+    def update_display(self):
+
+        self.update_status_display()
+
+        if not self.display_ready or not self.settings["plot_option"]:
+            return
+
+        dset = np.array(self.scan_data.data[self.settings["plot_option"]]).mean(
+            axis=self.ndim
+        )
+        dlen = np.prod(dset.shape[self.ndim :])  # len of data
+
+        ddim = len(dset.shape[self.ndim :])
+
+        curr = self.index * dlen
+
+        if ddim >= 1:
+            f = max(1, 100_000 // dlen)
+
+            if self.index > f:
+                self.line.setData(
+                    # np.arange(curr - f * plen, curr) / plen,
+                    dset.ravel()[curr - f * dlen : curr],
+                )
+            else:
+                self.line.setData(
+                    # np.arange(curr) / plen,
+                    dset.ravel()[:curr]
+                )
+        else:
+            self.line.setData(np.squeeze(dset))
+        #
+        # elif ddim in (2, 3):
+        #     self.img_item.setVisible(True)
+        #     images = dset.reshape((-1,)+ dset.shape[4:])
+        #     self.img_item.setImage(images[curr], autoLevels=True)
+
+    def set_status(self, msg, color="w", force_report=False):
+        self.status = {
+            "title": msg,
+            "color": color,
+        }
+        if force_report:
+            self.update_status_display()
+
+    def update_status_display(self):
+        self.axes.setTitle(**self.status)
+
+    def mk_run_widget(self):
+        run_widget = QtWidgets.QGroupBox("run")
+        vlayout = QtWidgets.QVBoxLayout(run_widget)
+        vlayout.addWidget(self.new_start_stop_button())
+        include = (
+            # "plot_option",
+            "collection_delay",
+            "pipelined",
+            "res_in_new_dir",
+            "predicted_time",
+        )
+        if len(self.scan_modes) > 1:
+            include += ("scan_mode",)
+        vlayout.addWidget(self.settings.New_UI(include))
+        vlayout.addWidget(self.operations.new_button("update widgets"))
+        run_widget.setFlat(False)
+        return run_widget
+
+    def mk_scan_settings_widget(self):
+        h_layout = QtWidgets.QHBoxLayout()
+        for i in self.actuator_names:
+            r = self.settings.ranges[f"range_{i}"]
+            w1 = r.New_UI()
+            w1.layout().insertRow(
+                0, self.settings.get_lq(f"actuator_{i}").new_default_widget()
+            )
+            for lq_name in ("velocity", "settle_time"):
+                lq = self.settings.get_lq(f"{lq_name}_{i}")
+                w1.layout().addRow(lq_name, lq.new_default_widget())
+            w1.layout().setSpacing(1)
+            h_layout.addWidget(w1)
+
+        widget = QtWidgets.QGroupBox("scan settings")
+        widget.setLayout(h_layout)
+        widget.setFlat(False)
+        return widget
+
+    def mk_collect_widget(self):
+
+        collect_widget = QtWidgets.QGroupBox(
+            title="choose the number of repetion for each detectors - drag and drop to change order"
+        )
+        layout = QtWidgets.QVBoxLayout(collect_widget)
+
+        self.collector_list_widget = InteractiveCollectorList()
+        for collector in self.collectors:
+            self.collector_list_widget.add_item(collector)
+
+        layout.addWidget(self.collector_list_widget)
+        return collect_widget
+
+    def mk_graph_widget(self):
+        graph_widget = pg.GraphicsLayoutWidget()
+        self.axes = graph_widget.addPlot(title=self.name)
+        self.axes.setLogMode(False, False)
+        self.axes.showGrid(True, True)
+        self.line = self.axes.plot()
+        # self.img_item = pg.ImageItem()
+        # self.img_item.setVisible(False)
+        # self.axes.addItem(self.img_item)
+        return graph_widget
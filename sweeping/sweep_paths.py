@@ -0,0 +1,258 @@
+"""
+Path strategies of the sweeps: the order in which the positions spanned by the
+sweep arrays of the actuators are visited.
+
+A strategy is registered by name with register_sweep_path and computes the whole
+path at once as numpy arrays, see SweepPath.path.
+"""
+
+from typing import Callable, Dict, Sequence, Tuple, Union
+
+import numpy as np
+
+from ScopeFoundry.scanning.min_travel_path import PerAxis, min_travel_order
+
+Groups = Sequence[Sequence[int]]
+
+
+class SweepPath:
+    """
+    base class of path strategies.
+
+    Override data_shape and path, optionally supports and
+    make_ranges_consistent.
+    """
+
+    description: str = ""
+
+    def supports(self, ndim: int) -> bool:
+        return True
+
+    def data_shape(self, *arrays: np.ndarray) -> Tuple[int]:
+        """shape of the scan data, one entry per actuator"""
+        raise NotImplementedError
+
+    def path(
+        self,
+        *arrays: np.ndarray,
+        velocities: PerAxis = None,
+        settle_times: PerAxis = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        returns *positions* of shape (N, ndim) in the order they are visited and
+        the corresponding *indices* (N, ndim) into an array of data_shape.
+
+        *velocities*, *settle_times*: of each actuator, for strategies that
+        optimize the travel time, see scanning.min_travel_path.move_times
+        """
+        raise NotImplementedError
+
+    def make_ranges_consistent(self, settings, actuator_names: Sequence[str]) -> None:
+        """adjusts the range settings of the sweep before the path is computed"""
+        pass
+
+
+class GroupedSweepPath(SweepPath):
+    """
+    nested loops over groups of actuators, the first group is the slowest.
+
+    The actuators of a group co-move: the i-th step of a group sets each of its
+    actuators to the i-th value of its array. The last actuator of a group
+    defines the number of steps and carries the index in the scan data, the others
+    get an axis of length 1.
+
+    *groups*: actuator indices of each group or a function returning them for a
+              number of actuators.
+    *serpentine*: inner groups reverse their direction after each pass, such
+                  that consecutive positions differ in one group only.
+    """
+
+    def __init__(
+        self,
+        groups: Union[Groups, Callable[[int], Groups]],
+        serpentine: bool = False,
+        description: str = "",
+        min_ndim: int = 1,
+    ):
+        self.groups = groups
+        self.serpentine = serpentine
+        self.description = description
+        self.min_ndim = min_ndim
+
+    def get_groups(self, ndim: int) -> Tuple[Tuple[int]]:
+        groups = self.groups(ndim) if callable(self.groups) else self.groups
+        return tuple(tuple(g) for g in groups)
+
+    def supports(self, ndim: int) -> bool:
+        if ndim < self.min_ndim:
+            return False
+        axes = sorted(ax for g in self.get_groups(ndim) for ax in g)
+        return axes == list(range(ndim))
+
+    def data_shape(self, *arrays: np.ndarray) -> Tuple[int]:
+        shape = [1] * len(arrays)
+        for g in self.get_groups(len(arrays)):
+            shape[g[-1]] = len(arrays[g[-1]])
+        return tuple(shape)
+
+    def path(
+        self,
+        *arrays: np.ndarray,
+        velocities: PerAxis = None,
+        settle_times: PerAxis = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        groups = self.get_groups(len(arrays))
+        sizes = [len(arrays[g[-1]]) for g in groups]
+        steps = np.indices(sizes).reshape(len(groups), -1)
+        if self.serpentine:
+            # number of passes of group i so far is the flat index of the outer groups
+            n_passes = steps.copy()
+            for i in range(1, len(groups)):
+                reverse = np.ravel_multi_index(n_passes[:i], sizes[:i]) % 2 == 1
+                steps[i, reverse] = sizes[i] - 1 - steps[i, reverse]
+
+        N = steps.shape[1]
+        positions = np.empty((N, len(arrays)))
+        indices = np.zeros((N, len(arrays)), dtype=int)
+        for g, group_steps in zip(groups, steps):
+            indices[:, g[-1]] = group_steps
+            for ax in g:
+                positions[:, ax] = np.asarray(arrays[ax])[group_steps]
+        return positions, indices
+
+    def make_ranges_consistent(self, settings, actuator_names: Sequence[str]) -> None:
+        for g in self.get_groups(len(actuator_names)):
+            lead = f"range_{actuator_names[g[-1]]}_num"
+            for ax in g[:-1]:
+                settings[f"range_{actuator_names[ax]}_num"] = settings[lead]
+
+
+class MinTravelSweepPath(SweepPath):
+    """
+    visits all combinations (as nested) in the order of least predicted travel
+    time given the velocities and settle times of the actuators.
+    """
+
+    description = "all combinations in the order of least travel time, see velocity and settle_time"
+
+    def __init__(self, time_limit: float = 5.0):
+        self.time_limit = time_limit
+
+    def supports(self, ndim: int) -> bool:
+        return ndim >= 2
+
+    def data_shape(self, *arrays: np.ndarray) -> Tuple[int]:
+        return tuple(len(a) for a in arrays)
+
+    def path(
+        self,
+        *arrays: np.ndarray,
+        velocities: PerAxis = None,
+        settle_times: PerAxis = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        positions, indices = SWEEP_PATHS["nested"].path(*arrays)
+        order = min_travel_order(
+            positions,
+            1.0 if velocities is None else velocities,
+            settle_times,
+            time_limit=self.time_limit,
+        )
+        return positions[order], indices[order]
+
+
+SWEEP_PATHS: Dict[str, SweepPath] = {}
+
+
+def register_sweep_path(name: str, sweep_path: SweepPath) -> SweepPath:
+    SWEEP_PATHS[name] = sweep_path
+    return sweep_path
+
+
+def get_sweep_path(name: str) -> SweepPath:
+    return SWEEP_PATHS[name]
+
+
+def sweep_path_names(ndim: int) -> Tuple[str]:
+    """names of the registered paths that support *ndim* actuators"""
+    return tuple(k for k, v in SWEEP_PATHS.items() if v.supports(ndim))
+
+
+def sweep_paths_description(names: Sequence[str]) -> str:
+    return "\n".join(
+        f"<p><i>{name}:</i> {SWEEP_PATHS[name].description}" for name in names
+    )
+
+
+def each_axis(ndim: int) -> Groups:
+    return [(i,) for i in range(ndim)]
+
+
+def each_axis_swapped(ndim: int) -> Groups:
+    return [(i,) for i in reversed(range(ndim))]
+
+
+def all_axes(ndim: int) -> Groups:
+    return [tuple(range(ndim))]
+
+
+register_sweep_path("NA", GroupedSweepPath([(0,)], description="-"))
+register_sweep_path(
+    "co-move",
+    GroupedSweepPath(all_axes, min_ndim=2, description="all actuators co-move"),
+)
+register_sweep_path(
+    "nested",
+    GroupedSweepPath(
+        each_axis,
+        min_ndim=2,
+        description="actuators move all combinations where 1st is slowest ...",
+    ),
+)
+register_sweep_path(
+    "nested_swap_order",
+    GroupedSweepPath(
+        each_axis_swapped,
+        min_ndim=2,
+        description="same as nested, but the order of the actuators is swapped: last is slowest",
+    ),
+)
+register_sweep_path(
+    "serpentine",
+    GroupedSweepPath(
+        each_axis,
+        serpentine=True,
+        min_ndim=2,
+        description="snake: same as nested, but faster actuators reverse direction after every pass",
+    ),
+)
+register_sweep_path(
+    "serpentine_swap_order",
+    GroupedSweepPath(
+        each_axis_swapped,
+        serpentine=True,
+        min_ndim=2,
+        description="same as serpentine, but the order of the actuators is swapped: last is slowest",
+    ),
+)
+register_sweep_path(
+    "2,3_co-move",
+    GroupedSweepPath(
+        [(0,), (1, 2)],
+        description="2nd and 3rd move simultaneously, 1st moves individually",
+    ),
+)
+register_sweep_path(
+    "1,2_co-move",
+    GroupedSweepPath(
+        [(0, 1), (2,)],
+        description="1st and 2nd move simultaneously, 3rd moves individually",
+    ),
+)
+register_sweep_path(
+    "1,2_nested_3,4_co-move",
+    GroupedSweepPath(
+        [(0,), (1,), (2, 3)],
+        description="1st and 2nd move all combinations, 3rd and 4th move simultaneously",
+    ),
+)
+register_sweep_path("min_travel", MinTravelSweepPath())
@@ -0,0 +1 @@
+from .telemetry_logger import TelemetryLogger
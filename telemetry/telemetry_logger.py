@@ -0,0 +1,356 @@
+"""
+Logs settings, typically hardware readouts, at fixed rates to one HDF5 file per
+day, independent of other measurements.
+"""
+
+import heapq
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import h5py
+import numpy as np
+import pyqtgraph as pg
+from qtpy import QtWidgets
+
+from ScopeFoundry import Measurement
+from ScopeFoundry.logged_quantity import LoggedQuantity, LQHistory
+
+FLUSH_INTERVAL = 30.0  # seconds between writing all pending samples to file
+
+
+class RateGroup:
+    """paths sampled at the same rate, grouped by hardware component"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.period = 1.0 / rate
+        # {hw_name or None: {setting name or path: (lq, history)}}
+        self.reads: Dict[str, Dict[str, Tuple[LoggedQuantity, LQHistory]]] = {}
+
+
+class TelemetryLogger(Measurement):
+    """
+    Reads the settings listed in *paths* on the measurement thread, each at its
+    own rate. Settings of the same hardware component that are due at the same
+    time are read with a single HardwareComponent.read_from_hardware call (which
+    uses its batch read, see connect_batch_read).
+
+    Samples are appended to chunked, extendable datasets
+    telemetry/<path>/{time, value} in <log_dir>/telemetry_<yymmdd>.h5, a new file
+    is started every day. The live view shows a min/max downsampled trace of
+    *view_path*.
+    """
+
+    name = "telemetry_logger"
+
+    def setup(self):
+        s = self.settings
+        s.New(
+            "paths",
+            str,
+            initial="",
+            description="settings to log, comma separated. Append @rate (Hz) to "
+            "override <i>default_rate</i>, e.g. <i>hw/stage/x_position@10, hw/laser/power</i>",
+        )
+        s.New("default_rate", float, initial=1.0, vmin=0.001, vmax=1000, unit="Hz")
+        s.new_file(
+            "log_dir",
+            is_dir=True,
+            initial=str(Path(self.app.settings["save_dir"]) / "telemetry"),
+        )
+        s.New(
+            "chunk_size",
+            int,
+            initial=1024,
+            vmin=1,
+            description="samples of a path written to file at once",
+        )
+        s.New(
+            "buffer_size",
+            int,
+            initial=36_000,
+            vmin=2,
+            description="samples of a path kept in memory for the live view",
+        )
+        s.New(
+            "display_rate",
+            float,
+            initial=2.0,
+            vmin=0.01,
+            unit="Hz",
+            description="max. rate of value changed signals of the logged settings, "
+            "a rate below the logging rate reduces the overhead",
+        )
+        s.New("view_path", str, initial="-", choices=("-",))
+        s.New("view_span", float, initial=600.0, vmin=1.0, unit="s")
+        s.New("view_points", int, initial=2000, vmin=10)
+        s.New("file_name", str, initial="", ro=True)
+        s.New("n_samples", int, initial=0, ro=True)
+        s.New(
+            "load",
+            float,
+            initial=0.0,
+            ro=True,
+            unit="%",
+            description="fraction of time the logger thread spends reading and writing",
+        )
+
+        self.histories: Dict[str, LQHistory] = {}
+        self.groups: List[RateGroup] = []
+        # logged settings whose value changed since the last send_display_updates
+        self.display_pending: Set[LoggedQuantity] = set()
+        self.log_h5_file = None
+        self.log_path = None
+
+    def setup_figure(self):
+        s = self.settings
+        self.ui = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(self.ui)
+        layout.addWidget(
+            s.New_UI(
+                (
+                    "paths",
+                    "default_rate",
+                    "log_dir",
+                    "file_name",
+                    "n_samples",
+                    "load",
+                )
+            )
+        )
+        btn_layout = QtWidgets.QHBoxLayout()
+        btn_layout.addWidget(self.new_start_stop_button())
+        add_button = QtWidgets.QPushButton("add all hardware readouts")
+        add_button.clicked.connect(self.add_hardware_readouts)
+        btn_layout.addWidget(add_button)
+        layout.addLayout(btn_layout)
+        layout.addWidget(s.New_UI(("view_path", "view_span", "view_points")))
+
+        self.plot = pg.PlotWidget()
+        self.plot.setLabel("bottom", "time", units="s")
+        self.plot_line = self.plot.plot(pen="w")
+        layout.addWidget(self.plot)
+
+    def set_paths(self, path_rates: Dict[str, float]):
+        """sets *paths* from {path: rate}, rate None means default_rate"""
+        self.settings["paths"] = ", ".join(
+            path if rate is None else f"{path}@{rate:g}"
+            for path, rate in path_rates.items()
+        )
+
+    def add_hardware_readouts(self):
+        path_rates = parse_paths(self.settings["paths"])
+        for path in self.app.get_setting_paths(filter_has_hardware_read=True):
+            path_rates.setdefault(path, None)
+        self.set_paths(path_rates)
+
+    def log_file_path(self, t: float) -> Path:
+        day = time.strftime("%y%m%d", time.localtime(t))
+        return Path(self.settings["log_dir"]) / f"telemetry_{day}.h5"
+
+    def setup_rate_groups(self) -> List[RateGroup]:
+        groups: Dict[float, RateGroup] = {}
+        self.histories = {}
+        path_rates = parse_paths(self.settings["paths"])
+        for path, rate in path_rates.items():
+            lq = self.app.get_lq(path)
+            if lq is None:
+                self.log.warning(f"{path} not found, not logged")
+                continue
+            if lq.is_array or lq.dtype not in (float, int, bool):
+                self.log.warning(f"{path} is not numeric, not logged")
+                continue
+            if rate is None:
+                rate = self.settings["default_rate"]
+            history = LQHistory(lq.dtype, self.settings["buffer_size"])
+            self.histories[path] = history
+
+            parts = path.split("/")
+            if len(parts) == 3 and parts[0] == "hw" and parts[1] in self.app.hardware:
+                hw_name, name = parts[1], parts[2]
+            else:
+                hw_name, name = None, path
+            group = groups.setdefault(rate, RateGroup(rate))
+            group.reads.setdefault(hw_name, {})[name] = (lq, history)
+        return list(groups.values())
+
+    def pre_run(self):
+        self.groups = self.setup_rate_groups()
+        self.display_pending = set()
+        choices = list(self.histories) or ["-"]
+        view_path = self.settings["view_path"]
+        self.settings.get_lq("view_path").change_choice_list(choices)
+        if view_path in choices:
+            self.settings["view_path"] = view_path
+
+    def run(self):
+        groups = self.groups
+        if not groups:
+            self.log.warning("no paths to log")
+            return
+
+        t_start = time.time()
+        # (next due time, index of group)
+        schedule = [(t_start, i) for i in range(len(groups))]
+        heapq.heapify(schedule)
+        t_flush = t_start + FLUSH_INTERVAL
+        t_display = t_start
+        t_load = t_start
+        busy = 0.0
+        self.settings["n_samples"] = 0
+        try:
+            self.open_log(t_start)
+            while not self.interrupt_measurement_called:
+                now = time.time()
+                wait = schedule[0][0] - now
+                if wait > 0:
+                    time.sleep(min(wait, 0.05))
+                    continue
+
+                t0 = time.perf_counter()
+                due = []
+                while schedule[0][0] <= now:
+                    t_due, i = heapq.heappop(schedule)
+                    group = groups[i]
+                    due.append(group)
+                    t_next = t_due + group.period
+                    if t_next <= now:
+                        # fell behind, skip missed samples
+                        t_next = now + group.period
+                    heapq.heappush(schedule, (t_next, i))
+
+                if self.log_file_path(now) != self.log_path:
+                    self.open_log(now)
+                self.sample(due)
+                if now >= t_flush:
+                    self.flush()
+                    t_flush = now + FLUSH_INTERVAL
+                if now >= t_display:
+                    self.send_display_updates()
+                    t_display = now + 1.0 / self.settings["display_rate"]
+                busy += time.perf_counter() - t0
+
+                if now - t_load >= 1.0:
+                    self.settings["load"] = 100.0 * busy / (now - t_load)
+                    self.settings["n_samples"] = sum(
+                        h.n for h in self.histories.values()
+                    )
+                    busy = 0.0
+                    t_load = now
+        finally:
+            self.close_log()
+
+    def sample(self, groups: List[RateGroup]):
+        """reads the settings of *groups*, once per hardware component"""
+        reads: Dict[str, Dict[str, Tuple[LoggedQuantity, LQHistory]]] = {}
+        for group in groups:
+            for hw_name, lqs in group.reads.items():
+                reads.setdefault(hw_name, {}).update(lqs)
+
+        for hw_name, lqs in reads.items():
+            before = [lq.val for lq, _ in lqs.values()]
+            try:
+                if hw_name is None:
+                    for lq, _ in lqs.values():
+                        if lq.has_hardware_read():
+                            lq.read_from_hardware(send_signal=False)
+                else:
+                    hw = self.app.hardware[hw_name]
+                    if not hw.settings["connected"]:
+                        continue
+                    hw.read_from_hardware(list(lqs), send_signal=False)
+            except Exception as err:
+                self.log.warning(f"reading {hw_name or list(lqs)} failed: {err}")
+                continue
+            t = time.time()
+            for (lq, history), val in zip(lqs.values(), before):
+                history.append(lq.val, t)
+                if not lq.same_values(val, lq.val):
+                    self.display_pending.add(lq)
+
+    def send_display_updates(self):
+        """
+        signals of the logged settings that changed since the last call are sent
+        at display_rate, see sample. Forced, because reads without signal
+        (send_signal=False) reset LoggedQuantity.oldval.
+        """
+        pending, self.display_pending = self.display_pending, set()
+        for lq in pending:
+            lq.send_display_updates(force=True)
+
+    def open_log(self, t: float):
+        self.close_log()
+        self.log_path = self.log_file_path(t)
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.log_h5_file = h5py.File(self.log_path, "a", libver="latest")
+        chunk_size = self.settings["chunk_size"]
+        for path, history in self.histories.items():
+            group = self.log_h5_file.require_group(f"telemetry/{path}")
+            lq = self.app.get_lq(path)
+            group.attrs["path"] = path
+            if lq.unit:
+                group.attrs["unit"] = lq.unit
+            history.spill_to(group, chunk_size, include_buffered=False)
+        # readers can open the file while it is being written
+        self.log_h5_file.swmr_mode = True
+        self.settings["file_name"] = self.log_path.as_posix()
+
+    def flush(self):
+        for history in self.histories.values():
+            history.flush()
+
+    def close_log(self):
+        if self.log_h5_file is None:
+            return
+        for history in self.histories.values():
+            history.close()
+        self.log_h5_file.close()
+        self.log_h5_file = None
+        self.log_path = None
+
+    def update_display(self):
+        history = self.histories.get(self.settings["view_path"])
+        if history is None or not hasattr(self, "plot_line"):
+            # nothing to show or figure not set up, logging runs without its ui
+            return
+        now = time.time()
+        times, values = history.window(now - self.settings["view_span"])
+        times, values = peak_downsample(times, values, self.settings["view_points"])
+        self.plot_line.setData(times - now, values)
+
+
+def parse_paths(text: str) -> Dict[str, float]:
+    """
+    'hw/a/x@10, hw/b/y' -> {'hw/a/x': 10.0, 'hw/b/y': None}
+
+    raises ValueError for rates <= 0
+    """
+    path_rates = {}
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        path, _, rate = item.partition("@")
+        rate = float(rate) if rate.strip() else None
+        if rate is not None and not rate > 0:
+            raise ValueError(f"{item}: rate must be positive")
+        path_rates[path.strip()] = rate
+    return path_rates
+
+
+def peak_downsample(times: np.ndarray, values: np.ndarray, n_points: int):
+    """
+    reduces to at most *n_points* points by keeping the min and max of each bin,
+    such that spikes remain visible
+    """
+    n = len(values)
+    if n <= n_points:
+        return times, values
+    n_bins = max(1, n_points // 2)
+    starts = np.linspace(0, n, n_bins + 1).astype(int)
+    values = values.astype(float)
+    vmin = np.minimum.reduceat(values, starts[:-1])
+    vmax = np.maximum.reduceat(values, starts[:-1])
+    t = np.column_stack([times[starts[:-1]], times[starts[1:] - 1]]).ravel()
+    return t, np.column_stack([vmin, vmax]).ravel()
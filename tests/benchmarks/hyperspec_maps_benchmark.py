@@ -0,0 +1,93 @@
+"""
+compares the vectorized peak_map and spectral_median_map of hyperspec_base with
+the per-pixel functions peaks() and spectral_median() applied to every spectrum,
+for correctness and speed. Requires peakutils and scipy.
+
+run with: python -m ScopeFoundry.tests.benchmarks.hyperspec_maps_benchmark
+"""
+
+import time
+import warnings
+
+import numpy as np
+
+from ScopeFoundry.data_browser.viewers.hyperspec_base import (
+    peak_map,
+    peaks,
+    spectral_median,
+    spectral_median_map,
+)
+
+N_SPEC = 512
+SIZES = (32, 64)  # per pixel reference is slow
+VECTORIZED_SIZES = (256, 512)
+
+
+def make_cube(N, rng):
+    wls = np.linspace(500, 800, N_SPEC)
+    centers = rng.uniform(550, 750, (N, N, 1))
+    widths = rng.uniform(5, 20, (N, N, 1))
+    cube = 1000 * np.exp(-0.5 * ((wls - centers) / widths) ** 2)
+    cube += rng.normal(0, 20, cube.shape)
+    return wls, cube
+
+
+def timed(func, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def per_pixel_peak_map(cube, wls, refinement):
+    return np.apply_along_axis(
+        peaks,
+        -1,
+        cube,
+        wls=wls,
+        thres=0.5,
+        unique_solution=True,
+        min_dist=N_SPEC // 2,
+        refinement=refinement,
+        ignore_phony_refinements=True,
+    )
+
+
+def main():
+    warnings.simplefilter("ignore")
+    rng = np.random.default_rng(0)
+    print(
+        f"{'map':>16} {'size':>9} {'per pixel':>10} {'vectorized':>10} {'max diff':>9}"
+    )
+    for N in SIZES:
+        wls, cube = make_cube(N, rng)
+        size = f"{N}x{N}"
+        ref, t_ref = timed(
+            np.apply_along_axis, spectral_median, -1, cube, wls=wls, count_min=200
+        )
+        new, t_new = timed(spectral_median_map, cube, wls, n_workers=1)
+        diff = np.abs(ref - new).max()
+        print(f"{'median':>16} {size:>9} {t_ref:9.3f}s {t_new:9.3f}s {diff:9.3g}")
+        for refinement in (False, True):
+            name = "peak" + ("_gaussian" if refinement else "")
+            ref, t_ref = timed(per_pixel_peak_map, cube, wls, refinement)
+            new, t_new = timed(
+                peak_map, cube, wls, 0.5, N_SPEC // 2, refinement, True, n_workers=1
+            )
+            diff = np.abs(ref - new).max()
+            print(f"{name:>16} {size:>9} {t_ref:9.3f}s {t_new:9.3f}s {diff:9.3g}")
+
+    print(f"\n{'map':>16} {'size':>9} {'1 process':>10} {'pool':>10}")
+    for N in VECTORIZED_SIZES:
+        wls, cube = make_cube(N, rng)
+        size = f"{N}x{N}"
+        for refinement in (False, "centroid", "gaussian"):
+            name = f"peak_{refinement}" if refinement else "peak"
+            args = (cube, wls, 0.5, N_SPEC // 2, refinement, True)
+            single, t_single = timed(peak_map, *args, n_workers=1)
+            pool, t_pool = timed(peak_map, *args)
+            assert np.array_equal(single, pool, equal_nan=True)
+            print(f"{name:>16} {size:>9} {t_single:9.3f}s {t_pool:9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
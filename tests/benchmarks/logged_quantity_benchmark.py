@@ -0,0 +1,75 @@
+"""
+measures the throughput of LoggedQuantity.update_value as called from a
+measurement loop running on a thread other than the LQ's (GUI) thread:
+progress-like float updates, repeated (unchanged) values, values that need to
+be coerced, and updates with coalesced display updates.
+
+run with: python -m ScopeFoundry.tests.benchmarks.logged_quantity_benchmark
+"""
+
+import threading
+import time
+
+import numpy as np
+import pyqtgraph as pg
+
+from ScopeFoundry.logged_quantity import LoggedQuantity
+
+N_UPDATES = 100_000
+
+
+def changing_floats(lq):
+    for i in range(N_UPDATES):
+        lq.update_value(i * 0.001)
+
+
+def same_value(lq):
+    for i in range(N_UPDATES):
+        lq.update_value(1.0)
+
+
+def numpy_ints(lq):
+    values = np.arange(N_UPDATES)
+    for i in range(N_UPDATES):
+        lq.update_value(values[i])
+
+
+def coalesced_floats(lq):
+    lq.set_coalesce_rate(30)
+    changing_floats(lq)
+
+
+CASES = (
+    ("changing float", float, changing_floats),
+    ("same value", float, same_value),
+    ("numpy int -> int", int, numpy_ints),
+    ("coalesced float", float, coalesced_floats),
+)
+
+
+def run_in_thread(func, lq):
+    result = {}
+
+    def target():
+        t0 = time.perf_counter()
+        func(lq)
+        result["dt"] = time.perf_counter() - t0
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    return result["dt"]
+
+
+def main():
+    qtapp = pg.mkQApp()
+    print(f"{'case':>18} {'per update':>12} {'updates/s':>12}")
+    for name, dtype, func in CASES:
+        lq = LoggedQuantity(name="progress", dtype=dtype)
+        dt = run_in_thread(func, lq)
+        qtapp.processEvents()
+        print(f"{name:>18} {dt / N_UPDATES * 1e6:10.2f}us {N_UPDATES / dt:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+predicted travel time and runtime of min_travel_order for random points compared
+with visiting them in the given (random) order and in raster order of a grid.
+
+run with: python -m ScopeFoundry.tests.benchmarks.min_travel_path_benchmark
+"""
+
+import time
+
+import numpy as np
+
+from ScopeFoundry.scanning.min_travel_path import min_travel_order, path_time
+
+SIZES = (1_000, 10_000, 100_000)
+VELOCITIES = (2.0, 1.0)
+SETTLE_TIMES = (0.01, 0.02)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(
+        f"{'points':>8} {'given':>10} {'sorted':>10} {'min_travel':>10} {'runtime':>9}"
+    )
+    for N in SIZES:
+        positions = rng.random((N, 2)) * np.sqrt(N)
+        t_given = path_time(positions, VELOCITIES, SETTLE_TIMES)
+        # raster like: rows of unit height, sorted along h
+        raster = np.lexsort((positions[:, 0], np.floor(positions[:, 1])))
+        t_sorted = path_time(positions[raster], VELOCITIES, SETTLE_TIMES)
+        t0 = time.perf_counter()
+        order = min_travel_order(positions, VELOCITIES, SETTLE_TIMES)
+        runtime = time.perf_counter() - t0
+        t_min = path_time(positions[order], VELOCITIES, SETTLE_TIMES)
+        print(f"{N:>8} {t_given:9.0f}s {t_sorted:9.0f}s {t_min:9.0f}s {runtime:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+compares wall-time and file size of writing a 4D sweep with spectra
+point by point into a contiguous dataset (previous NDScanData layout)
+against the chunked, buffered layout of NDScanData.
+
+run with: python -m ScopeFoundry.tests.benchmarks.nd_scan_data_benchmark
+"""
+
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from ScopeFoundry.sweeping.nd_scan_data import (
+    ChunkWriteBuffer,
+    axis_order_from_indices,
+    h5_filter_kwargs,
+    plan_chunk_shape,
+)
+from ScopeFoundry.sweeping.sweep_4D_modes import mk_indices_gen
+
+BASE_SHAPE = (8, 8, 8, 16)
+REPS = 1
+SPEC_LEN = 512
+
+
+def mk_spectrum(rng):
+    return (1000 * rng.random(SPEC_LEN)).astype(np.uint16)
+
+
+def run_contiguous(fname, indices, rng):
+    shape = BASE_SHAPE + (REPS, SPEC_LEN)
+    with h5py.File(fname, "w") as h5_file:
+        dset = h5_file.create_dataset("spec_raw", shape, dtype=np.uint16)
+        for ii in indices:
+            for r in range(REPS):
+                dset[ii + (r,)] = mk_spectrum(rng)
+
+
+def run_chunked(fname, indices, rng, axis_order, compression=None, shuffle=False):
+    shape = BASE_SHAPE + (REPS, SPEC_LEN)
+    data = np.zeros(shape, dtype=np.uint16)
+    chunks = plan_chunk_shape(
+        BASE_SHAPE + (REPS,), (SPEC_LEN,), data.dtype.itemsize, axis_order + (4,)
+    )
+    with h5py.File(fname, "w") as h5_file:
+        dset = h5_file.create_dataset(
+            "spec_raw",
+            shape,
+            dtype=data.dtype,
+            chunks=chunks,
+            **h5_filter_kwargs(compression, shuffle=shuffle),
+        )
+        write_buffer = ChunkWriteBuffer(dset, data, len(BASE_SHAPE) + 1)
+        for ii in indices:
+            for r in range(REPS):
+                write_buffer.write(ii + (r,), mk_spectrum(rng))
+        write_buffer.flush()
+
+
+def main():
+    arrays = [np.arange(n) for n in BASE_SHAPE]
+    indices = list(mk_indices_gen(*arrays, "nested"))
+    axis_order = axis_order_from_indices(mk_indices_gen(*arrays, "nested"))
+
+    cases = {
+        "contiguous per point": lambda fname, rng: run_contiguous(fname, indices, rng),
+        "chunked": lambda fname, rng: run_chunked(fname, indices, rng, axis_order),
+        "chunked lzf+shuffle": lambda fname, rng: run_chunked(
+            fname, indices, rng, axis_order, "lzf", True
+        ),
+        "chunked gzip+shuffle": lambda fname, rng: run_chunked(
+            fname, indices, rng, axis_order, "gzip", True
+        ),
+        "chunked lz4": lambda fname, rng: run_chunked(
+            fname, indices, rng, axis_order, "lz4"
+        ),
+    }
+
+    print(f"{len(indices)} points, {REPS} reps, spectra of {SPEC_LEN} uint16")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, func in cases.items():
+            fname = os.path.join(tmp_dir, f"{name.replace(' ', '_')}.h5")
+            t0 = time.perf_counter()
+            func(fname, np.random.default_rng(0))
+            dt = time.perf_counter() - t0
+            size = os.path.getsize(fname) / 1e6
+            print(f"{name:>24}: {dt:7.3f} s {size:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
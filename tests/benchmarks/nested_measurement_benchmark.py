@@ -0,0 +1,92 @@
+"""
+measures the per-point overhead of Measurement.start_nested_measure_and_wait
+with an inner measurement that only sleeps for ACQ_TIME, compared to the former
+implementation that polled run_state every 10 ms.
+
+run with: python -m ScopeFoundry.tests.benchmarks.nested_measurement_benchmark
+"""
+
+import time
+
+from qtpy import QtCore
+
+from ScopeFoundry import BaseMicroscopeApp, Measurement
+
+N_POINTS = 100
+ACQ_TIME = 0.02
+
+
+def polling_nested_measure_and_wait(outer: Measurement, measure: Measurement):
+    """the former sleep-polling implementation (without polling_func)"""
+    measure.interrupt_measurement_called = False
+    measure.start()
+    t0 = time.time()
+    while not measure.is_measuring():
+        time.sleep(0.010)
+        if time.time() - t0 > 1.0:
+            return measure.settings["run_state"] == "stop_success"
+    while measure.is_measuring():
+        if outer.interrupt_measurement_called:
+            measure.interrupt()
+        time.sleep(0.010)
+    return measure.settings["run_state"] == "stop_success"
+
+
+class InnerMeasure(Measurement):
+
+    name = "inner"
+
+    def run(self):
+        time.sleep(ACQ_TIME)
+
+
+class OuterMeasure(Measurement):
+
+    name = "outer"
+
+    def setup(self):
+        self.settings.New("polling", bool, initial=False)
+        self.elapsed = None
+
+    def run(self):
+        inner = self.app.measurements["inner"]
+        t0 = time.perf_counter()
+        for i in range(N_POINTS):
+            if self.interrupt_measurement_called:
+                break
+            if self.settings["polling"]:
+                polling_nested_measure_and_wait(self, inner)
+            else:
+                self.start_nested_measure_and_wait(inner)
+        self.elapsed = time.perf_counter() - t0
+
+
+class BenchmarkApp(BaseMicroscopeApp):
+
+    name = "nested_measurement_benchmark"
+
+    def setup(self):
+        self.add_measurement(InnerMeasure(self))
+        self.add_measurement(OuterMeasure(self))
+
+
+def main():
+    app = BenchmarkApp([])
+    outer = app.measurements["outer"]
+    # run a real event loop, busy processEvents() would starve the threads
+    loop = QtCore.QEventLoop()
+    outer.run_state.add_listener(
+        lambda: outer.is_measuring() or loop.quit(), argtype=()
+    )
+    for polling in (True, False):
+        outer.settings["polling"] = polling
+        QtCore.QTimer.singleShot(0, outer.start)
+        loop.exec()
+        name = "sleep polling" if polling else "event driven"
+        overhead = outer.elapsed / N_POINTS - ACQ_TIME
+        print(f"{name:>14}: {overhead * 1e3:6.2f} ms overhead per point")
+    app.on_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+compares looking up a setting per access with app.get_lq / app.read_setting
+against a handle from app.resolve, as done in measurement loops.
+
+run with: python -m ScopeFoundry.tests.benchmarks.resolve_benchmark
+"""
+
+import time
+
+from ScopeFoundry import BaseMicroscopeApp
+from ScopeFoundry.examples.ScopeFoundryHW.simulon_xyz_stage.simulon_xyz_stage_hw import (
+    SimulonXYZStageHW,
+)
+
+N = 100_000
+PATH = "hw/simulon_xyz_stage/x_position"
+
+
+def timeit(func):
+    t0 = time.perf_counter()
+    for _ in range(N):
+        func()
+    return (time.perf_counter() - t0) / N * 1e6
+
+
+def main():
+    app = BaseMicroscopeApp([])
+    hw = app.add_hardware(SimulonXYZStageHW(app))
+    hw.settings["connected"] = True
+    handle = app.resolve(PATH)
+
+    results = {
+        "get_lq(path).val": lambda: app.get_lq(PATH).val,
+        "read_setting(path)": lambda: app.read_setting(PATH),
+        "handle.read(from_hardware=False)": lambda: handle.read(from_hardware=False),
+        "get_lq(path).read_from_hardware": lambda: app.get_lq(
+            PATH
+        ).read_from_hardware(),
+        "resolve(path).read()": lambda: app.resolve(PATH).read(),
+        "handle.read()": handle.read,
+        "get_lq(path).update_value": lambda: app.get_lq(PATH).update_value(1.0),
+        "handle.write": lambda: handle.write(1.0),
+    }
+    for name, func in results.items():
+        print(f"{name:34s} {timeit(func):6.2f} us")
+    hw.settings["connected"] = False
+    app.qtapp.exit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+compares the loop based scan generators with the vectorized scan paths and
+the lazy (chunked) mode across scan types and sizes.
+
+run with: python -m ScopeFoundry.tests.benchmarks.scan_paths_benchmark
+"""
+
+import time
+
+from ScopeFoundry.scanning.scan_paths import gen_scan_path, iter_scan_path
+from ScopeFoundry.tests.unittests.test_scan_paths import reference_path
+
+SCAN_TYPES = ("raster", "serpentine", "trace_retrace", "ortho_trace_retrace")
+SIZES = ((64, 64, 1), (512, 512, 1), (4096, 4096, 1), (512, 512, 16))
+MAX_LOOP_PIXELS = 2_000_000  # the loops are too slow beyond that
+
+
+def timeit(func):
+    t0 = time.perf_counter()
+    func()
+    return time.perf_counter() - t0
+
+
+def main():
+    print(
+        f"{'scan_type':>20} {'Nh x Nv x Nz':>16} {'loop':>9} {'numpy':>9} {'lazy':>9}"
+    )
+    for scan_type in SCAN_TYPES:
+        for Nh, Nv, Nz in SIZES:
+            if Nz > 1 and scan_type not in ("raster", "serpentine"):
+                continue
+            if Nh * Nv * Nz <= MAX_LOOP_PIXELS:
+                t_loop = (
+                    f"{timeit(lambda: reference_path(scan_type, Nh, Nv, Nz)):8.3f}s"
+                )
+            else:
+                t_loop = "-"
+            t_numpy = timeit(lambda: gen_scan_path(scan_type, Nh, Nv, Nz))
+            t_lazy = timeit(lambda: list(iter_scan_path(scan_type, Nh, Nv, Nz)))
+            size = f"{Nh}x{Nv}x{Nz}"
+            print(
+                f"{scan_type:>20} {size:>16} {t_loop:>9} {t_numpy:8.3f}s {t_lazy:8.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+time until the main window of an app with 40 measurements with pyqtgraph figures
+is constructed, with figures built lazily (default) and all at startup.
+
+run with: python -m ScopeFoundry.tests.benchmarks.startup_benchmark
+"""
+
+import subprocess
+import sys
+import time
+
+import pyqtgraph as pg
+from qtpy import QtWidgets
+
+from ScopeFoundry import BaseMicroscopeApp, Measurement
+
+N_MEASUREMENTS = 40
+
+
+class PlotMeasure(Measurement):
+
+    name = "plot_measure"
+
+    def setup(self):
+        for i in range(10):
+            self.settings.New(f"setting_{i}", float)
+
+    def setup_figure(self):
+        self.ui = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(self.ui)
+        layout.addWidget(self.settings.New_UI())
+        self.graph_layout = pg.GraphicsLayoutWidget()
+        layout.addWidget(self.graph_layout)
+        for i in range(4):
+            plot = self.graph_layout.addPlot(row=i, col=0)
+            plot.plot([0, 1, 2])
+            plot.addLegend()
+        self.graph_layout.addItem(pg.HistogramLUTItem(), row=0, col=1)
+
+
+class App(BaseMicroscopeApp):
+
+    def setup(self):
+        for i in range(N_MEASUREMENTS):
+            self.add_measurement(PlotMeasure(self, name=f"plot_measure_{i}"))
+
+
+def run(lazy):
+    App.lazy_measure_uis = lazy
+    t0 = time.perf_counter()
+    app = App([])
+    t_constructed = time.perf_counter() - t0
+    while lazy and "all figures" not in app.startup_timing["app"]:
+        app.qtapp.processEvents()
+    print(f"lazy_measure_uis={lazy}: app constructed in {t_constructed:.2f} s")
+    print(app.startup_timing_report())
+    app.qtapp.exit()
+
+
+def main():
+    if len(sys.argv) > 1:
+        run(sys.argv[1] == "lazy")
+        return
+    # separate processes, a second app in the same process starts slower
+    for mode in ("eager", "lazy"):
+        subprocess.run([sys.executable, "-m", __spec__.name, mode])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+CPU overhead of the TelemetryLogger logging 102 paths (34 simulon_xyz_stage
+positions x 3 axes) at 10 Hz to a temporary directory, compared with the idle app.
+
+run with: python -m ScopeFoundry.tests.benchmarks.telemetry_logger_benchmark
+"""
+
+import tempfile
+import time
+
+import h5py
+
+from ScopeFoundry import BaseMicroscopeApp, TelemetryLogger
+from ScopeFoundry.examples.ScopeFoundryHW.simulon_xyz_stage.simulon_xyz_stage_hw import (
+    SimulonXYZStageHW,
+)
+
+N_STAGES = 34
+RATE = 10.0
+DURATION = 10.0
+
+
+def cpu_fraction(app, duration):
+    """process CPU time / wall time while processing Qt events"""
+    t0, c0 = time.perf_counter(), time.process_time()
+    while time.perf_counter() - t0 < duration:
+        app.qtapp.processEvents()
+        time.sleep(0.01)
+    return (time.process_time() - c0) / (time.perf_counter() - t0)
+
+
+def main():
+    tmpdir = tempfile.TemporaryDirectory()
+    app = BaseMicroscopeApp([])
+    app.settings["save_dir"] = tmpdir.name
+    for i in range(N_STAGES):
+        hw = app.add_hardware(SimulonXYZStageHW(app, name=f"stage{i}"))
+        hw.settings["connected"] = True
+    logger = app.add_measurement(TelemetryLogger(app))
+    logger.set_paths(
+        {
+            path: RATE
+            for path in app.get_setting_paths(filter_has_hardware_read=True)
+            if path.endswith("_position")
+        }
+    )
+    n_paths = len(logger.settings["paths"].split(","))
+
+    idle = cpu_fraction(app, DURATION)
+    logger.start()
+    logging = cpu_fraction(app, DURATION)
+    load = logger.settings["load"]
+    logger.interrupt()
+    while logger.is_measuring():
+        app.qtapp.processEvents()
+        time.sleep(0.01)
+    app.qtapp.processEvents()
+
+    with h5py.File(logger.settings["file_name"], "r") as h5_file:
+        n_logged = sum(
+            len(h5_file[f"telemetry/{path}/time"]) for path in logger.histories
+        )
+
+    print(f"{n_paths} paths at {RATE:g} Hz for {DURATION:g} s, {n_logged} samples")
+    print(f"process CPU idle:    {idle * 100:6.2f}%")
+    print(f"process CPU logging: {logging * 100:6.2f}%")
+    print(f"logger thread load:  {load:6.2f}%")
+    app.qtapp.exit()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
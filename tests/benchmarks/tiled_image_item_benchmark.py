@@ -0,0 +1,60 @@
+"""
+compares the cost of a raster scan display update with a full redraw
+(pg.ImageItem.setImage) against updating only the changed tiles
+(TiledImageItem.update_region) for a few pixels changed per update.
+
+run with: python -m ScopeFoundry.tests.benchmarks.tiled_image_item_benchmark
+"""
+
+import time
+
+import numpy as np
+import pyqtgraph as pg
+from qtpy import QtWidgets
+
+from ScopeFoundry.graphics.tiled_image_item import TiledImageItem
+
+SIZES = (256, 1024, 4096)
+PIXELS_PER_UPDATE = 50
+N_UPDATES = 50
+
+
+def run_updates(item, image, update):
+    scene = QtWidgets.QGraphicsScene()
+    scene.addItem(item)
+    item.setImage(image, levels=(0, 1))
+    Nh = image.shape[0]
+    t0 = time.perf_counter()
+    for n in range(N_UPDATES):
+        p0 = n * PIXELS_PER_UPDATE
+        jj, i0 = divmod(p0, Nh)
+        i1 = min(i0 + PIXELS_PER_UPDATE, Nh)
+        image[i0:i1, jj] = np.random.random(i1 - i0)
+        update(item, slice(i0, i1), slice(jj, jj + 1))
+        for child in [item] + item.childItems():
+            if child.image is not None and child._renderRequired:
+                child.render()
+    return (time.perf_counter() - t0) / N_UPDATES
+
+
+def full_update(item, x_slice, y_slice):
+    item.setImage(item.image, autoLevels=False)
+
+
+def region_update(item, x_slice, y_slice):
+    item.update_region(x_slice, y_slice)
+
+
+def main():
+    pg.mkQApp()
+    print(f"{'image':>12} {'full redraw':>12} {'tiles':>12}")
+    for N in SIZES:
+        image = np.full((N, N), np.nan)
+        t_full = run_updates(pg.ImageItem(), image.copy(), full_update)
+        t_tiles = run_updates(TiledImageItem(), image.copy(), region_update)
+        size = f"{N}x{N}"
+        print(f"{size:>12} {t_full*1e3:10.2f}ms {t_tiles*1e3:10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,35 @@ from ScopeFoundry.tests.unittests.test_lq_connection import LQConnectionTest
 from ScopeFoundry.tests.unittests.test_lq_range import LQRangeTest
 from ScopeFoundry.tests.unittests.test_analyze_nb import AnalyzeNBTest
 from ScopeFoundry.tests.unittests.test_operations import TestOperations
+from ScopeFoundry.tests.unittests.test_nd_scan_data import NDScanDataTest
+from ScopeFoundry.tests.unittests.test_async_h5_writer import AsyncH5WriterTest
+from ScopeFoundry.tests.unittests.test_scan_paths import ScanPathsTest
+from ScopeFoundry.tests.unittests.test_lq_coalesce import LQCoalesceTest
+from ScopeFoundry.tests.unittests.test_lq_update_value import LQUpdateValueTest
+from ScopeFoundry.tests.unittests.test_lq_history import LQHistoryTest
+from ScopeFoundry.tests.unittests.test_telemetry_logger import TelemetryLoggerTest
+from ScopeFoundry.tests.unittests.test_resolve import ResolveTest
+from ScopeFoundry.tests.unittests.test_lazy_measure_ui import LazyMeasureUITest
+from ScopeFoundry.tests.unittests.test_nested_measurement import NestedMeasurementTest
+from ScopeFoundry.tests.unittests.test_batch_read import BatchReadTest
+from ScopeFoundry.tests.unittests.test_tiled_image_item import (
+    DisplayDirtyRegionsTest,
+    TiledImageItemTest,
+)
+from ScopeFoundry.tests.unittests.test_sweep_pipelined import SweepPipelinedTest
+from ScopeFoundry.tests.unittests.test_sweep_paths import SweepPathsTest
+from ScopeFoundry.tests.unittests.test_min_travel_path import MinTravelPathTest
+from ScopeFoundry.tests.unittests.test_hyperspec_out_of_core import (
+    HyperspecOutOfCoreTest,
+)
+from ScopeFoundry.tests.unittests.test_hyperspec_maps import HyperspecMapsTest
+from ScopeFoundry.tests.unittests.test_derived_cache import DerivedCacheTest
+from ScopeFoundry.tests.unittests.test_file_probe import FileProbeTest
+from ScopeFoundry.tests.unittests.test_file_loader import FileLoaderTest
+from ScopeFoundry.tests.unittests.test_h5_index import H5IndexTest
+from ScopeFoundry.tests.unittests.test_h5_stats import H5StatsTest
+from ScopeFoundry.tests.unittests.test_image_pyramid import ImagePyramidTest
+from ScopeFoundry.tests.unittests.test_zoomable_map import ZoomableMapTest
 
 
 # following also require visual inspection - run individual files
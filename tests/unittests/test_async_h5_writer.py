@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from ScopeFoundry.async_h5_writer import AsyncH5Writer
+
+
+class AsyncH5WriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.h5_file = h5py.File(os.path.join(self.tmp_dir.name, "test.h5"), "w")
+
+    def tearDown(self):
+        self.h5_file.close()
+        self.tmp_dir.cleanup()
+
+    def test_write(self):
+        dset = self.h5_file.create_dataset("d", (10, 3), dtype=float)
+        writer = AsyncH5Writer(self.h5_file, max_queue_size=2)
+
+        row = np.zeros(3)
+        for i in range(10):
+            row[:] = i  # value is copied on write
+            writer.write(dset, i, row)
+        writer.write("d", (0, 0), -1.0)
+        writer.close()
+
+        self.assertFalse(writer.is_running)
+        self.assertEqual(writer.n_writes, 11)
+        expected = np.repeat(np.arange(10.0)[:, None], 3, axis=1)
+        expected[0, 0] = -1.0
+        np.testing.assert_array_equal(dset[:], expected)
+
+    def test_error(self):
+        writer = AsyncH5Writer(self.h5_file)
+        writer.write("does_not_exist", 0, 1.0)
+        with self.assertRaises(KeyError):
+            writer.join()
+        writer.close()
+        with self.assertRaises(RuntimeError):
+            writer.write("does_not_exist", 0, 1.0)
@@ -0,0 +1,87 @@
+import unittest
+
+from ScopeFoundry import BaseMicroscopeApp, HardwareComponent
+
+
+class Device:
+
+    def __init__(self):
+        self.n_queries = 0
+        self.values = {"a": 1.0, "b": 2.0, "c": 3.0}
+
+    def read(self, name):
+        self.n_queries += 1
+        return self.values[name]
+
+    def read_all(self):
+        self.n_queries += 1
+        return dict(self.values)
+
+
+class BatchHW(HardwareComponent):
+    name = "batch_hw"
+
+    def setup(self):
+        for name in ("a", "b", "c", "d"):
+            self.settings.New(name, float)
+
+    def connect(self):
+        self.dev = Device()
+        for name in ("a", "b", "c"):
+            self.settings.get_lq(name).connect_to_hardware(
+                lambda name=name: self.dev.read(name)
+            )
+        self.connect_batch_read(self.dev.read_all)
+
+    def disconnect(self):
+        self.settings.disconnect_all_from_hardware()
+        self.disconnect_batch_read()
+
+
+class App(BaseMicroscopeApp):
+
+    mdi = False
+
+    def setup(self):
+        self.hw = self.add_hardware(BatchHW(self))
+
+
+class BatchReadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App([])
+        self.hw = self.app.hw
+        self.hw.connect()
+
+    def tearDown(self):
+        self.app.qtapp.exit()
+        del self.app
+
+    def test_read_from_hardware(self):
+        received = []
+        for name in ("a", "b", "c"):
+            self.hw.settings.get_lq(name).add_listener(
+                lambda name=name: received.append((name, self.hw.settings["c"]))
+            )
+        self.hw.read_from_hardware()
+        self.assertEqual(self.hw.dev.n_queries, 1)
+        self.assertEqual(self.hw.settings["c"], 3.0)
+        # signals are sent after the whole batch is applied
+        self.assertEqual(received, [("a", 3.0), ("b", 3.0), ("c", 3.0)])
+
+    def test_read_settings_groups_by_hardware(self):
+        self.hw.dev.values["b"] = 5.0
+        paths = ["hw/batch_hw/a", "hw/batch_hw/b", "hw/batch_hw/d"]
+        values = self.app.read_settings(paths, read_from_hardware=True)
+        self.assertEqual(self.hw.dev.n_queries, 1)
+        self.assertEqual(values["hw/batch_hw/b"], 5.0)
+        self.assertEqual(values["hw/batch_hw/d"], 0.0)
+
+    def test_without_batch_read(self):
+        self.hw.disconnect_batch_read()
+        self.app.read_settings(["hw/batch_hw/a", "hw/batch_hw/b"], True)
+        self.assertEqual(self.hw.dev.n_queries, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
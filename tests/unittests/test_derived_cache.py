@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from ScopeFoundry.data_browser.derived_cache import DerivedCache, file_fingerprint
+
+
+class DerivedCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmpdir.name) / "cache"
+        self.cache = DerivedCache(self.cache_dir, max_size=2**20)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip_across_instances(self):
+        key = {"file": "a.h5", "settings": {"binning": 2}}
+        self.assertIsNone(self.cache.get(key))
+        arrays = {"sum": np.arange(12).reshape(3, 4), "median_map_x1-5": np.ones(3)}
+        self.cache.put(key, arrays)
+
+        cached = DerivedCache(self.cache_dir).get(key)
+        self.assertEqual(list(cached), list(arrays))
+        for k in arrays:
+            np.testing.assert_array_equal(cached[k], arrays[k])
+        self.assertIsNone(self.cache.get({**key, "settings": {"binning": 1}}))
+
+    def test_keys_per_file(self):
+        keys = [
+            {"file": {"path": "a.h5", "size": 1}, "name": "sum_map", "binning": "2"},
+            {"file": {"path": "a.h5", "size": 1}, "name": "peak_map"},
+            {"file": {"path": "b.h5", "size": 1}, "name": "sum_map"},
+        ]
+        for key in keys:
+            self.cache.put(key, {"x": np.zeros(3)})
+        found = self.cache.keys({"path": "a.h5", "size": 1})
+        self.assertCountEqual(found, keys[:2])
+        for key in found:
+            self.assertIsNotNone(self.cache.get(key))
+        self.assertEqual(self.cache.keys({"path": "c.h5", "size": 1}), [])
+
+    def test_cached_computes_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"x": np.zeros(3)}
+
+        self.cache.cached({"k": 1}, compute)
+        self.cache.cached({"k": 1}, compute)
+        self.assertEqual(len(calls), 1)
+
+    def test_lru_eviction(self):
+        self.cache.max_size = 3.5 * 80_000
+        for i in range(3):
+            self.cache.put({"i": i}, {"x": np.zeros(10_000)})
+            time.sleep(0.01)
+        self.cache.get({"i": 0})  # 0 becomes the most recently used
+        self.cache.put({"i": 3}, {"x": np.zeros(10_000)})
+        self.assertIsNone(self.cache.get({"i": 1}))
+        for i in (0, 2, 3):
+            self.assertIsNotNone(self.cache.get({"i": i}))
+        self.assertLessEqual(self.cache.size(), self.cache.max_size)
+
+    def test_invalid_entry_is_removed(self):
+        self.cache.put({"k": 1}, {"x": np.zeros(3)})
+        self.cache.entry_path({"k": 1}).write_bytes(b"broken")
+        self.assertIsNone(self.cache.get({"k": 1}))
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_file_fingerprint(self):
+        fname = os.path.join(self.tmpdir.name, "data.h5")
+        with h5py.File(fname, "w") as file:
+            file.attrs["unique_id"] = "ABC"
+        fingerprint = file_fingerprint(fname)
+        self.assertEqual(fingerprint["file"], str(Path(fname).resolve()))
+
+        with h5py.File(fname, "a") as file:
+            file["x"] = np.zeros(10)
+        self.assertNotEqual(file_fingerprint(fname), fingerprint)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+import pyqtgraph as pg
+
+from ScopeFoundry.data_browser.file_loader import FileLoader
+
+
+class FakeStatusbar:
+
+    def __init__(self):
+        self.message = ""
+
+    def showMessage(self, message):
+        self.message = message
+
+    def clearMessage(self):
+        self.message = ""
+
+
+class FakeView:
+    """records load_file and apply_loaded_file calls, loads of files in
+    *blocked* wait until they are released"""
+
+    name = "fake_view"
+
+    def __init__(self):
+        self.loads = []
+        self.applied = []
+        self.blocked = {}
+
+    def load_settings(self):
+        return {"binning": 1}
+
+    def block(self, fname):
+        self.blocked[fname] = threading.Event()
+
+    def release(self, fname):
+        self.blocked.pop(fname).set()
+
+    def load_file(self, fname):
+        self.loads.append(fname)
+        if fname in self.blocked:
+            self.blocked[fname].wait(10)
+        return f"data of {Path(fname).name}"
+
+    def apply_loaded_file(self, fname, loaded):
+        self.applied.append((fname, loaded))
+
+
+class FileLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.qtapp = pg.mkQApp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fnames = []
+        for i in range(4):
+            fname = Path(self.tmpdir.name) / f"file_{i}.h5"
+            fname.write_bytes(b"0" * (i + 1))
+            self.fnames.append(str(fname))
+        self.databrowser = SimpleNamespace(
+            ui=SimpleNamespace(statusbar=FakeStatusbar())
+        )
+        self.loader = FileLoader(self.databrowser, max_workers=1, max_prefetched=2)
+        self.view = FakeView()
+
+    def tearDown(self):
+        for event in self.view.blocked.values():
+            event.set()
+        self.loader.shutdown()
+        self.loader.pool.shutdown(wait=True)
+        self.tmpdir.cleanup()
+
+    def wait_idle(self, timeout=10):
+        t0 = time.time()
+        while time.time() - t0 < timeout:
+            futures = list(self.loader.prefetched.values())
+            if self.loader.current is not None:
+                futures.append(self.loader.current.future)
+            if all(f.done() for f in futures):
+                break
+            time.sleep(0.005)
+        for _ in range(3):
+            self.qtapp.processEvents()
+            time.sleep(0.005)
+
+    def test_request(self):
+        f0 = self.fnames[0]
+        self.loader.request(self.view, f0)
+        self.wait_idle()
+        self.assertEqual(self.view.applied, [(f0, "data of file_0.h5")])
+        self.assertIsNone(self.loader.current)
+
+    def test_newer_request_supersedes(self):
+        f0, f1 = self.fnames[:2]
+        self.view.block(f0)
+        self.loader.request(self.view, f0)
+        while f0 not in self.view.loads:
+            time.sleep(0.005)
+        self.loader.request(self.view, f1)
+        self.view.release(f0)
+        self.wait_idle()
+        self.assertEqual(self.view.applied, [(f1, "data of file_1.h5")])
+        # the superseded load was running, its result is kept for a new request
+        self.assertEqual(len(self.loader.prefetched), 1)
+        self.loader.request(self.view, f0)
+        self.wait_idle()
+        self.assertEqual(self.view.loads, [f0, f1])
+        self.assertEqual(self.view.applied[-1], (f0, "data of file_0.h5"))
+
+    def test_cancel(self):
+        f0, f1 = self.fnames[:2]
+        self.view.block(f0)
+        self.loader.request(self.view, f0)
+        self.loader.request(self.view, f1)
+        # f1 is queued behind f0 and is cancelled before it starts
+        self.loader.cancel()
+        self.view.release(f0)
+        self.wait_idle()
+        self.assertEqual(self.view.applied, [])
+        self.assertNotIn(f1, self.view.loads)
+
+    def test_prefetch_is_reused(self):
+        f0 = self.fnames[0]
+        self.loader.prefetch(self.view, f0)
+        self.loader.prefetch(self.view, f0)
+        self.wait_idle()
+        self.loader.request(self.view, f0)
+        self.wait_idle()
+        self.assertEqual(self.view.loads, [f0])
+        self.assertEqual(self.view.applied, [(f0, "data of file_0.h5")])
+        self.assertEqual(len(self.loader.prefetched), 0)
+
+        # a modified file is loaded again
+        Path(f0).write_bytes(b"modified")
+        self.loader.prefetch(self.view, f0)
+        self.wait_idle()
+        self.assertEqual(self.view.loads, [f0, f0])
+
+    def test_prefetch_eviction(self):
+        f0, f1, f2, f3 = self.fnames
+        self.view.block(f0)
+        self.loader.prefetch(self.view, f0)
+        while f0 not in self.view.loads:
+            time.sleep(0.005)
+        # queued behind f0, the oldest is evicted and cancelled
+        for fname in (f1, f2, f3):
+            self.loader.prefetch(self.view, fname)
+        self.assertEqual(len(self.loader.prefetched), 2)
+        keys = [key[1] for key in self.loader.prefetched]
+        self.assertEqual(keys, [f2, f3])
+        self.view.release(f0)
+        self.wait_idle()
+        self.assertEqual(self.view.loads, [f0, f2, f3])
+
+
+if __name__ == "__main__":
+    unittest.main()
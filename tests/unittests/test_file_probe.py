@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import h5py
+
+from ScopeFoundry.data_browser import file_probe
+from ScopeFoundry.data_browser.data_browser import DataBrowser
+from ScopeFoundry.data_browser.data_browser_view import DataBrowserView
+
+
+class StubView(DataBrowserView):
+
+    def __init__(self, name, supported_measurement_names=None):
+        self.name = name
+        self.supported_measurement_names = supported_measurement_names
+
+
+class ToyNameView(StubView):
+
+    def is_file_supported(self, fname):
+        return "toy" in str(fname)
+
+
+class FileProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        file_probe.clear_probe_cache()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_file(self, fname, *measurements):
+        path = str(Path(self.tmpdir.name) / fname)
+        with h5py.File(path, "w") as file:
+            for name in measurements:
+                file.create_group(f"measurement/{name}")
+        return path
+
+    def test_measurement_names_cached(self):
+        path = self.make_file("a.h5", "m1", "m2")
+        read = mock.Mock(wraps=file_probe.read_measurement_names)
+        with mock.patch.object(file_probe, "read_measurement_names", read):
+            self.assertEqual(file_probe.measurement_names(path), {"m1", "m2"})
+            self.assertEqual(file_probe.measurement_names(path), {"m1", "m2"})
+            self.assertEqual(read.call_count, 1)
+
+            # modified files are probed again
+            self.make_file("a.h5", "m3")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertEqual(file_probe.measurement_names(path), {"m3"})
+            self.assertEqual(read.call_count, 2)
+
+    def test_unsupported_files(self):
+        txt = Path(self.tmpdir.name) / "a.txt"
+        txt.write_text("hi")
+        self.assertEqual(file_probe.measurement_names(txt), frozenset())
+        path = self.make_file("no_measurement.h5")
+        self.assertEqual(file_probe.measurement_names(path), frozenset())
+        self.assertEqual(file_probe.measurement_names("missing.h5"), frozenset())
+
+    def test_auto_select_view(self):
+        views = [
+            StubView("file_info"),
+            StubView("m1"),
+            ToyNameView("toy"),
+            StubView("m2_view", ("m2", "m2b")),
+        ]
+        browser = SimpleNamespace(views={v.name: v for v in views})
+        DataBrowser.update_measurement_index(browser)
+        self.assertEqual(browser.measurement_index["m2b"], {"m2_view"})
+
+        def select(fname, *measurements):
+            path = self.make_file(fname, *measurements)
+            return DataBrowser.auto_select_view(browser, path)
+
+        self.assertEqual(select("a.h5", "m1"), "m1")
+        self.assertEqual(select("b.h5", "m1", "m2b"), "m2_view")
+        self.assertEqual(select("toy_m1.h5", "m1"), "toy")
+        self.assertEqual(select("c.h5", "other"), "file_info")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from ScopeFoundry.data_browser.h5_index import H5Index
+from ScopeFoundry.data_browser.plug_ins.h5_search import h5_entries
+
+
+class H5IndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmpdir.name) / "data"
+        (self.data_dir / "sub").mkdir(parents=True)
+        self.index = H5Index(Path(self.tmpdir.name) / "index.sqlite", h5_entries)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def make_file(self, fname, laser_power, mtime_offset=0):
+        path = self.data_dir / fname
+        with h5py.File(path, "w") as file:
+            settings = file.create_group("hardware/laser/settings")
+            settings.attrs["laser_power"] = laser_power
+            settings.create_group("units").attrs["laser_power"] = "mW"
+            m = file.create_group("measurement/toy_measure")
+            m.create_dataset("spectrum", data=np.arange(10.0))
+        if mtime_offset:
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+        return str(path)
+
+    def search_files(self, text):
+        return {Path(p).name for p, _, _ in self.index.search(text, self.data_dir)}
+
+    def test_incremental_update_and_search(self):
+        self.make_file("a.h5", 5.0)
+        self.make_file("sub/b.h5", 7.5)
+        self.assertEqual(self.index.update(self.data_dir), 2)
+        self.assertEqual(self.index.update(self.data_dir), 0)
+
+        self.assertEqual(self.search_files("laser_power</b>: 5.0 mW"), {"a.h5"})
+        self.assertEqual(self.search_files("LASER"), {"a.h5", "b.h5"})
+        self.assertEqual(self.search_files("spectrum, (10,)"), {"a.h5", "b.h5"})
+        self.assertIn("min=0.0 max=9.0", self.index.search("spectrum")[0][2])
+        self.assertEqual(self.search_files("100%"), set())
+
+        # modified files are indexed again, deleted ones removed
+        self.make_file("a.h5", 6.0, mtime_offset=10**9)
+        os.remove(self.data_dir / "sub" / "b.h5")
+        self.assertEqual(self.index.update(self.data_dir), 1)
+        self.assertEqual(self.search_files("5.0 mW"), set())
+        self.assertEqual(self.search_files("laser_power"), {"a.h5"})
+
+    def test_case_sensitive_matches_first(self):
+        self.make_file("a.h5", 1.0)
+        path = self.make_file("b.h5", 2.0)
+        with h5py.File(path, "a") as file:
+            file["hardware/laser/settings"].attrs["Laser_Mode"] = "cw"
+        self.index.update(self.data_dir)
+        rows = self.index.search("Laser")
+        self.assertIn("Laser_Mode", rows[0][2])
+
+
+if __name__ == "__main__":
+    unittest.main()
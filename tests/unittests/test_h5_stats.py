@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from ScopeFoundry.data_browser.plug_ins.h5_search import (
+    compute_stats,
+    dataset_stats,
+    iter_blocks,
+    search_h5,
+)
+
+
+class H5StatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = str(Path(self.tmpdir.name) / "data.h5")
+        rng = np.random.default_rng(0)
+        self.data = rng.normal(size=(50, 40, 30))
+        self.data[3, 4, 5] = np.nan
+        with h5py.File(self.fname, "w") as file:
+            file.create_dataset(
+                "measurement/m/cube", data=self.data, chunks=(7, 40, 30)
+            )
+            file.create_dataset("measurement/m/counts", data=np.arange(1000))
+            file.create_dataset("measurement/m/names", data=[b"a", b"b", b"c", b"d"])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_blocks_aligned_to_chunks(self):
+        with h5py.File(self.fname, "r") as file:
+            node = file["measurement/m/cube"]
+            blocks = list(iter_blocks(node, block_bytes=10 * 40 * 30 * 8))
+            self.assertEqual([len(b) for b in blocks], [7] * 7 + [1])
+            stats = compute_stats(node)
+        self.assertFalse(stats["sampled"])
+        self.assertAlmostEqual(stats["min"], np.nanmin(self.data))
+        self.assertAlmostEqual(stats["max"], np.nanmax(self.data))
+        self.assertAlmostEqual(stats["mean"], np.nanmean(self.data))
+
+    def test_sampled_above_max_bytes(self):
+        with h5py.File(self.fname, "r") as file:
+            stats = compute_stats(file["measurement/m/counts"], max_bytes=1000)
+            self.assertTrue(stats["sampled"])
+            self.assertGreaterEqual(stats["min"], 0)
+            self.assertLessEqual(stats["max"], 999)
+            self.assertEqual(dataset_stats(file["measurement/m/names"]), "")
+
+    def test_stored_stats_are_reused(self):
+        search_h5(self.fname, "cube", store_stats=True)
+        with h5py.File(self.fname, "r+") as file:
+            node = file["measurement/m/cube"]
+            self.assertAlmostEqual(node.attrs["stats_max"], np.nanmax(self.data))
+            node.attrs["stats_max"] = 123.0
+        self.assertIn("max=123.0", search_h5(self.fname, "cube")[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
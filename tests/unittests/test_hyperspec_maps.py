@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from ScopeFoundry.data_browser.viewers.hyperspec_base import (
+    local_maxima,
+    map_spectra,
+    peak_map,
+    process_pool,
+    refine_peaks,
+    spectral_median,
+    spectral_median_map,
+)
+
+try:
+    import peakutils
+except ImportError:
+    peakutils = None
+
+
+class HyperspecMapsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.wls = np.linspace(400, 700, 60)
+        # small integers to get plateaus
+        self.cube = rng.integers(0, 6, (7, 9, 60)).astype(float)
+
+    def test_spectral_median_map(self):
+        ref = np.apply_along_axis(spectral_median, -1, self.cube, wls=self.wls)
+        np.testing.assert_array_equal(spectral_median_map(self.cube, self.wls), ref)
+        ref = np.apply_along_axis(
+            spectral_median, -1, self.cube, wls=self.wls, count_min=0
+        )
+        np.testing.assert_array_equal(
+            spectral_median_map(self.cube, self.wls, count_min=0), ref
+        )
+
+    @unittest.skipIf(peakutils is None, "requires peakutils")
+    def test_local_maxima(self):
+        is_peak = local_maxima(self.cube, 0.3)
+        for spec, mask in zip(self.cube.reshape(-1, 60), is_peak.reshape(-1, 60)):
+            ref = peakutils.indexes(spec, 0.3, min_dist=1)
+            np.testing.assert_array_equal(np.nonzero(mask)[0], ref)
+
+    def test_peak_map(self):
+        center = np.array([[510.0, 620.5], [450.0, 680.25]])
+        cube = 100 * np.exp(-0.5 * ((self.wls - center[..., None]) / 15) ** 2)
+        cube[1, 1] = 0
+        expected = center.copy()
+        expected[1, 1] = np.nan
+        np.testing.assert_allclose(
+            peak_map(cube, self.wls, 0.5, 30, "gaussian", True), expected
+        )
+        # the centroid is biased by the limited window
+        np.testing.assert_allclose(
+            peak_map(cube, self.wls, 0.5, 30, "centroid", True), expected, atol=0.05
+        )
+        unrefined = peak_map(cube, self.wls, 0.5, 30, False, True)
+        self.assertTrue(np.all(np.isin(unrefined[~np.isnan(expected)], self.wls)))
+
+    def test_refine_peaks_window_at_edge(self):
+        y = np.exp(-0.5 * ((self.wls - 400) / 15) ** 2)[None]
+        x = refine_peaks(y, self.wls, np.array([0]), method="gaussian")
+        np.testing.assert_allclose(x, [400])
+
+    def test_map_spectra(self):
+        result = map_spectra(np.sum, self.cube, n_workers=2, chunk_bytes=2000, axis=-1)
+        np.testing.assert_array_equal(result, self.cube.sum(-1))
+        # the worker processes are started once
+        pool = process_pool(2)
+        result = map_spectra(np.max, self.cube, n_workers=2, chunk_bytes=2000, axis=-1)
+        np.testing.assert_array_equal(result, self.cube.max(-1))
+        self.assertIs(process_pool(2), pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
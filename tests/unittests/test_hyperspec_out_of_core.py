@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from ScopeFoundry.data_browser.viewers.hyperspec_base import (
+    bin_2D,
+    bin_2D_out_of_core,
+    chunked_mean,
+    chunked_sum,
+    row_chunks,
+)
+
+
+class HyperspecOutOfCoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.cube = rng.poisson(50, (37, 21, 64)).astype(np.uint16)
+        self.h5_file = h5py.File(os.path.join(self.tmpdir.name, "cube.h5"), "w")
+        self.dset = self.h5_file.create_dataset(
+            "cube", data=self.cube, chunks=(4, 21, 64)
+        )
+        self.max_bytes = 10 * 21 * 64 * 2  # 10 rows
+
+    def tearDown(self):
+        self.h5_file.close()
+        self.tmpdir.cleanup()
+
+    def test_row_chunks(self):
+        self.assertEqual(list(row_chunks(self.cube)), [slice(0, 37)])
+        chunks = list(row_chunks(self.dset, self.max_bytes))
+        self.assertEqual(chunks[0], slice(0, 8))
+        self.assertEqual(chunks[-1].stop, 37)
+        chunks = list(row_chunks(self.dset, self.max_bytes, multiple=3))
+        self.assertTrue(all((c.stop - c.start) % 3 == 0 for c in chunks[:-1]))
+
+    def test_reductions(self):
+        np.testing.assert_array_equal(
+            chunked_sum(self.dset, self.max_bytes), self.cube.sum(-1)
+        )
+        self.assertAlmostEqual(
+            chunked_mean(self.dset, slice(5, 20), self.max_bytes),
+            self.cube[:, :, 5:20].mean(),
+        )
+
+    def test_bin_2D(self):
+        binned = bin_2D_out_of_core(self.dset, 3, self.max_bytes)
+        self.assertIsInstance(binned, np.memmap)
+        np.testing.assert_array_equal(binned, bin_2D(self.cube, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
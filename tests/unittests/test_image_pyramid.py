@@ -0,0 +1,120 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pyqtgraph as pg
+
+from ScopeFoundry.graphics.zoomable_map.image_pyramid import (
+    ImagePyramid,
+    box_downsample,
+    default_pyramid_location,
+)
+from ScopeFoundry.graphics.zoomable_map.zoomable_map import ZoomableMapImageItem
+
+
+class ImagePyramidTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = str(Path(self.tmpdir.name) / "mosaic.h5")
+        self.image = np.random.default_rng(0).random((600, 500))
+        with h5py.File(self.fname, "w") as file:
+            file.create_dataset("measurement/stitch/image", data=self.image)
+        self.file = h5py.File(self.fname, "r")
+        self.dset = self.file["measurement/stitch/image"]
+
+    def tearDown(self):
+        self.file.close()
+        self.tmpdir.cleanup()
+
+    def test_build_and_reopen(self):
+        pyramid = ImagePyramid(self.dset, n_levels=3, max_bytes=10_000)
+        self.assertFalse(pyramid.open())
+        self.assertIsNone(pyramid.level(1))
+        pyramid.build()
+        self.assertEqual(pyramid.level(3).shape, (75, 63))
+        np.testing.assert_allclose(pyramid.level(1), box_downsample(self.image, 2))
+        np.testing.assert_allclose(
+            pyramid.level(2)[:150, :125], box_downsample(self.image[:600, :500], 4)
+        )
+        pyramid.close()
+
+        with h5py.File(self.fname + ".pyramid.h5", "r") as file:
+            self.assertIn("pyramid/measurement/stitch/image/level_3", file)
+        pyramid = ImagePyramid(self.dset, n_levels=3)
+        self.assertTrue(pyramid.open())
+        pyramid.close()
+
+        # modified data is not shown with an outdated pyramid
+        stat = os.stat(self.fname)
+        os.utime(self.fname, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        pyramid = ImagePyramid(self.dset, n_levels=3)
+        self.assertFalse(pyramid.open())
+        pyramid.close()
+
+    def test_memory_pyramid_update_region(self):
+        image = self.image.copy()
+        pyramid = ImagePyramid(image, "memory", n_levels=3)
+        self.assertFalse(pyramid.open())
+        pyramid.build()
+        image[101:140, 77] = 10.0
+        pyramid.update_region(slice(101, 140), slice(77, 78))
+        for z in (1, 2, 3):
+            np.testing.assert_allclose(
+                pyramid.level(z), box_downsample(pyramid.level(z - 1), 2)
+            )
+        self.assertGreater(pyramid.level(3).max(), 1.0)
+
+    def test_zoomable_map_reads_levels(self):
+        qtapp = pg.mkQApp()
+        zmi = ZoomableMapImageItem(pg.PlotItem(), self.dset, tile_size=64)
+        zmi.pyramid.wait()
+        self.assertEqual(zmi.pyramid.built_levels, zmi.get_max_zoom())
+        zmi.wanted_tiles = {(2, 1, 0)}
+        zmi.update_visible_tiles()
+        t0 = time.time()
+        while zmi.pending and time.time() - t0 < 10:
+            qtapp.processEvents()
+            time.sleep(0.005)
+        qtapp.processEvents()
+        np.testing.assert_array_equal(
+            zmi.tile_cache[(2, 1, 0)].data, zmi.pyramid.level(2)[64:128, :64]
+        )
+        zmi.shutdown()
+
+    def test_memmap_source(self):
+        mm = np.lib.format.open_memmap(
+            str(Path(self.tmpdir.name) / "mosaic.npy"), "w+", np.uint8, (300, 200, 3)
+        )
+        mm[:] = (self.image[:300, :200, None] * 255).astype(np.uint8)
+        pyramid = ImagePyramid(mm, n_levels=2)
+        pyramid.build()
+        self.assertEqual(pyramid.level(2).shape, (75, 50, 3))
+        self.assertEqual(pyramid.level(2).dtype, np.uint8)
+        pyramid.close()
+
+        # views of the same file (channels, slices) have their own pyramid
+        views = [mm[:, :, 0], mm[:, :, 1], mm[:150], mm[150:], mm[:150, :100]]
+        locations = {default_pyramid_location(v) for v in views}
+        self.assertEqual(len(locations), len(views))
+        self.assertNotIn(default_pyramid_location(mm), locations)
+        for view in views:
+            pyramid = ImagePyramid(view, n_levels=1)
+            self.assertFalse(pyramid.open())
+            pyramid.build()
+            np.testing.assert_allclose(
+                pyramid.level(1), box_downsample(np.asarray(view), 2)
+            )
+            pyramid.close()
+        pyramid = ImagePyramid(mm[:, :, 1], n_levels=1)
+        self.assertTrue(pyramid.open())
+        pyramid.close()
+        del mm, views
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import time
+import unittest
+
+from qtpy import QtWidgets
+
+from ScopeFoundry import BaseMicroscopeApp, Measurement
+
+
+class FigureMeasure(Measurement):
+
+    name = "figure_measure"
+
+    def setup_figure(self):
+        self.ui = QtWidgets.QLabel(self.name)
+
+    def run(self):
+        pass
+
+
+class OtherFigureMeasure(FigureMeasure):
+
+    name = "other_figure_measure"
+
+
+class SlowFigureMeasure(FigureMeasure):
+
+    name = "slow_figure_measure"
+
+    def setup_figure(self):
+        time.sleep(1.5)
+        super().setup_figure()
+
+
+class NestingMeasure(FigureMeasure):
+
+    name = "nesting_measure"
+
+    def run(self):
+        self.result = self.start_nested_measure_and_wait(
+            self.app.measurements["slow_figure_measure"]
+        )
+
+
+class LazyApp(BaseMicroscopeApp):
+
+    def setup(self):
+        self.add_measurement(FigureMeasure(self))
+        self.add_measurement(OtherFigureMeasure(self))
+        self.add_measurement(SlowFigureMeasure(self))
+        self.add_measurement(NestingMeasure(self))
+
+
+class LazyMeasureUITest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = LazyApp([])
+
+    def tearDown(self):
+        self.app.qtapp.exit()
+        # subwindows added after the window was shown, delete before shutdown
+        self.app.ui.deleteLater()
+        self.app.qtapp.processEvents()
+        del self.app
+
+    def process_events(self, duration=0.2):
+        t0 = time.time()
+        while time.time() - t0 < duration:
+            self.app.qtapp.processEvents()
+
+    def test_figures_built_on_show_or_idle(self):
+        m = self.app.measurements["other_figure_measure"]
+        self.assertFalse(hasattr(m, "ui"))
+        self.assertIsNone(m.subwin)
+
+        m.show_ui()
+        self.assertIsNotNone(m.subwin)
+        self.assertNotIn("setup_figure", self.app.startup_timing["mm/figure_measure"])
+
+        self.process_events()
+        self.assertIsNotNone(self.app.measurements["figure_measure"].subwin)
+        report = self.app.startup_timing_report()
+        self.assertIn("app window shown", report)
+        self.assertIn("mm/figure_measure", report)
+        self.assertIn("setup_figure", report)
+
+    def test_nested_start_waits_for_slow_figure(self):
+        # the figure is built when the nested measurement starts
+        self.app._load_next_measure_ui = lambda: None
+        m = self.app.measurements["nesting_measure"]
+        m.start()
+        t0 = time.time()
+        while m.settings["activation"] and time.time() - t0 < 10:
+            self.app.qtapp.processEvents()
+            time.sleep(0.005)
+        self.assertTrue(m.result)
+        slow = self.app.measurements["slow_figure_measure"]
+        self.assertEqual(slow.settings["run_state"], "stop_success")
+
+
+if __name__ == "__main__":
+    unittest.main()
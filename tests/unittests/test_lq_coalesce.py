@@ -0,0 +1,90 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from ScopeFoundry import BaseApp
+
+
+class LQCoalesceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = BaseApp([])
+        self.settings = self.app.settings
+        self.position = self.settings.New("position", float, initial=0)
+
+    def tearDown(self):
+        self.app.qtapp.exit()
+        del self.app
+
+    def update_from_thread(self, lq, n):
+        thread = threading.Thread(
+            target=lambda: [lq.update_value(i + 1.0) for i in range(n)]
+        )
+        thread.start()
+        thread.join()
+
+    def process_events(self, duration=0.3):
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < duration:
+            self.app.qtapp.processEvents()
+            time.sleep(0.01)
+
+    def test_coalesced_updates_from_thread(self):
+        received = []
+        self.position.add_listener(received.append, float)
+        self.settings.set_coalesce_rate(20)
+
+        N = 5000
+        self.update_from_thread(self.position, N)
+        self.process_events()
+
+        self.assertEqual(received[-1], N)
+        self.assertLess(self.position.n_emitted, 10)
+        self.assertEqual(self.position.n_emitted + self.position.n_coalesced, N)
+
+    def test_equal_value_of_other_type_keeps_pending_update(self):
+        received = []
+        self.position.add_listener(received.append, float)
+        self.position.set_coalesce_rate(20)
+
+        def updates():
+            self.position.update_value(1.0)
+            # equal value, but not a float: takes the slow path of update_value
+            self.position.update_value(np.float64(1.0))
+
+        thread = threading.Thread(target=updates)
+        thread.start()
+        thread.join()
+        self.process_events()
+
+        self.assertEqual(self.position.val, 1.0)
+        self.assertEqual(received, [1.0])
+
+    def test_collection_rate_applies_to_new_lqs(self):
+        self.settings.set_coalesce_rate(10)
+        lq = self.settings.New("late", float)
+        self.assertEqual(lq.coalesce_rate, 10)
+
+    def test_gui_thread_updates_are_not_coalesced(self):
+        received = []
+        self.position.add_listener(received.append, float)
+        self.position.set_coalesce_rate(20)
+        for i in range(5):
+            self.position.update_value(i + 1.0)
+        self.assertEqual(received, [1, 2, 3, 4, 5])
+        self.assertEqual(self.position.n_coalesced, 0)
+
+    def test_lazy_string_value(self):
+        calls = []
+        self.position.string_value = lambda: calls.append(1) or "x"
+        self.position.update_value(1.0)
+        self.assertEqual(calls, [])
+        self.position.updated_text_value.connect(lambda s: None)
+        self.position.update_value(2.0)
+        self.assertEqual(calls, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
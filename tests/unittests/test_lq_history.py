@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from ScopeFoundry import BaseMicroscopeApp
+from ScopeFoundry.logged_quantity import LQHistory
+from ScopeFoundry.measurement import Measurement
+
+
+class HistoryMeasure(Measurement):
+
+    name = "history_test"
+
+    def setup(self):
+        self.lq_history_paths = ["app/temperature"]
+
+
+class LQHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_ring_buffer_window(self):
+        history = LQHistory(int, size=10)
+        for i in range(25):
+            history.append(i, t=100.0 + i)
+        self.assertEqual(len(history), 10)
+        times, values = history.window()
+        np.testing.assert_array_equal(values, np.arange(15, 25))
+        times, values = history.window(t0=117, t1=119.5)
+        np.testing.assert_array_equal(times, [117, 118, 119])
+        np.testing.assert_array_equal(values, [17, 18, 19])
+
+    def test_spill_to_h5(self):
+        with h5py.File(Path(self.tmpdir.name) / "log.h5", "w") as h5_file:
+            history = LQHistory(float, size=8)
+            history.spill_to(h5_file.create_group("temperature"), spill_size=4)
+            for i in range(30):
+                history.append(i * 0.5, t=1000.0 + i)
+            # older samples are read from the log
+            times, values = history.window(t0=1003, t1=1025)
+            np.testing.assert_array_equal(times, 1000.0 + np.arange(3, 26))
+            np.testing.assert_array_equal(values, 0.5 * np.arange(3, 26))
+            history.close()
+            np.testing.assert_array_equal(
+                h5_file["temperature/value"][:], 0.5 * np.arange(30)
+            )
+
+    def test_measurement_saves_history(self):
+        app = BaseMicroscopeApp([])
+        app.settings["save_dir"] = self.tmpdir.name
+        temperature = app.settings.New("temperature", float, unit="K")
+        m = app.add_measurement(HistoryMeasure(app))
+
+        m.enable_lq_history()
+        m.open_new_h5_file()
+        for t in (300.0, 301.5, 302.0):
+            temperature.update_value(t)
+        fname = m.h5_file.filename
+        m.close_h5_file()
+
+        with h5py.File(fname, "r") as h5_file:
+            group = h5_file["measurement/history_test/lq_history/app/temperature"]
+            # value at the start of the run, then the changes
+            self.assertEqual(list(group["value"][:]), [0.0, 300.0, 301.5, 302.0])
+            self.assertEqual(group.attrs["unit"], "K")
+            self.assertTrue(np.all(np.diff(group["time"][:]) >= 0))
+        self.assertRaises(ValueError, app.settings.New("name", str).enable_history)
+        app.qtapp.exit()
+
+
+if __name__ == "__main__":
+    unittest.main()
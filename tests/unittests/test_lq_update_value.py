@@ -0,0 +1,66 @@
+import threading
+import unittest
+
+import numpy as np
+import pyqtgraph as pg
+
+from ScopeFoundry.logged_quantity import LoggedQuantity
+
+
+class ClippedLQ(LoggedQuantity):
+
+    def coerce_to_type(self, x):
+        return min(float(x), 10.0)
+
+
+class LQUpdateValueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.qtapp = pg.mkQApp()
+
+    def test_coercion(self):
+        lq = LoggedQuantity("n", dtype=int)
+        lq.update_value(np.int64(3))
+        self.assertIs(type(lq.val), int)
+        lq.update_value("4")
+        self.assertEqual(lq.val, 4)
+        self.assertEqual(list(lq.prev_vals), [3, 0])
+
+        flag = LoggedQuantity("flag", dtype=bool)
+        flag.update_value("True")
+        self.assertIs(flag.val, True)
+
+        # overridden coerce_to_type is always used
+        clipped = ClippedLQ("clipped")
+        clipped.update_value(20.0)
+        self.assertEqual(clipped.val, 10.0)
+
+    def test_unchanged_values_send_no_signals(self):
+        lq = LoggedQuantity("x", dtype=float)
+        received = []
+        lq.add_listener(received.append, float)
+        lq.update_value(1.0)
+        lq.update_value(1.0)
+        lq.update_value(1)
+        self.assertEqual(received, [1.0])
+
+    def test_update_from_thread(self):
+        lq = LoggedQuantity("progress", dtype=float)
+        errors = []
+
+        def target():
+            try:
+                for i in range(1000):
+                    lq.update_value(i / 10)
+            except Exception as err:
+                errors.append(err)
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(lq.val, 99.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from ScopeFoundry.scanning.min_travel_path import (
+    min_travel_order,
+    move_times,
+    path_time,
+)
+from ScopeFoundry.sweeping.sweep_paths import get_sweep_path
+
+
+class MinTravelPathTest(unittest.TestCase):
+
+    def test_move_times(self):
+        t = move_times((0, 0), np.array([[0, 0], [2, 0], [2, 1]]), (1, 4), (0.5, 0.1))
+        np.testing.assert_allclose(t, [0, 2.5, 2.5])
+        t = move_times((0, 0), (0.1, 4), (1, 4), (0.5, 0.1))
+        np.testing.assert_allclose(t, 1.1)
+
+    def test_masked_grid(self):
+        yy, xx = np.indices((40, 60))
+        mask = (xx - 20) ** 2 + (yy - 20) ** 2 < 15**2
+        mask |= (xx - 48) ** 2 + (yy - 25) ** 2 < 8**2
+        positions = np.stack([xx[mask], yy[mask]], axis=1).astype(float)
+
+        velocities, settle_times = (2.0, 1.0), (0.01, 0.05)
+        order = min_travel_order(positions, velocities, settle_times, time_limit=1)
+
+        self.assertEqual(order[0], 0)
+        np.testing.assert_array_equal(np.sort(order), np.arange(len(positions)))
+        t_raster = path_time(positions, velocities, settle_times)
+        t_min = path_time(positions[order], velocities, settle_times)
+        self.assertLess(t_min, t_raster)
+
+    def test_few_points_begin_at_start(self):
+        positions = np.array([[0.0, 0.0], [1.0, 0.0]])
+        np.testing.assert_array_equal(min_travel_order(positions, start=1), [1, 0])
+        np.testing.assert_array_equal(min_travel_order(positions[:1]), [0])
+        self.assertEqual(len(min_travel_order(positions[:0])), 0)
+
+    def test_sweep_path(self):
+        arrays = (np.linspace(0, 1, 5), np.linspace(0, 1, 4), np.array([0, 1.0]))
+        sweep_path = get_sweep_path("min_travel")
+        self.assertEqual(sweep_path.data_shape(*arrays), (5, 4, 2))
+        positions, indices = sweep_path.path(*arrays, velocities=(1, 1, 10))
+        self.assertEqual(len(set(map(tuple, indices))), 5 * 4 * 2)
+        for ax, arr in enumerate(arrays):
+            np.testing.assert_array_equal(positions[:, ax], arr[indices[:, ax]])
+
+
+if __name__ == "__main__":
+    unittest.main()
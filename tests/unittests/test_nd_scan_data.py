@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from ScopeFoundry.sweeping.nd_scan_data import (
+    ChunkWriteBuffer,
+    axis_order_from_indices,
+    plan_chunk_shape,
+)
+from ScopeFoundry.sweeping.sweep_2D_modes import mk_indices_gen
+
+
+class NDScanDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.h5_file = h5py.File(os.path.join(self.tmp_dir.name, "test.h5"), "w")
+
+    def tearDown(self):
+        self.h5_file.close()
+        self.tmp_dir.cleanup()
+
+    def test_axis_order_from_indices(self):
+        ar_1, ar_2 = np.arange(3), np.arange(4)
+        self.assertEqual(
+            axis_order_from_indices(mk_indices_gen(ar_1, ar_2, "nested")), (0, 1)
+        )
+        self.assertEqual(
+            axis_order_from_indices(mk_indices_gen(ar_1, ar_2, "nested_swap_order")),
+            (1, 0),
+        )
+
+    def test_plan_chunk_shape(self):
+        # fastest axis is filled first, items are kept whole
+        chunks = plan_chunk_shape((100, 100, 1), (512,), 8, (0, 1, 2), 1 << 20)
+        self.assertEqual(chunks, (2, 100, 1, 512))
+
+        chunks = plan_chunk_shape((100, 100, 1), (512,), 8, (1, 0, 2), 1 << 20)
+        self.assertEqual(chunks, (100, 2, 1, 512))
+
+        # items larger than target are split
+        chunks = plan_chunk_shape((10, 1), (2048, 2048), 4, (0, 1), 1 << 20)
+        self.assertEqual(chunks[:2], (1, 1))
+        self.assertLessEqual(np.prod(chunks) * 4, 1 << 20)
+
+    def test_chunk_write_buffer(self):
+        shape = (5, 7, 2, 3)
+        data = np.zeros(shape)
+        dset = self.h5_file.create_dataset("d", shape, dtype=float, chunks=(2, 7, 2, 3))
+        write_buffer = ChunkWriteBuffer(dset, data, 3, max_pending_bytes=1000)
+
+        expected = np.random.default_rng(0).random(shape)
+        for k, l in mk_indices_gen(np.arange(5), np.arange(7), "serpentine"):
+            for r in range(2):
+                write_buffer.write((k, l, r), expected[k, l, r])
+
+        # complete chunks are written without explicit flush
+        self.assertEqual(len(write_buffer.dirty), 0)
+        np.testing.assert_array_equal(dset[:], expected)
+
+    def test_chunk_write_buffer_partial(self):
+        shape = (4, 4)
+        data = np.zeros(shape)
+        dset = self.h5_file.create_dataset("d", shape, dtype=float, chunks=(2, 2))
+        write_buffer = ChunkWriteBuffer(dset, data, 2, max_pending_bytes=64)
+
+        write_buffer.write((0, 0), 1.0)
+        write_buffer.write((0, 2), 2.0)
+        self.assertEqual(list(write_buffer.dirty), [(0, 0), (0, 1)])
+        # exceeding max_pending_bytes writes the oldest chunk early
+        write_buffer.write((2, 0), 3.0)
+        self.assertEqual(list(write_buffer.dirty), [(0, 1), (1, 0)])
+        self.assertEqual(dset[0, 0], 1.0)
+
+        write_buffer.flush()
+        self.assertEqual(len(write_buffer.dirty), 0)
+        np.testing.assert_array_equal(dset[:], data)
@@ -0,0 +1,121 @@
+import time
+import unittest
+
+from ScopeFoundry import BaseMicroscopeApp, Measurement
+
+
+class Inner(Measurement):
+
+    name = "inner"
+
+    def setup(self):
+        self.settings.New("n_steps", int, initial=5)
+
+    def run(self):
+        # n_steps < 0 runs until interrupted
+        i = 0
+        while i != self.settings["n_steps"]:
+            if self.interrupt_measurement_called:
+                break
+            time.sleep(0.01)
+            i += 1
+
+
+class Outer(Measurement):
+
+    name = "outer"
+
+    def setup(self):
+        self.settings.New("n_nested", int, initial=2)
+        self.settings.New("nested_interrupt", bool, initial=True)
+        self.results = []
+
+    def run(self):
+        self.results = []
+        inner = self.app.measurements["inner"]
+        for _ in range(self.settings["n_nested"]):
+            if self.interrupt_measurement_called:
+                break
+            self.results.append(
+                self.start_nested_measure_and_wait(
+                    inner, nested_interrupt=self.settings["nested_interrupt"]
+                )
+            )
+
+
+class App(BaseMicroscopeApp):
+
+    mdi = False
+
+    def setup(self):
+        self.add_measurement(Inner(self))
+        self.add_measurement(Outer(self))
+
+
+class NestedMeasurementTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App([])
+        self.inner = self.app.measurements["inner"]
+        self.outer = self.app.measurements["outer"]
+
+    def tearDown(self):
+        self.app.qtapp.exit()
+        del self.app
+
+    def process_events_until(self, condition, timeout=10.0):
+        t0 = time.monotonic()
+        while not condition() and time.monotonic() - t0 < timeout:
+            self.app.qtapp.processEvents()
+            time.sleep(0.005)
+        self.assertTrue(condition())
+
+    def run_outer(self):
+        self.outer.start()
+        self.process_events_until(
+            lambda: self.outer.settings["run_state"].startswith("stop")
+            and not self.outer.settings["activation"]
+        )
+
+    def test_completion(self):
+        self.run_outer()
+        self.assertEqual(self.outer.results, [True, True])
+        self.assertEqual(self.outer.settings["run_state"], "stop_success")
+        self.assertEqual(self.inner.settings["run_state"], "stop_success")
+
+    def test_outer_interrupt_propagates(self):
+        self.inner.settings["n_steps"] = -1
+        self.outer.start()
+        self.process_events_until(lambda: self.inner.is_measuring())
+        self.outer.interrupt()
+        self.process_events_until(lambda: not self.outer.is_measuring())
+        self.assertEqual(self.outer.results, [False])
+        self.assertEqual(self.outer.settings["run_state"], "stop_interrupted")
+        self.assertEqual(self.inner.settings["run_state"], "stop_interrupted")
+        # the one-shot flags are reset for the next run
+        self.assertFalse(self.outer.interrupt_measurement_called)
+        self.assertFalse(self.inner.interrupt_measurement_called)
+
+    def test_nested_interrupt_bubbles_up(self):
+        self.inner.settings["n_steps"] = -1
+        self.outer.start()
+        self.process_events_until(lambda: self.inner.is_measuring())
+        self.inner.interrupt()
+        self.process_events_until(lambda: not self.outer.is_measuring())
+        self.assertEqual(self.outer.results, [False])
+        self.assertEqual(self.outer.settings["run_state"], "stop_interrupted")
+
+    def test_nested_interrupt_disabled(self):
+        self.inner.settings["n_steps"] = -1
+        self.outer.settings["nested_interrupt"] = False
+        self.outer.start()
+        self.process_events_until(lambda: self.inner.is_measuring())
+        self.inner.settings["n_steps"] = 5  # the second nested run completes
+        self.inner.interrupt()
+        self.process_events_until(lambda: not self.outer.is_measuring())
+        self.assertEqual(self.outer.results, [False, True])
+        self.assertEqual(self.outer.settings["run_state"], "stop_success")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from ScopeFoundry import BaseMicroscopeApp
+from ScopeFoundry.examples.ScopeFoundryHW.simulon_xyz_stage.simulon_xyz_stage_hw import (
+    SimulonXYZStageHW,
+)
+
+
+class ResolveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = BaseMicroscopeApp([])
+        self.stage = self.app.add_hardware(SimulonXYZStageHW(self.app))
+
+    def tearDown(self):
+        self.app.qtapp.exit()
+        del self.app
+
+    def test_read_write(self):
+        handle = self.app.resolve("hw/simulon_xyz_stage/x_target_position")
+        self.assertIs(
+            handle, self.app.resolve("hw/simulon_xyz_stage/x_target_position")
+        )
+        self.stage.settings["connected"] = True
+        handle.write(12.5)
+        self.assertEqual(self.stage.stage_device.x, 12.5)
+
+        position = self.app.resolve("hw/simulon_xyz_stage/x_position")
+        self.assertAlmostEqual(position.read(), 12.5, places=1)
+        self.stage.stage_device.write_x(-3.0)
+        self.assertAlmostEqual(position.read(from_hardware=False), 12.5, places=1)
+        self.assertAlmostEqual(position.read(), -3.0, places=1)
+        self.stage.settings["connected"] = False
+
+    def test_invalidation(self):
+        handle = self.app.resolve("app/resolve_test")
+        self.assertRaises(KeyError, handle.read)
+
+        lq = self.app.settings.New("resolve_test", int, initial=3)
+        self.assertIs(handle.lq, lq)
+        self.assertEqual(handle.read(), 3)
+
+        self.app.settings.remove("resolve_test")
+        self.assertRaises(KeyError, handle.write, 4)
+        lq = self.app.settings.New("resolve_test", float, initial=1.5)
+        self.assertIs(handle.lq, lq)
+
+
+if __name__ == "__main__":
+    unittest.main()
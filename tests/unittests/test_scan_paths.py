@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+
+from ScopeFoundry.scanning.base_raster_scan import ijk_zigzag_generator
+from ScopeFoundry.scanning.min_travel_path import move_times, path_time
+from ScopeFoundry.scanning.scan_paths import (
+    gen_scan_path,
+    iter_scan_path,
+    scan_path_moves,
+    scan_path_npixels,
+    zigzag_indices,
+)
+
+
+def reference_path(scan_type, Nh, Nv, Nz=1):
+    """loop implementation of the scan generators, used to validate scan_paths"""
+    index_array, slow_move, start_move = [], [], []
+
+    def add(kk, jj, ii, slow=False, start=False):
+        index_array.append((kk, jj, ii))
+        slow_move.append(slow)
+        start_move.append(start)
+
+    if scan_type in ("raster", "serpentine"):
+        for kk in range(Nz):
+            for jj in range(Nv):
+                line = range(Nh)
+                if scan_type == "serpentine" and jj % 2:
+                    line = line[::-1]
+                for n, ii in enumerate(line):
+                    add(kk, jj, ii, n == 0, n == 0 and jj == 0)
+    if scan_type in ("trace_retrace", "ortho_trace_retrace"):
+        for jj in range(Nv):
+            for kk, step in [(0, 1), (1, -1)]:
+                for n, ii in enumerate(range(Nh)[::step]):
+                    add(kk, jj, ii, n == 0 and kk == 0, n == 0 and kk == 0 and jj == 0)
+    if scan_type == "ortho_trace_retrace":
+        for ii in range(Nh):
+            for kk, step in [(2, 1), (3, -1)]:
+                for n, jj in enumerate(range(Nv)[::step]):
+                    add(kk, jj, ii, n == 0 and kk == 2, n == 0 and kk == 2 and ii == 0)
+    if scan_type == "ortho_raster":
+        for jj in range(Nv):
+            for ii in range(Nh):
+                add(0, jj, ii, ii == 0, ii == 0 and jj == 0)
+        for ii in range(Nh):
+            for jj in range(Nv):
+                add(1, jj, ii, jj == 0, ii == 0 and jj == 0)
+    return np.array(index_array), np.array(slow_move), np.array(start_move)
+
+
+def reference_zigzag(dims, axis_order):
+    ax0, ax1, ax2 = axis_order
+    for i_ax0 in range(dims[ax0]):
+        zig_or_zag0 = (1, -1)[i_ax0 % 2]
+        for i_ax1 in range(dims[ax1])[::zig_or_zag0]:
+            zig_or_zag1 = (1, -1)[(i_ax0 + i_ax1) % 2]
+            for i_ax2 in range(dims[ax2])[::zig_or_zag1]:
+                ijk = [0, 0, 0]
+                ijk[ax0] = i_ax0
+                ijk[ax1] = i_ax1
+                ijk[ax2] = i_ax2
+                yield tuple(ijk)
+
+
+class ScanPathsTest(unittest.TestCase):
+
+    def test_paths_match_reference(self):
+        for scan_type in (
+            "raster",
+            "serpentine",
+            "trace_retrace",
+            "ortho_raster",
+            "ortho_trace_retrace",
+        ):
+            for Nh, Nv, Nz in [(1, 1, 1), (4, 3, 1), (3, 5, 2)]:
+                if Nz > 1 and scan_type not in ("raster", "serpentine"):
+                    continue
+                expected = reference_path(scan_type, Nh, Nv, Nz)
+                result = gen_scan_path(scan_type, Nh, Nv, Nz)
+                self.assertEqual(
+                    scan_path_npixels(scan_type, Nh, Nv, Nz), len(expected[0])
+                )
+                for e, r in zip(expected, result):
+                    np.testing.assert_array_equal(r, e, err_msg=scan_type)
+
+    def test_scan_path_moves(self):
+        steps = np.array([0.5, 2.0])
+        costs = ((1.0, 3.0), (0.1, 0.2))
+        for scan_type in (
+            "raster",
+            "serpentine",
+            "trace_retrace",
+            "ortho_raster",
+            "ortho_trace_retrace",
+        ):
+            for Nh, Nv in [(1, 1), (1, 4), (5, 1), (4, 3), (7, 6)]:
+                index_array, _, _ = gen_scan_path(scan_type, Nh, Nv)
+                expected = path_time(index_array[:, 2:0:-1] * steps, *costs)
+                moves = np.array(scan_path_moves(scan_type, Nh, Nv))
+                t = move_times(0.0, moves[:, 1:] * steps, *costs)
+                self.assertAlmostEqual((moves[:, 0] * t).sum(), expected, msg=scan_type)
+
+    def test_iter_scan_path(self):
+        full = gen_scan_path("serpentine", 7, 5, 3)
+        chunks = list(iter_scan_path("serpentine", 7, 5, 3, chunk_size=16))
+        self.assertEqual(chunks[1][0], 16)
+        for i in range(3):
+            np.testing.assert_array_equal(
+                np.concatenate([c[i + 1] for c in chunks]), full[i]
+            )
+
+    def test_zigzag(self):
+        for axis_order in [(0, 1, 2), (2, 0, 1), (1, 2, 0)]:
+            expected = list(reference_zigzag((3, 4, 5), axis_order))
+            np.testing.assert_array_equal(
+                zigzag_indices((3, 4, 5), axis_order), expected
+            )
+            self.assertEqual(
+                list(ijk_zigzag_generator((3, 4, 5), axis_order, chunk_size=7)),
+                expected,
+            )
@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+
+from ScopeFoundry.sweeping.sweep_2D_modes import mk_indices_gen, mk_positions_gen
+from ScopeFoundry.sweeping.sweep_paths import (
+    SWEEP_PATHS,
+    get_sweep_path,
+    sweep_path_names,
+)
+
+
+class SweepPathsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.arrays = [np.linspace(0, 1, n) for n in (3, 4, 2, 5, 2)]
+
+    def test_nested(self):
+        positions, indices = get_sweep_path("nested").path(*self.arrays[:2])
+        self.assertEqual(positions.shape, (12, 2))
+        np.testing.assert_array_equal(
+            indices[:5], [[0, 0], [0, 1], [0, 2], [0, 3], [1, 0]]
+        )
+        np.testing.assert_array_equal(positions[4], [0.5, 0.0])
+        self.assertEqual(get_sweep_path("nested").data_shape(*self.arrays[:2]), (3, 4))
+
+    def test_serpentine_steps_one_axis_at_a_time(self):
+        for ndim in (2, 3, 5):
+            _, indices = get_sweep_path("serpentine").path(*self.arrays[:ndim])
+            self.assertEqual(len(np.unique(indices, axis=0)), len(indices))
+            steps = np.abs(np.diff(indices, axis=0)).sum(axis=1)
+            np.testing.assert_array_equal(steps, 1)
+
+    def test_co_move_groups(self):
+        sweep_path = get_sweep_path("2,3_co-move")
+        arrays = [np.arange(2), np.arange(3) * 10, np.arange(3) * 100]
+        positions, indices = sweep_path.path(*arrays)
+        self.assertEqual(sweep_path.data_shape(*arrays), (2, 1, 3))
+        np.testing.assert_array_equal(positions[4], [1, 10, 100])
+        np.testing.assert_array_equal(indices[4], [1, 0, 1])
+
+        settings = {"range_1_num": 2, "range_2_num": 7, "range_3_num": 3}
+        sweep_path.make_ranges_consistent(settings, "123")
+        self.assertEqual(settings["range_2_num"], 3)
+
+    def test_modes_generators(self):
+        ar_1, ar_2 = self.arrays[:2]
+        self.assertEqual(
+            list(mk_indices_gen(ar_1, ar_2, "serpentine"))[3:6],
+            [(0, 3), (1, 3), (1, 2)],
+        )
+        self.assertEqual(next(mk_positions_gen(ar_2, ar_2, "co-move")), (0.0, 0.0))
+
+    def test_path_names(self):
+        self.assertEqual(sweep_path_names(1), ("NA",))
+        self.assertIn("serpentine", sweep_path_names(5))
+        self.assertNotIn("2,3_co-move", sweep_path_names(4))
+        for name in sweep_path_names(3):
+            self.assertTrue(SWEEP_PATHS[name].supports(3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import glob
+import os
+import tempfile
+import time
+import unittest
+
+import h5py
+import numpy as np
+
+from ScopeFoundry import BaseMicroscopeApp, HardwareComponent
+from ScopeFoundry.sweeping import Sweep1D
+from ScopeFoundry.sweeping.collector import Collector
+
+
+class Stage(HardwareComponent):
+    name = "stage"
+
+    def setup(self):
+        self.settings.New("x", float, initial=0)
+
+
+class SpectrumCollector(Collector):
+    name = "spectrometer"
+    repeated_dset_names = ("spectrum",)
+    settings_to_collect = ("hw/stage/x",)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.spectrum = np.zeros(64)
+
+    def run(self, index, host_measurement, *args, **kwargs):
+        # reuses its array like most detectors do
+        self.spectrum[:] = index + self.app.get_lq("hw/stage/x").val
+        self.data = {"spectrum": self.spectrum}
+
+
+class App(BaseMicroscopeApp):
+
+    mdi = False
+
+    def setup(self):
+        self.add_hardware(Stage(self))
+        self.sweep = self.add_measurement(
+            Sweep1D(
+                self,
+                actuators=[("x", "hw/stage/x")],
+                collectors=[SpectrumCollector(self)],
+                n_read_any_settings=0,
+                n_any_measurements=0,
+            )
+        )
+
+
+class SweepPipelinedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = App([])
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.sweep = self.app.sweep
+        self.sweep.setup_figure()
+        s = self.sweep.settings
+        s["actuator_1"] = "x"
+        s["spectrometer_repetitions"] = 2
+        s["range_1_num"] = 20
+        s["collection_delay"] = 0.001
+
+    def tearDown(self):
+        self.app.qtapp.exit()
+        del self.app
+        self.tmp_dir.cleanup()
+
+    def run_sweep(self, pipelined):
+        save_dir = tempfile.mkdtemp(dir=self.tmp_dir.name)
+        self.app.settings["save_dir"] = save_dir
+        self.sweep.settings["pipelined"] = pipelined
+        self.sweep.start()
+        t0 = time.monotonic()
+        while self.sweep.is_measuring() and time.monotonic() - t0 < 10:
+            self.app.qtapp.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(self.sweep.settings["run_state"], "stop_success")
+        (fname,) = glob.glob(os.path.join(save_dir, "*.h5"))
+        with h5py.File(fname) as h5_file:
+            group = h5_file["measurement/sweep_1d"]
+            return {
+                name: dset[()]
+                for name, dset in group.items()
+                if isinstance(dset, h5py.Dataset)
+            }
+
+    def test_pipelined_file_is_identical(self):
+        serial = self.run_sweep(False)
+        pipelined = self.run_sweep(True)
+        self.assertEqual(sorted(serial), sorted(pipelined))
+        for name, data in serial.items():
+            np.testing.assert_array_equal(data, pipelined[name], err_msg=name)
+        self.assertEqual(pipelined["spectrometer_spectrum_raw"][19, 1, 0], 19 + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import tempfile
+import time
+import unittest
+
+import h5py
+import numpy as np
+
+from ScopeFoundry import BaseMicroscopeApp, TelemetryLogger
+from ScopeFoundry.examples.ScopeFoundryHW.simulon_xyz_stage.simulon_xyz_stage_hw import (
+    SimulonXYZStageHW,
+)
+from ScopeFoundry.telemetry.telemetry_logger import parse_paths, peak_downsample
+
+
+class TelemetryLoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = BaseMicroscopeApp([])
+        self.app.settings["save_dir"] = self.tmpdir.name
+        self.stage = self.app.add_hardware(SimulonXYZStageHW(self.app))
+        self.stage.settings["connected"] = True
+        self.logger = self.app.add_measurement(TelemetryLogger(self.app))
+        self.logger.settings["log_dir"] = self.tmpdir.name
+
+    def tearDown(self):
+        self.app.qtapp.exit()
+        del self.app
+        self.tmpdir.cleanup()
+
+    def test_parse_paths_and_downsample(self):
+        self.assertEqual(
+            parse_paths("hw/a/x@10, hw/b/y,"), {"hw/a/x": 10.0, "hw/b/y": None}
+        )
+        for text in ("hw/a/x@0", "hw/a/x@-1"):
+            with self.assertRaises(ValueError):
+                parse_paths(text)
+        values = np.zeros(1000)
+        values[500] = 7.0
+        times, down = peak_downsample(np.arange(1000.0), values, 100)
+        self.assertEqual(len(down), 100)
+        self.assertEqual(down.max(), 7.0)
+
+    def test_display_updates_of_changed_values(self):
+        self.stage.stage_device.noise = lambda: 0.0
+        # settings read one by one: LoggedQuantity.read_from_hardware
+        self.stage.disconnect_batch_read()
+        lq = self.stage.settings.get_lq("x_position")
+        lq.read_from_hardware()
+        self.logger.set_paths({"hw/simulon_xyz_stage/x_position": 10})
+        self.logger.pre_run()
+        emitted = []
+        lq.updated_value[float].connect(emitted.append)
+
+        self.stage.stage_device.x = 5.0
+        # read again unchanged before the display update
+        self.logger.sample(self.logger.groups)
+        self.logger.sample(self.logger.groups)
+        self.assertEqual(emitted, [])
+        self.logger.send_display_updates()
+        self.assertEqual(emitted, [5.0])
+        # nothing changed since
+        self.logger.sample(self.logger.groups)
+        self.logger.send_display_updates()
+        self.assertEqual(emitted, [5.0])
+
+    def test_batched_reads_to_daily_file(self):
+        n_batch_reads = []
+        read_positions = self.stage.stage_device.read_positions
+        self.stage.connect_batch_read(
+            lambda: n_batch_reads.append(1) or read_positions()
+        )
+        self.logger.set_paths(
+            {
+                "hw/simulon_xyz_stage/x_position": 20,
+                "hw/simulon_xyz_stage/y_position": 20,
+                "hw/simulon_xyz_stage/z_position": 5,
+            }
+        )
+        self.logger.start()
+        t0 = time.time()
+        while time.time() - t0 < 1.0:
+            self.app.qtapp.processEvents()
+            time.sleep(0.01)
+        self.logger.interrupt()
+        while self.logger.is_measuring():
+            self.app.qtapp.processEvents()
+            time.sleep(0.01)
+
+        fname = self.logger.log_file_path(t0)
+        with h5py.File(fname, "r") as h5_file:
+            group = h5_file["telemetry/hw/simulon_xyz_stage"]
+            n_x = len(group["x_position/time"])
+            n_z = len(group["z_position/value"])
+            self.assertEqual(group["x_position"].attrs["unit"], "um")
+        self.assertGreater(n_x, 5)
+        self.assertLess(n_z, n_x)
+        # x and y are due together and read with a single batch read
+        self.assertLessEqual(len(n_batch_reads), n_x + n_z)
+
+        # logging again the same day appends to the file
+        self.logger.open_log(t0)
+        self.logger.sample(self.logger.groups)
+        self.logger.close_log()
+        with h5py.File(fname, "r") as h5_file:
+            self.assertEqual(
+                len(h5_file["telemetry/hw/simulon_xyz_stage/x_position/time"]),
+                n_x + 1,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
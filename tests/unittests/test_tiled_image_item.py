@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+import pyqtgraph as pg
+
+from ScopeFoundry.graphics.tiled_image_item import TiledImageItem
+from ScopeFoundry.scanning.base_raster_scan import DisplayDirtyRegions, nan_min_max
+
+
+class TiledImageItemTest(unittest.TestCase):
+
+    def setUp(self):
+        self.qtapp = pg.mkQApp()
+        self.image = np.random.default_rng(0).random((300, 200))
+        self.item = TiledImageItem(tile_size=128)
+        self.item.setImage(self.image, levels=(0.2, 0.8))
+
+    def test_tiles_cover_image(self):
+        self.assertEqual(
+            sorted(self.item.tiles), [(0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (2, 1)]
+        )
+        tile = self.item.tiles[(2, 1)]
+        self.assertEqual(tile.image.shape, (300 - 256, 200 - 128))
+        self.assertEqual((tile.pos().x(), tile.pos().y()), (256, 128))
+        np.testing.assert_array_equal(tile.getLevels(), (0.2, 0.8))
+
+    def test_update_region(self):
+        updated = []
+        for key, tile in self.item.tiles.items():
+            tile.sigImageChanged.connect(lambda key=key: updated.append(key))
+        self.image[130:140, 5] = 5.0
+        self.item.update_region(slice(130, 140), slice(5, 6))
+        self.assertEqual(updated, [(1, 0)])
+        self.assertEqual(self.item.tiles[(1, 0)].image[2, 5], 5.0)
+
+        updated.clear()
+        self.item.setLevels((0, 1))
+        self.assertEqual(sorted(updated), sorted(self.item.tiles))
+
+    def test_shape_change_rebuilds_tiles(self):
+        self.item.setImage(np.zeros((10, 10)))
+        self.assertEqual(list(self.item.tiles), [(0, 0)])
+
+
+class DisplayDirtyRegionsTest(unittest.TestCase):
+
+    def test_bounding_box(self):
+        dirty = DisplayDirtyRegions()
+        self.assertFalse(dirty.active)
+        dirty.add(0, 3, 7)
+        dirty.add(0, 5, 2)
+        dirty.add(1, 0, 0)
+        self.assertTrue(dirty.active)
+        self.assertEqual(dirty.pop(0), (slice(3, 6), slice(2, 8)))
+        self.assertIsNone(dirty.pop(0))
+        dirty.reset()
+        self.assertFalse(dirty.active)
+        self.assertIsNone(dirty.pop(1))
+
+    def test_nan_min_max(self):
+        self.assertIsNone(nan_min_max(np.full((3, 3), np.nan)))
+        self.assertEqual(nan_min_max(np.array([np.nan, 2.0, -1.0])), (-1.0, 2.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
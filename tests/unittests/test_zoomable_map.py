@@ -0,0 +1,122 @@
+import time
+import unittest
+
+import numpy as np
+import pyqtgraph as pg
+
+from ScopeFoundry.graphics.zoomable_map.zoomable_map import (
+    ZoomableMapImageItem,
+    box_downsample,
+)
+
+
+class ZoomableMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.qtapp = pg.mkQApp()
+        self.plot = pg.PlotItem()
+        self.image = np.random.default_rng(0).random((1000, 700))
+        self.zmi = ZoomableMapImageItem(self.plot, self.image, tile_size=128)
+
+    def tearDown(self):
+        self.zmi.shutdown()
+
+    def wait_for_tiles(self, timeout=10):
+        t0 = time.time()
+        while self.zmi.pending and time.time() - t0 < timeout:
+            self.qtapp.processEvents()
+            time.sleep(0.005)
+        self.qtapp.processEvents()
+
+    def test_box_downsample(self):
+        a = np.arange(5 * 3, dtype=np.uint16).reshape(5, 3)
+        b = box_downsample(a, 2)
+        self.assertEqual(b.dtype, a.dtype)
+        np.testing.assert_array_equal(
+            b,
+            np.rint(
+                [
+                    [a[:2, :2].mean(), a[:2, 2].mean()],
+                    [a[2:4, :2].mean(), a[2:4, 2].mean()],
+                    [a[4, :2].mean(), a[4, 2].mean()],
+                ]
+            ),
+        )
+        rgb = np.random.default_rng(1).random((8, 8, 3))
+        np.testing.assert_allclose(
+            box_downsample(rgb, 4)[1, 0], rgb[4:, :4].mean(axis=(0, 1))
+        )
+
+    def test_placeholder_until_tile_is_built(self):
+        z_max = self.zmi.get_max_zoom()
+        self.assertEqual(z_max, 3)
+        self.wait_for_tiles()
+        self.assertEqual(set(self.zmi.visible_tiles), {(3, 0, 0)})
+
+        self.zmi.wanted_tiles = {(0, 5, 2)}
+        self.zmi.update_visible_tiles()
+        # lowest zoom stands in while the tile is built
+        self.assertIn((0, 5, 2), self.zmi.pending)
+        self.assertEqual(set(self.zmi.visible_tiles), {(3, 0, 0)})
+        self.wait_for_tiles()
+        self.assertEqual(set(self.zmi.visible_tiles), {(3, 0, 0), (0, 5, 2)})
+        np.testing.assert_array_equal(
+            self.zmi.tile_cache[(0, 5, 2)].data, self.image[640:768, 256:384]
+        )
+        np.testing.assert_allclose(
+            self.zmi.tile_cache[(3, 0, 0)].data[:125, :88],
+            box_downsample(self.image, 8),
+        )
+
+    def test_update_region(self):
+        self.zmi.wanted_tiles = {(0, 5, 2), (0, 0, 0)}
+        self.zmi.update_visible_tiles()
+        self.wait_for_tiles()
+        self.image[700:710, 300] = 5.0
+        self.zmi.update_region(slice(700, 710), slice(300, 301))
+        self.assertEqual(set(self.zmi.pending), {(0, 5, 2), (3, 0, 0)})
+        # previous data is shown until rebuilt
+        self.assertIn((0, 5, 2), self.zmi.visible_tiles)
+        self.wait_for_tiles()
+        self.assertEqual(self.zmi.tile_cache[(0, 5, 2)].data[60, 44], 5.0)
+        np.testing.assert_allclose(
+            self.zmi.tile_cache[(3, 0, 0)].data[:125, :88],
+            box_downsample(self.image, 8),
+        )
+
+    def test_set_image_keeps_pyramid(self):
+        frames = np.zeros((2, 300, 200))
+        zmi = ZoomableMapImageItem(
+            self.plot, frames[0].T, tile_size=64, pyramid="memory"
+        )
+        pyramid = zmi.pyramid
+        # new views of the same frame, e.g. live scans
+        frames[0, 10:20] = 1.0
+        zmi.setImage(frames[0].T)
+        self.assertIs(zmi.pyramid, pyramid)
+        zmi.pyramid.wait()
+        np.testing.assert_allclose(zmi.pyramid.level(1), box_downsample(frames[0].T, 2))
+        # another frame of the same shape
+        zmi.setImage(frames[1].T)
+        self.assertIs(zmi.pyramid, pyramid)
+        self.assertIs(zmi.pyramid.source, zmi.image)
+        zmi.setImage(np.zeros((100, 100)))
+        self.assertIsNot(zmi.pyramid, pyramid)
+        zmi.shutdown()
+
+    def test_cache_byte_budget(self):
+        tile_bytes = 128 * 128 * 8
+        self.zmi.cache_bytes = 5 * tile_bytes
+        for ii in range(7):
+            self.zmi.wanted_tiles = {(0, ii, 0)}
+            self.zmi.update_visible_tiles()
+            self.wait_for_tiles()
+        cached = list(self.zmi.tile_cache)
+        self.assertEqual(len(cached), 5)
+        self.assertIn((0, 6, 0), cached)
+        self.assertIn((3, 0, 0), cached)
+        self.assertNotIn((0, 0, 0), cached)
+
+
+if __name__ == "__main__":
+    unittest.main()